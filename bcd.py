@@ -0,0 +1,48 @@
+# ADC and SBC in decimal mode (D flag)
+#
+# The results of both instructions for one byte are precomputed:
+# ADC[carry << 16 | a << 8 | b] is result | carry out << 8 | overflow << 9,
+# SBC the same for a - b with carry as inverted borrow. The digits are
+# adjusted the way the 65816 does it, which also gives the results of
+# invalid BCD digits. A 16 bit operation is two lookups, the carry of the
+# low byte goes into the one of the high byte (see
+# CPU65816.decimal_arithmetic).
+
+CARRY = 0x100
+OVERFLOW = 0x200
+
+
+def adc_entry(a, b, carry):
+    result = (a & 0x0F) + (b & 0x0F) + carry
+    if result > 0x09:
+        result += 0x06
+    carry = 1 if result > 0x0F else 0
+    result = (a & 0xF0) + (b & 0xF0) + (carry << 4) + (result & 0x0F)
+    overflow = (~(a ^ b) & (a ^ result) & 0x80) >> 7
+    if result > 0x9F:
+        result += 0x60
+    carry = 1 if result > 0xFF else 0
+    return (result & 0xFF) | (carry << 8) | (overflow << 9)
+
+
+# a - b is a + (b ^ 0xFF) + carry, adjusted downwards
+def sbc_entry(a, b, carry):
+    b = b ^ 0xFF
+    result = (a & 0x0F) + (b & 0x0F) + carry
+    if result <= 0x0F:
+        result -= 0x06
+    carry = 1 if result > 0x0F else 0
+    result = (a & 0xF0) + (b & 0xF0) + (carry << 4) + (result & 0x0F)
+    overflow = (~(a ^ b) & (a ^ result) & 0x80) >> 7
+    if result <= 0xFF:
+        result -= 0x60
+    carry = 1 if result > 0xFF else 0
+    return (result & 0xFF) | (carry << 8) | (overflow << 9)
+
+
+def build_table(entry):
+    return [entry(a, b, carry) for carry in (0, 1) for a in range(256) for b in range(256)]
+
+
+ADC = build_table(adc_entry)
+SBC = build_table(sbc_entry)
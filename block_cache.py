@@ -0,0 +1,268 @@
+import collections
+
+from memory import wram_page
+from opcodes import opcode_map
+
+
+# Basic block translation cache
+#
+# Decoding an instruction means reading the opcode and the operand bytes
+# through the memory mapper and looking up the handler. For code that runs
+# over and over (loops, subroutines) this work is done once: a straight-line
+# run of instructions up to the next branch, jump, return or mode change is
+# decoded into a Block and kept in the cache.
+#
+# Blocks are keyed on PBR:PC and on the mode (e, M and X flag), because the
+# handlers and the operand sizes depend on the mode.
+#
+# Code from ROM can not change. Code executed from WRAM can: the memory
+# mapper reports writes to WRAM pages holding cached code and every block
+# decoded from that page is thrown away. Code from other memory which is not
+# ROM (SRAM, I/O) is never cached, writes there are not reported.
+
+# upper limit of instructions in one block
+MAX_BLOCK_LENGTH = 64
+
+# Idle loops: a block which only reads memory and branches back to its own
+# start, like 'LDA $4210 / BPL' or 'BIT $4212 / BPL' waiting for vblank.
+# If one run through it leaves the registers unchanged it spins until
+# something outside the CPU changes the memory (see CPU65816.run_to).
+IDLE_LOOP_MNEMONICS = frozenset(('LDA', 'LDX', 'LDY', 'BIT', 'CMP', 'CPX', 'CPY', 'AND', 'ORA', 'EOR', 'NOP'))
+IDLE_LOOP_BRANCHES = frozenset(('BPL', 'BMI', 'BVC', 'BVS', 'BCC', 'BCS', 'BNE', 'BEQ', 'BRA'))
+
+# number of executions after which a block is translated to Python source
+# (see recompiler.py), None runs every block in the interpreter
+RECOMPILE_THRESHOLD = 32
+
+# Superinstructions: frequent short sequences of instructions (like
+# 'ASL A / ASL A / ASL A / ASL A' or 'LDA abs / STA abs') can be fused into
+# one function (see Recompiler.compile_sequence), which the interpreter
+# calls once for the whole sequence. Which sequences are worth it is found
+# by profiling: sequence_profile() counts how often every sequence ran in
+# the interpreted blocks, fuse() fuses the chosen ones.
+MAX_FUSED_LENGTH = 4
+
+
+class Block(object):
+    def __init__(self, address, instructions, pages, recompile_threshold=None):
+        self.address = address  # PBR:PC of the first instruction
+        # (handler, operand, PC of the last byte of the instruction)
+        self.instructions = instructions
+        self.pages = pages  # WRAM pages the block was decoded from
+        self.recompile_threshold = recompile_threshold
+        self.executions = 0
+        self.idle = False  # idle loop, see IDLE_LOOP_MNEMONICS
+        self.opcodes = ()  # opcode of every instruction
+        self.mode = 0  # mode_index() of the handlers
+        # what execute() runs: the instructions, some of them fused (see MAX_FUSED_LENGTH)
+        self.steps = instructions
+        self.run = self.execute  # replaced by the recompiled function once the block is hot
+
+    def execute(self, cpu):
+        # the handlers expect PC on the last byte, like after the operand fetch
+        for handler, operand, pc in self.steps:
+            cpu.PC = pc
+            handler(cpu, operand)
+        self.executions += 1
+        if self.executions == self.recompile_threshold:
+            self.recompile(cpu)
+
+    def recompile(self, cpu):
+        from recompiler import NotRecompilable, recompiler_for
+        try:
+            self.run = recompiler_for(type(cpu)).compile_block(self)
+        except NotRecompilable:
+            pass  # stays in the interpreter
+
+    # True if one of the instructions after the first one starts at address
+    def runs_over(self, address):
+        bank = self.address & 0xFF0000
+        for handler, operand, pc in self.instructions[:-1]:
+            if bank + ((pc + 1) & 0xFFFF) == address:
+                return True
+        return False
+
+    # an invalidated block which is running stops after the current
+    # instruction, PC then points to the (maybe modified) next instruction
+    def invalidate(self):
+        del self.instructions[:]
+        del self.steps[:]
+
+
+# see IDLE_LOOP_MNEMONICS
+def is_idle_loop(start, instructions, opcodes):
+    if opcode_map[opcodes[-1]][0] not in IDLE_LOOP_BRANCHES:
+        return False
+    for opcode in opcodes[:-1]:
+        if opcode_map.get(opcode, ('',))[0] not in IDLE_LOOP_MNEMONICS:
+            return False
+    handler, nearlabel, pc = instructions[-1]
+    if nearlabel >= 0x80:
+        nearlabel -= 0x100
+    return (pc + 1 + nearlabel) & 0xFFFF == start
+
+
+class BlockCache(object):
+    def __init__(self, memory, recompile_threshold=RECOMPILE_THRESHOLD):
+        self.memory = memory
+        self.recompile_threshold = recompile_threshold
+        self.blocks = {}
+        self.page_blocks = {}  # WRAM page -> keys of the blocks decoded from it
+        self.stops = set()  # PBR:PC a block must start at (breakpoints, see CPU65816.run)
+        self.fused = {}  # (mode, opcode, opcode, ...) -> superinstruction
+        # WRAM code is only cached if the memory can report writes to it
+        self.code_pages = getattr(memory, 'code_pages', None)
+        if self.code_pages is not None:
+            memory.code_cache = self
+        # memories without is_rom are ROM outside of the WRAM
+        self.is_rom = getattr(memory, 'is_rom', None)
+
+    # The cache of a fork of the memory (see CPU65816.fork): the blocks
+    # decoded from ROM are the same for both, the ones from WRAM are decoded
+    # again.
+    def fork(self, memory):
+        cache = BlockCache(memory, self.recompile_threshold)
+        cache.blocks = dict(self.blocks)
+        for keys in self.page_blocks.values():
+            for key in keys:
+                cache.blocks.pop(key, None)
+        cache.stops = set(self.stops)
+        cache.fused = dict(self.fused)
+        return cache
+
+    # returns the block at PBR:PC for the current mode or None if the code
+    # can not be cached
+    def lookup(self, cpu):
+        key = (((cpu.PBR << 16) + cpu.PC) << 3) + cpu.mode
+        block = self.blocks.get(key)
+        if block is None:
+            block = self.translate(cpu)
+            if block is not None:
+                self.add(key, block)
+        return block
+
+    def translate(self, cpu):
+        handlers = cpu.handlers
+        bank = cpu.PBR << 16
+        pc = cpu.PC
+        instructions = []
+        opcodes = []
+        pages = set()
+        while True:
+            address = bank + pc
+            if instructions and address in self.stops:
+                return self.block(cpu, instructions, pages, opcodes)
+            opcode = cpu.read_code(pc)
+            opcodes.append(opcode)
+            handler = handlers[opcode]
+            operand = 0
+            for shift in range(0, 8 * handler.operand_size, 8):
+                pc = (pc + 1) & 0xFFFF  # PC wrapping
+                operand += cpu.read_code(pc) << shift
+            for code_address in (address, bank + pc):
+                page = wram_page(code_address)
+                if page is not None:
+                    if self.code_pages is None:
+                        return None
+                    pages.add(page)
+                elif self.is_rom is not None and not self.is_rom(code_address):
+                    return None
+            instructions.append((handler, operand, pc))
+            pc = (pc + 1) & 0xFFFF
+            if handler.ends_block or len(instructions) == MAX_BLOCK_LENGTH:
+                return self.block(cpu, instructions, pages, opcodes)
+
+    def block(self, cpu, instructions, pages, opcodes):
+        # code in WRAM may change while the block runs, it stays in the interpreter
+        threshold = self.recompile_threshold
+        if pages:
+            threshold = None
+        block = Block((cpu.PBR << 16) + cpu.PC, instructions, pages, threshold)
+        block.idle = is_idle_loop(cpu.PC, instructions, opcodes)
+        block.opcodes = tuple(opcodes)
+        block.mode = cpu.mode
+        self.fuse_block(block)
+        return block
+
+    def add(self, key, block):
+        self.blocks[key] = block
+        for page in block.pages:
+            self.page_blocks.setdefault(page, []).append(key)
+            self.code_pages.add(page)
+
+    # (mode, opcode, opcode, ...) -> how often the sequence ran in the
+    # interpreter, for the sequences of 2 to MAX_FUSED_LENGTH instructions
+    # in the blocks of the cache
+    def sequence_profile(self):
+        profile = collections.Counter()
+        for block in self.blocks.values():
+            if not block.executions or block.pages or block.run != block.execute:
+                continue  # WRAM code is not fused, recompiled blocks do not need it
+            opcodes = block.opcodes
+            for length in range(2, MAX_FUSED_LENGTH + 1):
+                for start in range(len(opcodes) - length + 1):
+                    profile[(block.mode,) + opcodes[start:start + length]] += block.executions
+        return profile
+
+    # Fuses every sequence (mode, opcode, opcode, ...) into a
+    # superinstruction, in the blocks in the cache and the ones translated
+    # later. handler_tables are the handler tables per mode. Sequences the
+    # recompiler can not fuse stay as they are.
+    def fuse(self, sequences, handler_tables, recompiler):
+        from recompiler import NotRecompilable
+        for sequence in sequences:
+            if sequence in self.fused or not 2 <= len(sequence) - 1 <= MAX_FUSED_LENGTH:
+                continue
+            handlers = [handler_tables[sequence[0]][opcode] for opcode in sequence[1:]]
+            try:
+                self.fused[sequence] = recompiler.compile_sequence(handlers)
+            except NotRecompilable:
+                pass
+        for block in self.blocks.values():
+            self.fuse_block(block)
+
+    # Replaces the steps of the block by superinstructions where possible,
+    # longest sequences first. Code in WRAM is not fused: an instruction may
+    # change the next one, which then has to be decoded again.
+    def fuse_block(self, block):
+        if not self.fused or block.pages:
+            return
+        instructions = block.instructions
+        steps = []
+        start = 0
+        while start < len(instructions):
+            for length in range(MAX_FUSED_LENGTH, 1, -1):
+                fused = self.fused.get((block.mode,) + block.opcodes[start:start + length])
+                if fused is not None and start + length <= len(instructions):
+                    operands = tuple(operand for handler, operand, pc in instructions[start:start + length])
+                    steps.append((fused, operands, instructions[start][2]))
+                    start += length
+                    break
+            else:
+                steps.append(instructions[start])
+                start += 1
+        block.steps = steps
+
+    # makes the instruction at address (PBR:PC) the start of a block, blocks
+    # running over it are thrown away
+    def split_at(self, address):
+        self.stops.add(address)
+        for key, block in list(self.blocks.items()):
+            if block.runs_over(address):
+                del self.blocks[key]
+
+    # called by the memory mapper after a write to a page in code_pages
+    def invalidate_page(self, page):
+        self.code_pages.discard(page)
+        for key in self.page_blocks.pop(page, ()):
+            block = self.blocks.pop(key, None)
+            if block is not None:
+                block.invalidate()
+
+    def clear(self):
+        for block in self.blocks.values():
+            block.invalidate()
+        self.blocks.clear()
+        self.page_blocks.clear()
+        if self.code_pages is not None:
+            self.code_pages.clear()
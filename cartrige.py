@@ -114,18 +114,18 @@ class ROMHeader(object):
     # Find mem addr of interrupt code
     def parse_header_interrups(self, rom_byte_array, start_address):
         addr = start_address
-        self.native_cop_int_addr   = get_two_bytes_little_endian(rom_byte_array[addr + 38], rom_byte_array[addr + 39])
-        self.native_brk_int_addr   = get_two_bytes_little_endian(rom_byte_array[addr + 40], rom_byte_array[addr + 41])
-        self.native_abort_int_addr = get_two_bytes_little_endian(rom_byte_array[addr + 42], rom_byte_array[addr + 43])
-        self.native_reset_int_addr = get_two_bytes_little_endian(rom_byte_array[addr + 44], rom_byte_array[addr + 45])
+        self.native_cop_int_addr   = get_two_bytes_little_endian(rom_byte_array[addr + 36], rom_byte_array[addr + 37])
+        self.native_brk_int_addr   = get_two_bytes_little_endian(rom_byte_array[addr + 38], rom_byte_array[addr + 39])
+        self.native_abort_int_addr = get_two_bytes_little_endian(rom_byte_array[addr + 40], rom_byte_array[addr + 41])
+        self.native_nmi_int_addr   = get_two_bytes_little_endian(rom_byte_array[addr + 42], rom_byte_array[addr + 43])
         self.native_irq_int_addr   = get_two_bytes_little_endian(rom_byte_array[addr + 46], rom_byte_array[addr + 47])
         # co processor enable
-        self.cop_int_addr   = get_two_bytes_little_endian(rom_byte_array[addr + 54], rom_byte_array[addr + 55])
+        self.cop_int_addr   = get_two_bytes_little_endian(rom_byte_array[addr + 52], rom_byte_array[addr + 53])
         self.abort_int_addr = get_two_bytes_little_endian(rom_byte_array[addr + 56], rom_byte_array[addr + 57])
         self.nmi_int_addr   = get_two_bytes_little_endian(rom_byte_array[addr + 58], rom_byte_array[addr + 59])
         # execution begins at reset code (entry point of game)
         self.reset_int_addr = get_two_bytes_little_endian(rom_byte_array[addr + 60], rom_byte_array[addr + 61])
-        self.irq_int_addr   = get_two_bytes_little_endian(rom_byte_array[addr + 62], rom_byte_array[addr + 63]) # TODO BRK
+        self.irq_int_addr   = get_two_bytes_little_endian(rom_byte_array[addr + 62], rom_byte_array[addr + 63]) # also BRK
 
     def dump(self):
         print("HEADER START:       \t"   + hex(self.addr))
@@ -153,7 +153,7 @@ class ROMHeader(object):
         print("NATIVE COP INTERRUPT ADDR:  \t0x" + hex(self.native_cop_int_addr))
         print("NATIVE BRK INTERRUPT ADDR:  \t0x" + hex(self.native_brk_int_addr))
         print("NATIVE ABORT INTERRUPT ADDR:\t0x" + hex(self.native_abort_int_addr))
-        print("NATIVE RESET INTERRUPT ADDR:\t0x" + hex(self.native_reset_int_addr))
+        print("NATIVE NMI INTERRUPT ADDR:  \t0x" + hex(self.native_nmi_int_addr))
         print("NATIVE IRQ INTERRUPT ADDR:  \t0x" + hex(self.native_irq_int_addr))
         print("COP INTERRUPT ADDR:         \t0x" + hex(self.cop_int_addr))
         print("ABORT INTERRUPT ADDR:       \t0x" + hex(self.abort_int_addr))
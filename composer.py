@@ -0,0 +1,231 @@
+import sys
+
+from opcodes import Mode, opcode_map
+
+
+# Handlers put together from the opcode table
+#
+# Most instructions are one operation (ADC, LDA, ...) combined with one of
+# the addressing modes of opcodes.py. Instead of writing every combination by
+# hand, the handlers of the mnemonics in OPERATIONS are composed at import
+# time: for every opcode of such a mnemonic in opcode_map the source of the
+# addressing mode (ADDRESSING) and the source of the operation are put
+# together to the source of a plain CPU65816 method, like
+#
+#     def sbc_abs(self):
+#         bytes = self.fetch_twobyte()
+#         address = compute_addr.abs(bytes, self.DBR)
+#         value = self.read_memory(address, byte_num=2 - self.m())
+#         ...operation of SBC...
+#         self.cycles += 5 - self.m()
+#         self.PC = self.PC + 1
+#
+# The composed methods keep their source in the attribute 'source' and are
+# specialized per mode like the hand written ones (see specializer.py).
+
+# how an operation uses the operand
+READ = 1    # reads it into 'value'
+WRITE = 2   # writes the value of an expression to it
+MODIFY = 3  # reads it into 'value' and writes 'result' back
+
+# Addressing mode -> (suffix of the handler name, source computing 'address',
+# cycles of a 16 bit read, one more cycle if the low byte of DP is not 0,
+# one more cycle for a read crossing a page, the access wraps at bank 0).
+# IMMEDIATE_MINUS_M fetches the value itself.
+ADDRESSING = {
+    Mode.IMMEDIATE_MINUS_M: ('immediate', '''
+if self.isM():
+    value = self.fetch_byte()
+else:
+    value = self.fetch_twobyte()
+''', 3, False, False, False),
+    Mode.DIRECT: ('dp', '''
+byte = self.fetch_byte()
+address = compute_addr.dp(byte, self.DP)
+''', 4, True, False, True),
+    Mode.DIRECT_INDEXED_WITH_X: ('dp_x', '''
+byte = self.fetch_byte()
+address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
+''', 5, True, False, True),
+    Mode.DIRECT_INDIRECT: ('dp_indirect', '''
+byte = self.fetch_byte()
+address_pointer = compute_addr.dp(byte, self.DP)
+bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True)  # zero bank wrapping!
+address = compute_addr.abs(bytes, self.DBR)
+''', 6, True, False, False),
+    Mode.DIRECT_INDEXED_INDIRECT_X: ('dp_x_indirect', '''
+byte = self.fetch_byte()
+address_pointer = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
+bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True)  # zero bank wrapping!
+address = compute_addr.abs(bytes, self.DBR)
+''', 7, True, False, False),
+    Mode.DIRECT_INDIRECT_INDEXED_Y: ('dp_indirect_y', '''
+byte = self.fetch_byte()
+address_pointer = compute_addr.dp(byte, self.DP)
+bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True)  # zero bank wrapping!
+address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
+''', 7, True, True, False),
+    Mode.DIRECT_INDIRECT_LONG: ('dp_indirect_long', '''
+byte = self.fetch_byte()
+address_pointer = compute_addr.dp(byte, self.DP)
+address = self.read_memory(address_pointer, byte_num=3, wrapp=True)  # zero bank wrapping!
+''', 7, True, False, False),
+    Mode.DIRECT_INDIRECT_INDEXED_LONG_Y: ('dp_indirect_long_y', '''
+byte = self.fetch_byte()
+address_pointer = compute_addr.dp(byte, self.DP)
+bytes = self.read_memory(address_pointer, byte_num=3, wrapp=True)  # zero bank wrapping!
+address = compute_addr.long_y(bytes, self.Y, self.isX())
+''', 7, True, False, False),
+    Mode.ABSOLUTE: ('abs', '''
+bytes = self.fetch_twobyte()
+address = compute_addr.abs(bytes, self.DBR)
+''', 5, False, False, False),
+    Mode.ABSOLUTE_INDEXED_WITH_X: ('abs_x', '''
+bytes = self.fetch_twobyte()
+address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
+''', 6, False, True, False),
+    Mode.ABSOLUTE_INDEXED_WITH_Y: ('abs_y', '''
+bytes = self.fetch_twobyte()
+address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
+''', 6, False, True, False),
+    Mode.ABSOLUTE_LONG: ('long', '''
+address = self.fetch_threebyte()  # no wrapping
+''', 6, False, False, False),
+    Mode.ABSOLUTE_INDEXED_LONG_X: ('long_x', '''
+bytes = self.fetch_threebyte()
+address = compute_addr.long_x(bytes, self.X, self.isX())
+''', 6, False, False, False),
+    Mode.STACK_RELATIVE: ('stack_relative', '''
+byte = self.fetch_byte()
+address = compute_addr.stack(byte, self.SP)
+''', 5, False, False, True),
+    Mode.STACK_RELATIVE_INDIRECT_INDEXED_Y: ('stack_relative_indirect_y', '''
+byte = self.fetch_byte()
+address_pointer = compute_addr.stack(byte, self.SP)
+bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True)  # zero bank wrapping!
+address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
+''', 8, False, False, False),
+}
+
+# Mnemonic -> (READ, source using 'value') or (WRITE, expression written) or
+# (MODIFY, source computing 'result' from 'value'). All of them work on the
+# width of A (M flag), with an 8 bit A the high byte (B) is kept.
+OPERATIONS = {
+    'ADC': (READ, '''
+if self.flag_d:
+    result = self.decimal_arithmetic(bcd.ADC, self.A, value, self.isM())
+else:
+    result = self.add_twos_complement(self.A, value + self.flag_c, self.isM())
+self.compute_NZflags(result, self.isM())
+if self.isM():
+    result = result | (self.A & 0xFF00)  # B is not changed
+self.A = result
+'''),
+    'SBC': (READ, '''
+if self.flag_d:
+    result = self.decimal_arithmetic(bcd.SBC, self.A, value, self.isM())
+else:
+    result = self.subtract_with_borrow(self.A, value, self.isM())
+self.compute_NZflags(result, self.isM())
+if self.isM():
+    result = result | (self.A & 0xFF00)  # B is not changed
+self.A = result
+'''),
+    'AND': (READ, '''
+self.A = self.compute_logic_operation(self.A & value)
+'''),
+    'EOR': (READ, '''
+self.A = self.compute_logic_operation(self.A ^ value)
+'''),
+    'ORA': (READ, '''
+self.A = self.compute_logic_operation(self.A | value)
+'''),
+    'CMP': (READ, '''
+result = self.A - value
+self.compute_NZflags(result, self.isM())
+if self.A >= value:
+    self.flag_c = 1
+else:
+    self.flag_c = 0
+'''),
+    'LDA': (READ, '''
+self.compute_NZflags(value, self.isM())
+if self.isM():
+    value = value | (self.A & 0xFF00)  # B is not changed
+self.A = value
+'''),
+    'STA': (WRITE, 'self.A'),
+    'ASL': (MODIFY, '''
+result = self.shift_left(value, 0, self.isM())
+'''),
+    'ROL': (MODIFY, '''
+result = self.shift_left(value, self.flag_c, self.isM())
+'''),
+    'LSR': (MODIFY, '''
+result = self.shift_right(value, 0, self.isM())
+'''),
+    'ROR': (MODIFY, '''
+result = self.shift_right(value, self.flag_c, self.isM())
+'''),
+}
+
+# One more cycle with a 16 bit index or if adding the 8 bit index crosses a
+# page. An 8 bit index crosses at most one page, so bit 8 of the base
+# ('bytes') and the final address differ exactly when it does.
+PAGE_CROSSING = ' - self.x() + ((bytes ^ address) >> 8 & self.x())'
+
+
+# Adds a composed handler for every opcode of the mnemonics in OPERATIONS to
+# the class. The sources are compiled in the namespace of the module of the
+# class, like the hand written methods.
+def compose_handlers(cpu_class):
+    namespace = vars(sys.modules[cpu_class.__module__])
+    taken = set(getattr(handler, 'opcode', None) for handler in vars(cpu_class).values())
+    for opcode in sorted(opcode_map):
+        mnemonic, mode = opcode_map[opcode][:2]
+        if mnemonic not in OPERATIONS or mode not in ADDRESSING:
+            continue
+        if opcode in taken:
+            raise Exception("Error: opcode " + hex(opcode) + " has a hand written handler")
+        name, source = handler_source(opcode)
+        functions = {}
+        exec(compile(source, '<' + name + '>', 'exec'), namespace, functions)
+        handler = functions[name]
+        handler.opcode = opcode
+        handler.changes_mode = False
+        handler.ends_block = False
+        handler.source = source
+        setattr(cpu_class, name, handler)
+
+
+# (name, source) of the composed handler of an opcode
+def handler_source(opcode):
+    mnemonic, mode = opcode_map[opcode][:2]
+    kind, operation = OPERATIONS[mnemonic]
+    suffix, addressing, cycles, direct_page, indexed, wrapp = ADDRESSING[mode]
+    name = mnemonic.lower() + '_' + suffix
+    access = 'address, byte_num=2 - self.m()'
+    if wrapp:
+        access += ', wrapp=True'  # zero bank wrapping!
+    lines = addressing.strip().splitlines()
+    if mode != Mode.IMMEDIATE_MINUS_M:
+        if kind != WRITE:
+            lines.append('value = self.read_memory(%s)' % access)
+    elif kind != READ:
+        raise Exception("Error: " + mnemonic + " has no immediate mode")
+    if kind == WRITE:
+        lines.append('self.write_memory(%s)' % access.replace(', ', ', %s, ' % operation, 1))
+    else:
+        lines.extend(operation.strip().splitlines())
+    if kind == MODIFY:
+        lines.append('self.write_memory(%s)' % access.replace(', ', ', result, ', 1))
+        cycles = '%d - 2 * self.m()' % (cycles + 3)
+    else:
+        cycles = '%d - self.m()' % cycles
+    if direct_page:
+        cycles += ' + self.w()'
+    if indexed and kind == READ:
+        cycles += PAGE_CROSSING
+    lines.append('self.cycles += ' + cycles)
+    lines.append('self.PC = self.PC + 1')
+    return name, 'def %s(self):\n%s\n' % (name, ''.join('    ' + line + '\n' for line in lines))
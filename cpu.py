@@ -1,7 +1,71 @@
+import collections
+import functools
+import struct
+
 import address_computation_helper as compute_addr
+import bcd
+import timing
+from block_cache import RECOMPILE_THRESHOLD, BlockCache
+from memory import WatchedMemory, read16_bytewise, read24_bytewise, write16_bytewise
+
+
+# marks a CPU65816 method as the handler of an opcode (see build_opcode_table)
+# changes_mode: the handler writes e, M or X and can not be specialized
+# ends_block: the instruction has to be the last one of a block (see block_cache.py)
+def instruction(opcode, changes_mode=False, ends_block=False):
+    def register(handler):
+        handler.opcode = opcode
+        handler.changes_mode = changes_mode
+        handler.ends_block = ends_block
+        return handler
+    return register
+
+
+# why run(), run_until() and run_frames() returned
+class StopReason(object):
+    CYCLES = 1      # the cycle budget is used up
+    PC = 2          # PBR:PC reached the address passed to run_until()
+    BREAKPOINT = 3
+    WATCHPOINT = 4
+    STOPPED = 5     # STP, only a reset starts the CPU again
+    WAITING = 6     # WAI without a cycle limit, nothing can wake the CPU up
+    HALTED = 7      # halted by a DMA (see Scheduler.start_dma), after the block of the write
+
+
+# the interrupts, index into the vector tables below
+class Interrupt(object):
+    COP = 0
+    BRK = 1
+    ABORT = 2
+    NMI = 3
+    IRQ = 4
+
+
+# address of the vector of every Interrupt in bank 0, in native and in
+# emulation mode (BRK and IRQ share one vector in emulation mode)
+NATIVE_VECTORS = (0xFFE4, 0xFFE6, 0xFFE8, 0xFFEA, 0xFFEE)
+EMULATION_VECTORS = (0xFFF4, 0xFFFE, 0xFFF8, 0xFFFA, 0xFFFE)
+
+# end of run_until() without a cycle limit
+NO_LIMIT = float('inf')
+
+# A, X, Y, SP, DP, DBR, PBR, PC, P, e, cycles (see get_state)
+STATE = struct.Struct('<HHHHHBBHBBQ')
+
 
 class CPU65816(object):
-    def __init__(self, memory):
+    # no instance dict: faster attribute access in the handlers
+    __slots__ = ('A', 'X', 'Y', 'SP', 'DBR', 'DP', 'PBR', 'PC', 'memory', 'cycles', 'emulation', 'stack',
+                 'flag_c', 'nz', 'flag_i', 'flag_d', 'flag_x', 'flag_m', 'flag_v', 'mode', 'handlers',
+                 'block_cache', 'breakpoints', 'watchpoints', 'watchpoint_hit', 'waiting', 'stopped',
+                 'vectors', 'nmi_pending', 'irq_line', 'halted',
+                 'code_bank', 'code_buffer', 'code_base', 'code_first', 'code_last', 'low_wram',
+                 'read16', 'read24', 'write16')
+
+    # recompile_threshold: executions of a block before it is recompiled
+    # (see block_cache.py), None runs everything in the interpreter, e.g. to
+    # compare both
+    def __init__(self, memory, recompile_threshold=RECOMPILE_THRESHOLD):
         self.A = 0      # Accumulator           - 8 or 16 Bit (also called A(8Bit) and B(next 8Bit))
         self.X = 0      # Index Register        - 8 or 16 Bit
         self.Y = 0      # Index Register        - 8 or 16 Bit
@@ -10,2138 +74,1582 @@ class CPU65816(object):
         self.DP = 0     # Direct Page Register  - 16 Bit (also called D)
         self.PBR = 0    # Program Bank Register - 8 Bit (also called K)
         #self.P = 0x34   # Flag Register         - 8 Bit #TODO check if init ok
-        self.P = 0
+        # Flag Register P - every flag is kept in its own field, P is only
+        # packed and unpacked by the property below
+        self.flag_c = 0 # carry
+        self.nz = 1     # N and Z flag, see isN() and isZ()
+        self.flag_i = 0 # IRQ disable
+        self.flag_d = 0 # decimal mode
+        self.flag_x = 0 # 8 Bit index registers (break flag in emulation mode)
+        self.flag_m = 0 # 8 Bit accumulator and memory
+        self.flag_v = 0 # overflow
         self.PC = memory.header.reset_int_addr  # Program Counter       - 16 Bit
         self.memory = memory
         self.cycles = 0
-        self.e = 1  # e-flag = 0 (native 16 Bit) e-flag = 1 (emulation 8 Bit)
-        self.stack = [] # only for debugging
+        self.emulation = 1  # backing field of e
+        self.stack = None  # recent stack operations, only for debugging (see trace_stack)
+        self.block_cache = BlockCache(memory, recompile_threshold)
+        self.breakpoints = set()  # PBR:PC
+        self.watchpoints = set()  # addresses, run() stops after a write to one of them
+        self.watchpoint_hit = None  # address of the write that stopped run()
+        self.waiting = False  # WAI, sleeps until the next interrupt
+        self.stopped = False  # STP
+        self.vectors = None  # handler of every Interrupt by e, see resolve_vectors()
+        self.nmi_pending = False  # see nmi()
+        self.irq_line = False  # see irq()
+        self.halted = False  # a DMA started, run_to() stops at the next block
+        # instruction fetch window of the program bank, see read_code()
+        self.code_bank = None
+        self.code_buffer = None
+        self.code_base = 0
+        self.code_first = 1
+        self.code_last = 0
+        self.resolve_low_wram()
+        self.resolve_multibyte_access()
+        self.update_mode()
+        if hasattr(memory, 'remapped'):
+            memory.remapped = self.resolve_mapping
+
+    # Flag Register - 8 Bit
+    @property
+    def P(self):
+        P = (self.flag_v << 6) | (self.flag_m << 5) | (self.flag_x << 4) | (self.flag_d << 3) \
+            | (self.flag_i << 2) | self.flag_c
+        if self.isN():
+            P = P | 0b10000000
+        if self.isZ():
+            P = P | 0b00000010
+        return P
+
+    @P.setter
+    def P(self, value):
+        self.flag_c = value & 0b00000001
+        self.nz = ((value & 0b10000000) << 9) | (~value & 0b00000010)
+        self.flag_i = (value >> 2) & 1
+        self.flag_d = (value >> 3) & 1
+        self.flag_x = (value >> 4) & 1
+        self.flag_m = (value >> 5) & 1
+        self.flag_v = (value >> 6) & 1
+        self.update_mode()
+
+    # e-flag = 0 (native 16 Bit) e-flag = 1 (emulation 8 Bit)
+    @property
+    def e(self):
+        return self.emulation
+
+    @e.setter
+    def e(self, value):
+        self.emulation = value
+        self.update_mode()
+
+    # Keeps the last size pushes and pulls in self.stack as tuples
+    # ('push' or 'pull', address, byte). Off by default.
+    def trace_stack(self, size=32):
+        self.stack = collections.deque(maxlen=size)
+
+    # the registers packed into one bytes object, e.g. to fork the emulator
+    def get_state(self):
+        return STATE.pack(self.A & 0xFFFF, self.X & 0xFFFF, self.Y & 0xFFFF, self.SP & 0xFFFF,
+                          self.DP & 0xFFFF, self.DBR & 0xFF, self.PBR & 0xFF, self.PC & 0xFFFF,
+                          self.P, self.emulation, self.cycles)
+
+    def set_state(self, state):
+        (self.A, self.X, self.Y, self.SP, self.DP, self.DBR, self.PBR, self.PC,
+         P, self.emulation, self.cycles) = STATE.unpack(state)
+        self.P = P  # unpacks the flags and selects the mode
+
+    # A second CPU in the same state on a fork of the memory (see
+    # MemoryMapper.fork), both run on independently. The blocks decoded from
+    # ROM are shared (see BlockCache.fork).
+    def fork(self):
+        memory = self.memory
+        if isinstance(memory, WatchedMemory):
+            memory = memory.memory
+        child = type(self)(memory.fork(), self.block_cache.recompile_threshold)
+        child.set_state(self.get_state())
+        child.block_cache = self.block_cache.fork(child.memory)
+        child.breakpoints = set(self.breakpoints)
+        child.waiting = self.waiting
+        child.stopped = self.stopped
+        child.vectors = self.vectors
+        child.nmi_pending = self.nmi_pending
+        child.irq_line = self.irq_line
+        child.halted = self.halted
+        for address in self.watchpoints:
+            child.add_watchpoint(address)
+        return child
+
+    # select the handler table specialized for the current e, M and X flags
+    def update_mode(self):
+        self.mode = mode_index(self.emulation, self.flag_m, self.flag_x)
+        self.handlers = MODE_TABLES[self.mode]
 
 
     def fetch_decode_execute(self):
         # PC wrapping: if PC = 0xFFFF then PC + 1 = 0x0000
         self.PC = self.PC & 0xFFFF
-        opcode = self.memory.read((self.PBR << 16) +self.PC)
+        opcode = self.read_code(self.PC)
         # this meean every address > 0xFF will be wrapped. E.g. 0xFF +1 == 0x00
-        # TODO: use BCD sub if D Flag is set
-        # ADC (dp, X)
-        if opcode == 0x61:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True)  # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # ADC stk, S
-        elif opcode == 0x63:
-            byte = self.fetch_byte()
-            address = compute_addr.stack(byte, self.SP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # ADC dp
-        elif opcode == 0x65:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 4 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # ADC [dp]
-        elif opcode == 0x67:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            address = self.read_memory(address_pointer, byte_num=3, wrapp=True) # zero bank wrapping!
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # ADC #const
-        elif opcode == 0x69:
-            if self.isM():
-                const = self.fetch_byte()
-            else:
-                const = self.fetch_twobyte()
-            result = self.add_twos_complement(self.A, const + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 3 - self.m()
-            self.PC = self.PC + 1
-        # ADC abs
-        elif opcode == 0x6D:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # ADC long
-        elif opcode == 0x6F:
-            address = self.fetch_threebyte()
-            value = self.read_memory(address, byte_num=2 - self.m())  # no wrapping
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # ADC (dp), Y
-        elif opcode == 0x71:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 7 - self.m() + self.w() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # ADC (dp)
-        elif opcode == 0x72:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num=2-self.m())
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 6 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # ADC (stk, S), Y
-        elif opcode == 0x73:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.stack(byte, self.SP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True)  # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 8 - self.m()
-            self.PC = self.PC + 1
-        # ADC dir, X
-        elif opcode == 0x75:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 5 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # ADC [dir], Y
-        elif opcode == 0x77:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=3, wrapp=True) # zero bank wrapping!
-            address = compute_addr.long_y(bytes, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # ADC abs, Y
-        elif opcode == 0x79:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # ADC abs, X
-        elif opcode == 0x7D:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # ADC long, X
-        elif opcode == 0x7F:
-            bytes = self.fetch_threebyte()
-            address = compute_addr.long_x(bytes, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.add_twos_complement(self.A, value + self.c(), self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # AND (dp, X)
-        elif opcode == 0x21:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # AND stk, S
-        elif opcode == 0x23:
-            byte = self.fetch_byte()
-            address = compute_addr.stack(byte, self.SP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # AND dp
-        elif opcode == 0x25:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 4 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # AND [dp]
-        elif opcode == 0x27:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            address = self.read_memory(address_pointer, byte_num=3, wrapp=True) # zero bank wrapping!
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # AND #const
-        elif opcode == 0x29:
-            if self.isM():
-                value = self.fetch_byte()
-            else:
-                value = self.fetch_twobyte()
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 3-self.isM()
-            self.PC = self.PC + 1
-        # AND abs
-        elif opcode == 0x2D:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # AND long
-        elif opcode == 0x2F:
-            address = self.fetch_threebyte()
-            value = self.read_memory(address, byte_num=2 - self.m())  # no wrapping
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # AND (dp), Y
-        elif opcode == 0x31:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # AND (dp)
-        elif opcode == 0x32:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num=2-self.m())
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 6 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # AND (stk, S), Y
-        elif opcode == 0x33:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.stack(byte, self.SP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 8 - self.m()
-            self.PC = self.PC + 1
-        # AND dp, X
-        elif opcode == 0x35:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 5-self.m() + self.w()
-            self.PC = self.PC + 1
-        # AND [dp], Y
-        elif opcode == 0x37:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=3, wrapp=True) # zero bank wrapping!
-            address = compute_addr.long_y(bytes, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # AND abs, Y
-        elif opcode == 0x39:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # AND abs, X
-        elif opcode == 0x3D:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # AND long, X
-        elif opcode == 0x3F:
-            bytes = self.fetch_threebyte()
-            address = compute_addr.long_x(bytes, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A & value)
-            self.A = result
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # ASL A
-        elif opcode == 0x0A:
-            self.A = self.A << 1
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # BCC nearlabel
-        elif opcode == 0x90:
-            nearlabel = self.fetch_byte()
-            self.cycles += 2
-            if not self.isC():
-                self.PC = self.computeBXX(nearlabel)
-            else:
-                self.PC = self.PC + 1
-        # BCS nearlabel
-        elif opcode == 0xB0:
-            nearlabel = self.fetch_byte()
-            self.cycles += 2
-            if self.isC():
-                self.PC = self.computeBXX(nearlabel)
-            else:
-                self.PC = self.PC + 1
-        # BEQ nearlabel
-        elif opcode == 0xF0:
-            nearlabel = self.fetch_byte()
-            self.cycles += 2
-            if self.isZ():
-                self.PC = self.computeBXX(nearlabel)
-            else:
-                self.PC = self.PC + 1
-        # BIT dp
-        elif opcode == 0x24:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num=2 - self.m(), wrapp=True)  # zero bank wrapping!
-            self.compute_bit_flags(value)
-            self.cycles += 4 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # BIT abs
-        elif opcode == 0x2C:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num=2 - self.m())
-            self.compute_bit_flags(value)
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # BIT dir, X
-        elif opcode == 0x34:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m(), wrapp=True)  # zero bank wrapping!
-            self.compute_bit_flags(value)
-            self.cycles += 5 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # BIT abs, X
-        elif opcode == 0x3C:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m())
-            self.compute_bit_flags(value)
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # BIT imm
-        # this is the only bit opcode that only affects the Z flag
-        elif opcode == 0x89:
-            if self.isM():
-                value = self.fetch_byte()
-                if not value & (0x00FF & self.A):
-                    self.setZ()
-                else:
-                    self.clearZ()
-            else:
-                value = self.fetch_twobyte()
-                if not value & self.A:
-                    self.setZ()
+        handler = self.handlers[opcode]
+        handler(self, self.fetch_operand(handler.operand_size))
+
+    # runs the basic block at PBR:PC, it is decoded on the first visit only
+    def execute_block(self):
+        self.PC = self.PC & 0xFFFF
+        block = self.block_cache.lookup(self)
+        if block is None:
+            self.fetch_decode_execute()  # code the cache can not keep
+        else:
+            block.run(self)
+
+    # Runs for max_cycles cycles (a little longer, the last block is always
+    # finished) or until a breakpoint or watchpoint is hit. Returns a StopReason.
+    def run(self, max_cycles):
+        return self.run_to(self.cycles + max_cycles)
+
+    # runs until PBR:PC reaches bank:pc, a breakpoint or watchpoint is hit or
+    # max_cycles (None: no limit) are over
+    def run_until(self, pc, bank=0, max_cycles=None):
+        target = (bank << 16) + pc
+        end = NO_LIMIT if max_cycles is None else self.cycles + max_cycles
+        self.block_cache.split_at(target)
+        try:
+            return self.run_to(end, target)
+        finally:
+            if target not in self.breakpoints:
+                self.block_cache.stops.discard(target)
+
+    # runs until the end of the n-th frame from now (see timing.py)
+    def run_frames(self, n):
+        frame = self.cycles // timing.CYCLES_PER_FRAME
+        return self.run_to((frame + n) * timing.CYCLES_PER_FRAME)
+
+    # The loop behind run(), run_until() and run_frames(). The instruction at
+    # PBR:PC when it is called is always executed, so running again after a
+    # stop continues behind the breakpoint. end is the next event: pending
+    # interrupts are only taken here, not after every instruction.
+    def run_to(self, end, target=None):
+        if self.nmi_pending or self.irq_line:
+            self.service_interrupts()
+        breakpoints = self.breakpoints
+        lookup = self.block_cache.lookup
+        first = True
+        idle = None  # registers after the last run through an idle loop
+        while self.cycles < end:
+            if self.waiting or self.stopped or self.halted:
+                return self.sleep(end)
+            self.PC = self.PC & 0xFFFF
+            if not first:
+                address = (self.PBR << 16) + self.PC
+                if address == target:
+                    return StopReason.PC
+                if address in breakpoints:
+                    return StopReason.BREAKPOINT
+            first = False
+            if self.watchpoints:
+                # one instruction at a time to stop right after the write
+                self.fetch_decode_execute()
+                if self.memory.hit is not None:
+                    self.watchpoint_hit = self.memory.hit
+                    self.memory.hit = None
+                    return StopReason.WATCHPOINT
+            else:
+                block = lookup(self)
+                if block is None:
+                    self.fetch_decode_execute()
+                    idle = None
+                elif block.idle:
+                    block.run(self)
+                    idle = self.skip_idle_loop(block, idle, end)
                 else:
-                    self.clearZ()
-            self.cycles += 3 - self.m()
-            self.PC = self.PC + 1
-        # BMI nearlabel
-        elif opcode == 0x30:
-            nearlabel = self.fetch_byte()
-            self.cycles += 2
-            if self.isN():
-                self.PC = self.computeBXX(nearlabel)
-            else:
-                self.PC = self.PC + 1
-        # BNE nearlabel
-        elif opcode == 0xD0:
-            nearlabel = self.fetch_byte()
-            self.cycles += 2
-            if not self.isZ():
-                self.PC = self.computeBXX(nearlabel)
-            else:
-                self.PC = self.PC + 1
-        # BPL nearlabel
-        elif opcode == 0x10:
-            nearlabel = self.fetch_byte()
-            self.cycles += 2
-            if not self.isN():
-                self.PC = self.computeBXX(nearlabel)
-            else:
-                self.PC = self.PC + 1
-        # BRA nearlabel
-        elif opcode == 0x80:
-            nearlabel = self.fetch_byte()
-            self.cycles += 2
+                    block.run(self)
+                    idle = None
+        return StopReason.CYCLES
+
+    # After WAI nothing runs until the next interrupt, which can not come
+    # before end (the next event), so the cycles up to it pass at once.
+    def sleep(self, end):
+        if self.halted:
+            return StopReason.HALTED
+        if self.stopped:
+            return StopReason.STOPPED
+        if end == NO_LIMIT:
+            return StopReason.WAITING
+        self.cycles = end
+        return StopReason.CYCLES
+
+    # An idle loop (see block_cache.py) which went around once without
+    # changing a register only waits for the memory it reads to change. Until
+    # end nothing else runs, so the remaining runs through it are skipped by
+    # only counting their cycles.
+    def skip_idle_loop(self, block, previous, end):
+        if self.PC != block.address & 0xFFFF:
+            return None  # left the loop
+        state = (block, self.A, self.X, self.Y, self.SP, self.DP, self.DBR, self.P, self.emulation)
+        if previous is not None and previous[0] == state:
+            iteration = self.cycles - previous[1]
+            if iteration > 0 and self.cycles < end and end != NO_LIMIT:
+                self.cycles += (end - self.cycles) // iteration * iteration
+        return (state, self.cycles)
+
+    # Fuses the count instruction sequences which ran most often in the
+    # interpreter so far into superinstructions (see block_cache.py). Blocks
+    # hot enough to be recompiled do not need them and are not counted.
+    def fuse_hot_sequences(self, count=16):
+        from recompiler import recompiler_for
+        profile = self.block_cache.sequence_profile()
+        sequences = [sequence for sequence, executions in profile.most_common(count)]
+        self.block_cache.fuse(sequences, MODE_TABLES, recompiler_for(type(self)))
+
+    def add_breakpoint(self, pc, bank=0):
+        address = (bank << 16) + pc
+        self.breakpoints.add(address)
+        self.block_cache.split_at(address)
+
+    def remove_breakpoint(self, pc, bank=0):
+        address = (bank << 16) + pc
+        self.breakpoints.discard(address)
+        self.block_cache.stops.discard(address)
+
+    def add_watchpoint(self, address):
+        if not self.watchpoints:
+            self.memory = WatchedMemory(self.memory, self.watchpoints)
+            self.resolve_low_wram()
+            self.resolve_multibyte_access()
+        self.watchpoints.add(address)
+
+    def remove_watchpoint(self, address):
+        self.watchpoints.discard(address)
+        if not self.watchpoints and isinstance(self.memory, WatchedMemory):
+            self.memory = self.memory.memory
+            self.resolve_low_wram()
+            self.resolve_multibyte_access()
+
+    # reads the operand of the current instruction (see specializer.py), PC
+    # ends on the last byte of the instruction like after fetch_byte()
+    def fetch_operand(self, size):
+        if size == 1:
+            return self.fetch_byte()
+        elif size == 2:
+            return self.fetch_twobyte()
+        elif size == 3:
+            return self.fetch_threebyte()
+        return 0
+
+    # fallback for every opcode without a handler
+    def unknown_opcode(self):
+        from opcodes import opcode_map
+        opcode = self.memory.read((self.PBR << 16) +self.PC)
+        print("unkown opcode:", hex(opcode), " maybe:", opcode_map[opcode])
+        raise NotImplementedError()
+
+    # ADC, AND, CMP, EOR, LDA, ORA, SBC, STA and the shifts and rotations
+    # of memory are composed from the opcode table, see composer.py
+
+    # ASL A
+    @instruction(0x0A)
+    def asl_accumulator(self):
+        self.A = self.A << 1
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # BCC nearlabel
+    @instruction(0x90)
+    def bcc(self):
+        nearlabel = self.fetch_byte()
+        self.cycles += 2
+        if not self.flag_c:
             self.PC = self.computeBXX(nearlabel)
-         # BRL label
-        elif opcode == 0x82:
-            label = self.fetch_twobyte() # PC +=2
-            self.cycles += 4
-            self.PC += label+1 # instruction length 3
-        # BVC nearlabel
-        elif opcode == 0x50:
-            nearlabel = self.fetch_byte()
-            self.cycles += 2
-            if not self.isV():
-                self.PC = self.computeBXX(nearlabel)
-            else:
-                self.PC = self.PC + 1
-        # BVS nearlabel
-        elif opcode == 0x70:
-            nearlabel = self.fetch_byte()
-            self.cycles += 2
-            if self.isV():
-                self.PC = self.computeBXX(nearlabel)
-            else:
-                self.PC = self.PC + 1
-        # CLC
-        elif opcode == 0x18:
-            self.clearC()
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # CLD
-        elif opcode == 0xD8:
-            self.clearD()
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # CLI
-        elif opcode == 0x58:
-            self.clearI()
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # CLV
-        elif opcode == 0xB8:
-            self.clearV()
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # CMP (dir, X)
-        elif opcode == 0xC1:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True)  # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # CMP stk, S
-        elif opcode == 0xC3:
-            byte = self.fetch_byte()
-            address = compute_addr.stack(byte, self.SP)
-            value = self.read_memory(address, byte_num=2 - self.m(), wrapp=True)  # zero bank wrapping
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # CMP dir
-        elif opcode == 0xC5:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num=2 - self.m(), wrapp=True)  # zero bank wrapping!
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 4 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # CMP [dir]
-        elif opcode == 0xC7:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            address = self.read_memory(address_pointer, byte_num=3, wrapp=True)  # zero bank wrapping!
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # CMP #const
-        elif opcode == 0xC9:
-            if self.isM():
-                const = self.fetch_byte()
-            else:
-                const = self.fetch_twobyte()
-            result = self.A - const
-            self.compute_NZflags(result, self.isM())
-            if self.A >= const:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 3 - self.m()
-            self.PC = self.PC + 1
-        # CMP abs
-        elif opcode == 0xCD:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # CMP long
-        elif opcode == 0xCF:
-            address = self.fetch_threebyte()
-            value = self.read_memory(address, byte_num=2 - self.m())  # no wrapping
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # CMP (dir), Y
-        elif opcode == 0xD1:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True)  # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 7 - self.m() + self.w() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # CMP (dir)
-        elif opcode == 0xD2:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True)  # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 6 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # CMP (stk, S), Y
-        elif opcode == 0xD3:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.stack(byte, self.SP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True)  # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 8 - self.m()
-            self.PC = self.PC + 1
-        # CMP dir, X
-        elif opcode == 0xD5:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m(), wrapp=True)  # zero bank wrapping!
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 5 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # CMP [dir], Y
-        elif opcode == 0xD7:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=3, wrapp=True)  # zero bank wrapping!
-            address = compute_addr.long_y(bytes, self.Y, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # CMP abs, Y
-        elif opcode == 0xD9:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # CMP abs, X
-        elif opcode == 0xDD:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # CMP long, X
-        elif opcode == 0xDF:
-            bytes = self.fetch_threebyte()
-            address = compute_addr.long_x(bytes, self.X, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.A - value
-            self.compute_NZflags(result, self.isM())
-            if self.A >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # CPX #const
-        elif opcode == 0xE0:
-            if self.isX():
-                const = self.fetch_byte()
-            else:
-                const = self.fetch_twobyte()
-            result = self.X - const
-            self.compute_NZflags(result, self.isM())
-            if self.X >= const:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 3 - self.x()
-            self.PC = self.PC + 1
-        # CPX dir
-        elif opcode == 0xE4:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num=2 - self.m(), wrapp=True)  # zero bank wrapping!
-            result = self.X - value
-            self.compute_NZflags(result, self.isX())
-            if self.X >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 4 - self.x() + self.w()
-            self.PC = self.PC + 1
-        # CPX abs
-        elif opcode == 0xEC:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.X - value
-            self.compute_NZflags(result, self.isM())
-            if self.X >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 5 - self.x()
-            self.PC = self.PC + 1
-        # CPY #const
-        elif opcode == 0xC0:
-            if self.isX():
-                const = self.fetch_byte()
-            else:
-                const = self.fetch_twobyte()
-            result = self.Y - const
-            self.compute_NZflags(result, self.isM())
-            if self.Y >= const:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 3 - self.x()
-            self.PC = self.PC + 1
-        # CPY dir
-        elif opcode == 0xC4:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num=2 - self.m(), wrapp=True)  # zero bank wrapping!
-            result = self.Y - value
-            self.compute_NZflags(result, self.isX())
-            if self.Y >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 4 - self.x() + self.w()
-            self.PC = self.PC + 1
-        # CPY abs
-        elif opcode == 0xCC:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.Y - value
-            self.compute_NZflags(result, self.isM())
-            if self.Y >= value:
-                self.setC()
-            else:
-                self.clearC()
-            self.cycles += 5 - self.x()
-            self.PC = self.PC + 1
-        # DEC A
-        elif opcode == 0x3A:
-            result = self.sub_twos_complement(self.A, 1, is8BitMode = self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # DEC dp
-        elif opcode == 0xC6:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.sub_twos_complement(value, 1, is8BitMode=self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True)  # zero bank wrapping!
-            self.cycles += 7 - self.m()*2 + self.w()
-            self.PC = self.PC + 1
-        # DEC abs
-        elif opcode == 0xCE:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.sub_twos_complement(value, 1, is8BitMode = self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.write_memory(address, result, byte_num = 2 - self.m()) # no wrapping
-            self.cycles += 8 - self.m() * 2
-            self.PC = self.PC + 1
-        # DEC dp, X
-        elif opcode == 0xD6:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.sub_twos_complement(value, 1, is8BitMode = self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True)  # zero bank wrapping!
-            self.cycles += 8 - self.m() * 2 + self.w()
-            self.PC = self.PC + 1
-        # DEC abs, X
-        elif opcode == 0xDE:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.sub_twos_complement(value, 1, is8BitMode=self.isM())
-            self.compute_NZflags(result, self.isM())
-            self.write_memory(address, result, byte_num = 2 - self.m())
-            self.cycles += 9 - self.m() * 2
-            self.PC = self.PC + 1
-        # DEX
-        elif opcode == 0xCA:
-            result = self.sub_twos_complement(self.X, 1, is8BitMode = self.isX())
-            self.compute_NZflags(result, self.isX())
-            self.X = result
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # DEY
-        elif opcode == 0x88:
-            result = self.sub_twos_complement(self.Y, 1, is8BitMode = self.isX())
-            self.compute_NZflags(result, self.isX())
-            self.Y = result
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # EOR (dp, X)
-        elif opcode == 0x41:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # EOR stk, S
-        elif opcode == 0x43:
-            byte = self.fetch_byte()
-            address = compute_addr.stack(byte, self.SP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # EOR dp
-        elif opcode == 0x45:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 4 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # EOR [dp]
-        elif opcode == 0x47:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            address = self.read_memory(address_pointer, byte_num=3, wrapp=True) # zero bank wrapping!
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # EOR #const
-        elif opcode == 0x49:
-            if self.isM():
-                value = self.fetch_byte()
-            else:
-                value = self.fetch_twobyte()
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 3-self.isM()
-            self.PC = self.PC + 1
-        # EOR abs
-        elif opcode == 0x4D:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # EOR long
-        elif opcode == 0x4F:
-            address = self.fetch_threebyte()
-            value = self.read_memory(address, byte_num=2 - self.m())  # no wrapping
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # EOR (dp), Y
-        elif opcode == 0x51:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # EOR (dp)
-        elif opcode == 0x52:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num=2-self.m())
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 6 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # EOR (stk, S), Y
-        elif opcode == 0x53:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.stack(byte, self.SP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 8 - self.m()
-            self.PC = self.PC + 1
-        # EOR dp, X
-        elif opcode == 0x55:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 5-self.m() + self.w()
-            self.PC = self.PC + 1
-        # EOR [dp], Y
-        elif opcode == 0x57:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=3, wrapp=True) # zero bank wrapping!
-            address = compute_addr.long_y(bytes, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # EOR abs, Y
-        elif opcode == 0x59:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # EOR abs, X
-        elif opcode == 0x5D:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # EOR long, X
-        elif opcode == 0x5F:
-            bytes = self.fetch_threebyte()
-            address = compute_addr.long_x(bytes, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A ^ value)
-            self.A = result
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # INC A
-        elif opcode == 0x1A:
-            if self.isM():
-                result = (self.A + 1) & 0x0000FF
-            else:
-                result = (self.A + 1) & 0x00FFFF
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # INC dp
-        elif opcode == 0xE6:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            if self.isM():
-                result = (value + 1) & 0x0000FF
-            else:
-                result = (value + 1) & 0x00FFFF
-            self.compute_NZflags(result, self.isM())
-            self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True)  # zero bank wrapping!
-            self.cycles += 7 - self.m()*2 + self.w()
-            self.PC = self.PC + 1
-        # INC abs
-        elif opcode == 0xEE:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            if self.isM():
-                result = (value + 1) & 0x0000FF
-            else:
-                result = (value + 1) & 0x00FFFF
-            self.compute_NZflags(result, self.isM())
-            self.write_memory(address, result, byte_num = 2 - self.m()) # no wrapping
-            self.cycles += 8 - self.m() * 2
-            self.PC = self.PC + 1
-        # INC dp, X
-        elif opcode == 0xF6:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            if self.isM():
-                result = (value + 1) & 0x0000FF
-            else:
-                result = (value + 1) & 0x00FFFF
-            self.compute_NZflags(result, self.isM())
-            self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True)  # zero bank wrapping!
-            self.cycles += 8 - self.m() * 2 + self.w()
-            self.PC = self.PC + 1
-        # INC abs, X
-        elif opcode == 0xFE:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            if self.isM():
-                result = (value + 1) & 0x0000FF
-            else:
-                result = (value + 1) & 0x00FFFF
-            self.compute_NZflags(result, self.isM())
-            self.write_memory(address, result, byte_num = 2 - self.m())
-            self.cycles += 9 - self.m() * 2
-            self.PC = self.PC + 1
-        # INX
-        elif opcode == 0xE8:
-            if self.isX():
-                result = (self.X + 1) & 0x0000FF
-            else:
-                result = (self.X + 1) & 0x00FFFF
-            self.compute_NZflags(result, self.isX())
-            self.X = result
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # INY
-        elif opcode == 0xC8:
-            if self.isX():
-                result = (self.Y + 1) & 0x0000FF
-            else:
-                result = (self.Y + 1) & 0x00FFFF
-            self.compute_NZflags(result, self.isX())
-            self.Y = result
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # JMP addr
-        elif opcode == 0x4C:
-            label = self.fetch_twobyte()
-            self.cycles += 3
-            self.PC = label
-        # JMP long
-        elif opcode == 0x5C:
-            label = self.fetch_twobyte()
-            bank = self.fetch_byte()
-            self.PBR = bank
-            self.cycles += 4
-            self.PC = label
-        # JMP (addr)
-        elif opcode == 0x6C:
-            addr = self.fetch_twobyte()
-            label = self.read_memory((0x0 << 16) + addr, byte_num = 2, wrapp=True) # zero bank wrapping!
-            self.cycles += 5
-            self.PC = label
-        # JMP (addr, X)
-        elif opcode == 0x7C:
-            addr = self.fetch_twobyte()
-            wrapped_addr = (addr + self.X) & 0xFFFF
-            label = self.read_memory((self.DBR << 16) + wrapped_addr, byte_num = 2, wrapp=True) # zero bank wrapping!
-            self.cycles += 6
-            self.PC = label
-        # JMP [addr]
-        elif opcode == 0xDC:
-            addr = self.fetch_twobyte()
-            label = self.read_memory((0x0 << 16) + addr, byte_num = 3, wrapp=True) # zero bank wrapping!
-            self.PBR = (label & 0xFF0000) >> 16
-            self.cycles += 6
-            self.PC = label & 0x00FFFF
-        # JSL long
-        elif opcode == 0x22:
-            self.push_stack_8bit(self.PBR) # save return addr
-            self.push_stack(self.PC + 3)   # save return addr
-            label = self.fetch_twobyte()
-            bank = self.fetch_byte()
-            self.PBR = bank
-            self.cycles += 8
-            self.PC = label
-        # JSR addr
-        elif opcode == 0x20:
-            self.push_stack(self.PC + 2) # save return addr
-            label = self.fetch_twobyte()
-            self.cycles += 6
-            self.PC = label
-        # JSR (addr, X)
-        elif opcode == 0xFC:
-            self.push_stack(self.PC + 2)  # save return addr
-            addr = self.fetch_twobyte()
-            wrapped_addr = (addr + self.X) & 0xFFFF
-            label = self.read_memory((self.DBR << 16) + wrapped_addr, byte_num = 2, wrapp=True) # zero bank wrapping!
-            self.cycles += 8
-            self.PC = label
-        # LDA (dp, X)
-        elif opcode == 0xA1:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # LDA stk, S
-        elif opcode == 0xA3:
-            byte = self.fetch_byte()
-            address = compute_addr.stack(byte, self.SP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # LDA dp
-        elif opcode == 0xA5:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 4 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # LDA [dp]
-        elif opcode == 0xA7:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            address = self.read_memory(address_pointer, byte_num=3, wrapp=True) # zero bank wrapping!
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # LDA #const
-        elif opcode == 0xA9:
-            if self.isM(): # 8 Bit A/M
-                const = self.fetch_byte() # M=1 -> 8 Bit A -> one byte
-            else:  # 16 Bit A/M
-                const = self.fetch_twobyte()  # M=0 -> 16 Bit A -> two byte
-            result = const
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            self.cycles += 3 - self.m()
-            self.PC = self.PC + 1
-        # LDA abs
-        elif opcode == 0xAD:
-            bytes = self.fetch_twobyte() # no wrapping
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # LDA long
-        elif opcode == 0xAF:
-            address = self.fetch_threebyte()
-            value = self.read_memory(address, byte_num = 2 - self.m()) # no wrapping
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # LDA (dp), Y
-        elif opcode == 0xB1:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 7 - self.m() + self.w() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # LDA (dp)
-        elif opcode == 0xB2:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 6 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # LDA (stk, S), Y
-        elif opcode == 0xB3:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.stack(byte, self.SP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 8 - self.m()
-            self.PC = self.PC + 1
-        # LDA dp, X
-        elif opcode == 0xB5:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 5 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # LDA [dp], Y
-        elif opcode == 0xB7:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=3, wrapp=True) # zero bank wrapping!
-            address = compute_addr.long_y(bytes, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # LDA abs, Y
-        elif opcode == 0xB9:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # LDA abs, X
-        elif opcode == 0xBD:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # LDA long, X
-        elif opcode == 0xBF:
-            bytes = self.fetch_threebyte()
-            address = compute_addr.long_x(bytes, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isM())
-            self.A = value
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # LDX #const
-        elif opcode == 0xA2:
-            if self.isX(): # 8 Bit Y/X
-                const = self.fetch_byte() # X=1 -> 8 Bit X -> one byte
-            else:  # 16 Bit X/Y
-                const = self.fetch_twobyte()  # X=0 -> 16 Bit X -> two byte
-            result = const
-            self.compute_NZflags(result, self.isX())
-            self.X = result
-            self.cycles += 3 - self.x()
-            self.PC = self.PC + 1
-        # LDX dp
-        elif opcode == 0xA6:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.compute_NZflags(value, self.isX())
-            self.X = value
-            self.cycles += 4 - self.x() + self.w()
-            self.PC = self.PC + 1
-        # LDX abs
-        elif opcode == 0xAE:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isX())
-            self.X = value
-            self.cycles += 5 - self.x()
-            self.PC = self.PC + 1
-        # LDX dp, Y
-        elif opcode == 0xB6:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_y(byte, self.DP, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.compute_NZflags(value, self.isX())
-            self.X = value
-            self.cycles += 5 - self.x() + self.w()
-            self.PC = self.PC + 1
-        # LDX abs, Y
-        elif opcode == 0xBE:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isX())
-            self.X = value
-            self.cycles += 6 - 2 * self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # LDY #const
-        elif opcode == 0xA0:
-            if self.isX():  # 8 Bit Y/X
-                const = self.fetch_byte()     # X=1 ->  8 Bit Y -> one byte
-            else:           # 16 Bit X/Y
-                const = self.fetch_twobyte()  # X=0 -> 16 Bit Y -> two byte
-            result = const
-            self.compute_NZflags(result, self.isX())
-            self.Y = result
-            self.cycles += 3 - self.x()
-            self.PC = self.PC + 1
-        # LDY dp
-        elif opcode == 0xA4:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.compute_NZflags(value, self.isX())
-            self.Y = value
-            self.cycles += 4 - self.x() + self.w()
-            self.PC = self.PC + 1
-        # LDY abs
-        elif opcode == 0xAC:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isX())
-            self.Y = value
-            self.cycles += 5 - self.x()
+        else:
             self.PC = self.PC + 1
-        # LDY dp, X
-        elif opcode == 0xB4:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.compute_NZflags(value, self.isX())
-            self.Y = value
-            self.cycles += 5 - self.x() + self.w()
+
+    # BCS nearlabel
+    @instruction(0xB0)
+    def bcs(self):
+        nearlabel = self.fetch_byte()
+        self.cycles += 2
+        if self.flag_c:
+            self.PC = self.computeBXX(nearlabel)
+        else:
             self.PC = self.PC + 1
-        # LDY abs, X
-        elif opcode == 0xBC:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            self.compute_NZflags(value, self.isX())
-            self.Y = value
-            self.cycles += 6 - 2 * self.x() + self.x() * self.p()
+
+    # BEQ nearlabel
+    @instruction(0xF0)
+    def beq(self):
+        nearlabel = self.fetch_byte()
+        self.cycles += 2
+        if self.nz & 0xFFFF == 0:
+            self.PC = self.computeBXX(nearlabel)
+        else:
             self.PC = self.PC + 1
-        # LSR A
-        elif opcode == 0x4A:
-            result = self.A >> 1
-            self.compute_NZflags(result, self.isM())
-            if self.A & 0b1 == 1:
-                self.setC()
+
+    # BIT dp
+    @instruction(0x24)
+    def bit_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        value = self.read_memory(address, byte_num=2 - self.m(), wrapp=True)  # zero bank wrapping!
+        self.compute_bit_flags(value)
+        self.cycles += 4 - self.m() + self.w()
+        self.PC = self.PC + 1
+
+    # BIT abs
+    @instruction(0x2C)
+    def bit_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        value = self.read_memory(address, byte_num=2 - self.m())
+        self.compute_bit_flags(value)
+        self.cycles += 5 - self.m()
+        self.PC = self.PC + 1
+
+    # BIT dir, X
+    @instruction(0x34)
+    def bit_dp_x(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
+        value = self.read_memory(address, byte_num=2 - self.m(), wrapp=True)  # zero bank wrapping!
+        self.compute_bit_flags(value)
+        self.cycles += 5 - self.m() + self.w()
+        self.PC = self.PC + 1
+
+    # BIT abs, X
+    @instruction(0x3C)
+    def bit_abs_x(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
+        value = self.read_memory(address, byte_num=2 - self.m())
+        self.compute_bit_flags(value)
+        self.cycles += 6 - self.m() - self.x() + ((bytes ^ address) >> 8 & self.x())  # page crossing, see composer.PAGE_CROSSING
+        self.PC = self.PC + 1
+
+    # BIT imm
+    # this is the only bit opcode that only affects the Z flag
+    @instruction(0x89)
+    def bit_immediate(self):
+        if self.isM():
+            value = self.fetch_byte()
+            if not value & (0x00FF & self.A):
+                self.setZ()
             else:
-                self.clearC()
-            self.A = result
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # NOP
-        elif opcode == 0xEA:
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # ORA (dp, X)
-        elif opcode == 0x01:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # ORA stk, S
-        elif opcode == 0x03:
-            byte = self.fetch_byte()
-            address = compute_addr.stack(byte, self.SP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # ORA dp
-        elif opcode == 0x05:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 4 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # ORA [dp]
-        elif opcode == 0x07:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            address = self.read_memory(address_pointer, byte_num=3, wrapp=True) # zero bank wrapping!
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # ORA #const
-        elif opcode == 0x09:
-            if self.isM():
-                value = self.fetch_byte()
+                self.clearZ()
+        else:
+            value = self.fetch_twobyte()
+            if not value & self.A:
+                self.setZ()
             else:
-                value = self.fetch_twobyte()
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 3-self.isM()
-            self.PC = self.PC + 1
-        # ORA abs
-        elif opcode == 0x0D:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # ORA long
-        elif opcode == 0x0F:
-            address = self.fetch_threebyte()
-            value = self.read_memory(address, byte_num=2 - self.m())  # no wrapping
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # ORA (dp), Y
-        elif opcode == 0x11:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # ORA (dp)
-        elif opcode == 0x12:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num=2-self.m())
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 6 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # ORA (stk, S), Y
-        elif opcode == 0x13:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.stack(byte, self.SP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num=2 - self.m())
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 8 - self.m()
-            self.PC = self.PC + 1
-        # ORA dp, X
-        elif opcode == 0x15:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 5-self.m() + self.w()
-            self.PC = self.PC + 1
-        # ORA [dp], Y
-        elif opcode == 0x17:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=3, wrapp=True) # zero bank wrapping!
-            address = compute_addr.long_y(bytes, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # ORA abs, Y
-        elif opcode == 0x19:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # ORA abs, X
-        elif opcode == 0x1D:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 6 - self.m() - self.x() + self.x() * self.p()
-            self.PC = self.PC + 1
-        # ORA long, X
-        elif opcode == 0x1F:
-            bytes = self.fetch_threebyte()
-            address = compute_addr.long_x(bytes, self.X, self.isX())
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_logic_operation(self.A | value)
-            self.A = result
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # PEA imm
-        elif opcode == 0xF4:
-            bytes = self.fetch_twobyte()
-            self.push_stack(bytes)
-            self.cycles += 5
-            self.PC = self.PC + 1
-        # PEI dir
-        elif opcode == 0xD4:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2, wrapp=True)
-            self.push_stack(value)
-            self.cycles = 6 + self.w()
-            self.PC = self.PC + 1
-        # PER imm
-        elif opcode == 0x62:
-            bytes = self.fetch_twobyte()
-            self.push_stack(bytes + self.PC+1)
-            self.cycles += 6
-            self.PC = self.PC + 1
-        # PHA
-        elif opcode == 0x48:
-            if self.isM():# 8 bit mode
-                self.push_stack_8bit(self.A & 0x00FF)
-                self.cycles += 3
-                self.PC += 1
-            else: # 16 bit mode
-                self.push_stack(self.A)
-                self.cycles += 4
-                self.PC += 1
-        # PHB
-        elif opcode == 0x8B:
-            self.push_stack_8bit(self.DBR)
-            self.cycles += 3
-            self.PC = self.PC + 1
-        # PHD
-        elif opcode == 0x0B:
-            self.push_stack(self.DP)
-            self.cycles += 4
-            self.PC = self.PC + 1
-        # PHK
-        elif opcode == 0x4B:
-            self.push_stack_8bit(self.PBR)
-            self.cycles += 3
+                self.clearZ()
+        self.cycles += 3 - self.m()
+        self.PC = self.PC + 1
+
+    # BMI nearlabel
+    @instruction(0x30)
+    def bmi(self):
+        nearlabel = self.fetch_byte()
+        self.cycles += 2
+        if self.nz & 0x18000 != 0:
+            self.PC = self.computeBXX(nearlabel)
+        else:
             self.PC = self.PC + 1
-        # PHP
-        elif opcode == 0x08:
-            self.push_stack_8bit(self.P)
-            self.cycles += 3
+
+    # BNE nearlabel
+    @instruction(0xD0)
+    def bne(self):
+        nearlabel = self.fetch_byte()
+        self.cycles += 2
+        if self.nz & 0xFFFF != 0:
+            self.PC = self.computeBXX(nearlabel)
+        else:
             self.PC = self.PC + 1
-        # PHX
-        elif opcode == 0xDA:
-            if self.isX():
-                self.push_stack_8bit(self.X & 0x00FF)
-                self.cycles += 3
-                self.PC += 1
-            else:
-                self.push_stack(self.X)
-                self.cycles += 4
-                self.PC += 1
-        # PHY
-        elif opcode == 0x5A:
-            if self.isX():# x flag also controls Y register.
-                self.push_stack_8bit(self.Y & 0x00FF)
-                self.cycles += 3
-                self.PC += 1
-            else:
-                self.push_stack(self.Y)
-                self.cycles += 4
-                self.PC += 1
-        # PLA
-        elif opcode == 0x68:
-            if self.isM(): # 8 bit mode
-                A_low = self.pop_stack_8bit()
-                A_high = self.A & 0xFF00
-                self.A = A_high + A_low # in 8 bit mode the high byte of the A register persists
-                self.compute_NZflags(A_low, True)
-                self.cycles += 4
-                self.PC += 1
-            else: # 16 bit mode
-                self.A = self.pop_stack()
-                self.compute_NZflags(self.A, False)
-                self.cycles += 5
-                self.PC += 1
-        # PLB
-        elif opcode == 0xAB:
-            result = self.pop_stack_8bit()
-            self.compute_NZflags(result, True)
-            self.DBR = result
-            self.cycles += 4
-            self.PC += 1
-        # PLD
-        elif opcode == 0x2B:
-            result = self.pop_stack()
-            self.compute_NZflags(result, False)
-            self.DP = result
-            self.cycles += 5
-            self.PC += 1
-        # PLP
-        elif opcode == 0x28:
-            self.P = self.pop_stack_8bit()
-            if self.e:
-                self.P = self.P | 0b00110000
-            self.cycles += 4
-            self.PC += 1
-        # PLX
-        elif opcode == 0xFA:
-            if self.isX():
-                self.X = self.pop_stack_8bit() # in 8 bit mode the high byte of X is forced to 0
-                self.compute_NZflags(self.X,True)
-                self.cycles += 4
-                self.PC += 1
-            else:
-                self.X = self.pop_stack()
-                self.compute_NZflags(self.X,False)
-                self.cycles += 5
-                self.PC += 1
-        # PLY
-        elif opcode == 0x7A:
-            if self.isX(): # there is no y flag. the x flag controls the Y register.
-                self.Y = self.pop_stack_8bit() # in 8 bit mode the high byte of Y is forced to 0
-                self.compute_NZflags(self.Y,True)
-                self.cycles += 4
-                self.PC += 1
-            else:
-                self.Y = self.pop_stack()
-                self.compute_NZflags(self.Y,False)
-                self.cycles += 5
-                self.PC += 1
-        # REP
-        elif opcode == 0xC2:
-            const = self.fetch_byte()
-            nconst = ~const
-            self.P = self.P & nconst
-            if self.e: # if e is one, m and x will always be 1
-                self.P = self.P | 0b00110000
-            self.cycles += 3
+
+    # BPL nearlabel
+    @instruction(0x10)
+    def bpl(self):
+        nearlabel = self.fetch_byte()
+        self.cycles += 2
+        if self.nz & 0x18000 == 0:
+            self.PC = self.computeBXX(nearlabel)
+        else:
             self.PC = self.PC + 1
-        # ROL A
-        elif opcode == 0x2A:
-            result = self.A << 1
-            if self.isC():
-                result = result & 0b1111111111111111
-            else:
-                result = result & 0b1111111111111110
-            self.compute_NZflags(result, self.isM())
-            if self.A & 0b10000000 != 0:
-                self.setC()
-            else:
-                self.clearC()
-            self.A = result
+
+    # BRA nearlabel
+    @instruction(0x80)
+    def bra(self):
+        nearlabel = self.fetch_byte()
+        self.cycles += 2
+        self.PC = self.computeBXX(nearlabel)
+
+    # BRK #signature
+    @instruction(0x00)
+    def brk(self):
+        signature = self.fetch_byte()  # only read by the interrupt handler
+        self.software_interrupt(Interrupt.BRK)
+
+    # BRL label
+    @instruction(0x82)
+    def brl(self):
+        label = self.fetch_twobyte() # PC +=2
+        self.cycles += 4
+        self.PC += label+1 # instruction length 3
+
+    # BVC nearlabel
+    @instruction(0x50)
+    def bvc(self):
+        nearlabel = self.fetch_byte()
+        self.cycles += 2
+        if not self.flag_v:
+            self.PC = self.computeBXX(nearlabel)
+        else:
             self.PC = self.PC + 1
-        # ROR A
-        elif opcode == 0x6A:
-            result = self.A >> 1
-            if self.isC():
-                result = result & 0b1111111111111111
-            else:
-                result = result & 0b0111111111111111
-            self.compute_NZflags(result, self.isM())
-            if self.A & 0b00000001 != 0:
-                self.setC()
-            else:
-                self.clearC()
-            self.A = result
+
+    # BVS nearlabel
+    @instruction(0x70)
+    def bvs(self):
+        nearlabel = self.fetch_byte()
+        self.cycles += 2
+        if self.flag_v:
+            self.PC = self.computeBXX(nearlabel)
+        else:
             self.PC = self.PC + 1
-        # RTS
-        elif opcode == 0x60:
-            addr = self.pop_stack() # get return addr
-            self.cycles += 6
-            self.PC = addr +1
-        # RTL
-        elif opcode == 0x6B:
-            addr = self.pop_stack()      # get return addr
-            bank = self.pop_stack_8bit() # get return addr
-            self.PBR = bank
-            self.cycles += 6
-            self.PC = addr +1
-        # TODO: use BCD sub if D Flag is set
-        # SBC #const #TODO: v and c
-        elif opcode == 0xE9:
+
+    # CLC
+    @instruction(0x18)
+    def clc(self):
+        self.flag_c = 0
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # CLD
+    @instruction(0xD8)
+    def cld(self):
+        self.flag_d = 0
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # CLI
+    @instruction(0x58)
+    def cli(self):
+        self.flag_i = 0
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # CLV
+    @instruction(0xB8)
+    def clv(self):
+        self.flag_v = 0
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # COP #signature
+    @instruction(0x02)
+    def cop(self):
+        signature = self.fetch_byte()  # only read by the interrupt handler
+        self.software_interrupt(Interrupt.COP)
+
+    # CPX #const
+    @instruction(0xE0)
+    def cpx_immediate(self):
+        if self.isX():
             const = self.fetch_byte()
-            result = self.A - const - 1
-            self.compute_NZflags(result, self.isM())
-            self.A = result
-            if self.isC():
-                self.A += 1
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # SEC
-        elif opcode == 0x38:
-            self.setC()
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # SED
-        elif opcode == 0xF8:
-            self.setD()
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # SEI (Disable Interrupts) Set I to 1
-        elif opcode == 0x78:
-            self.setI()
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # SEP #const
-        elif opcode == 0xE2:
+        else:
+            const = self.fetch_twobyte()
+        result = self.X - const
+        self.compute_NZflags(result, self.isM())
+        if self.X >= const:
+            self.flag_c = 1
+        else:
+            self.flag_c = 0
+        self.cycles += 3 - self.x()
+        self.PC = self.PC + 1
+
+    # CPX dir
+    @instruction(0xE4)
+    def cpx_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        value = self.read_memory(address, byte_num=2 - self.m(), wrapp=True)  # zero bank wrapping!
+        result = self.X - value
+        self.compute_NZflags(result, self.isX())
+        if self.X >= value:
+            self.flag_c = 1
+        else:
+            self.flag_c = 0
+        self.cycles += 4 - self.x() + self.w()
+        self.PC = self.PC + 1
+
+    # CPX abs
+    @instruction(0xEC)
+    def cpx_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        value = self.read_memory(address, byte_num=2 - self.m())
+        result = self.X - value
+        self.compute_NZflags(result, self.isM())
+        if self.X >= value:
+            self.flag_c = 1
+        else:
+            self.flag_c = 0
+        self.cycles += 5 - self.x()
+        self.PC = self.PC + 1
+
+    # CPY #const
+    @instruction(0xC0)
+    def cpy_immediate(self):
+        if self.isX():
             const = self.fetch_byte()
-            self.P = self.P | const;
-            self.cycles += 3
-            self.PC = self.PC + 1
-        # STA (dp, X)
-        elif opcode == 0x81:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            self.write_memory(address, self.A, byte_num = 2 - self.m())
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # STA stk, S
-        elif opcode == 0x83:
-            byte = self.fetch_byte()
-            address = compute_addr.stack(byte, self.SP)
-            self.write_memory(address, self.A, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # STA dp
-        elif opcode == 0x85:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            self.write_memory(address, self.A, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.cycles += 4 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # STA [dp]
-        elif opcode == 0x87:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            address = self.read_memory(address_pointer, byte_num=3, wrapp=True) # zero bank wrapping!
-            self.write_memory(address, self.A, byte_num = 2 - self.m())
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # STA abs
-        elif opcode == 0x8D:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            self.write_memory(address, self.A, byte_num = 2 - self.m())
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # STA long
-        elif opcode == 0x8F:
-            address = self.fetch_threebyte()
-            self.write_memory(address, self.A, byte_num = 2 - self.m())
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # STA (dp), Y
-        elif opcode == 0x91:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            self.write_memory(address, self.A, byte_num = 2 - self.m())
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # STA (dp)
-        elif opcode == 0x92:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs(bytes, self.DBR)
-            self.write_memory(address, self.A, byte_num = 2 - self.m())
-            self.cycles += 6 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # STA (stk, S), Y
-        elif opcode == 0x93:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.stack(byte, self.SP)
-            bytes = self.read_memory(address_pointer, byte_num=2, wrapp=True) # zero bank wrapping!
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            self.write_memory(address, self.A, byte_num = 2 - self.m())
-            self.cycles += 8 - self.m()
-            self.PC = self.PC + 1
-        # STA dp, X
-        elif opcode == 0x95:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            self.write_memory(address, self.A, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.cycles += 5 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # STA [dp], Y
-        elif opcode == 0x97:
-            byte = self.fetch_byte()
-            address_pointer = compute_addr.dp(byte, self.DP)
-            bytes = self.read_memory(address_pointer, byte_num=3, wrapp=True)
-            address = compute_addr.long_y(bytes, self.Y, self.isX())
-            self.write_memory(address, self.A, byte_num = 2 - self.m())
-            self.cycles += 7 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # STA abs, Y
-        elif opcode == 0x99:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
-            self.write_memory(address, self.A, byte_num = 2 - self.m())
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # STA abs, X
-        elif opcode == 0x9D:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            self.write_memory(address, self.A, byte_num = 2 - self.m())
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # STA long, X
-        elif opcode == 0x9F:
-            bytes = self.fetch_threebyte()
-            address = compute_addr.long_x(bytes, self.X, self.isX())
-            self.write_memory(address, self.A, byte_num = 2 - self.m())
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # STX dp
-        elif opcode == 0x86:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            self.write_memory(address, self.X, byte_num = 2 - self.x(), wrapp=True) # zero bank wrapping!
-            self.cycles += 4 - self.x() + self.w()
-            self.PC = self.PC + 1
-        # STX abs
-        elif opcode == 0x8E:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            self.write_memory(address, self.X, byte_num = 2 - self.x())
-            self.cycles += 5 - self.x()
-            self.PC = self.PC + 1
-        # STX dp, Y
-        elif opcode == 0x96:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_y(byte, self.DP, self.Y, self.isX())
-            self.write_memory(address, self.X, byte_num = 2 - self.x(), wrapp=True) # zero bank wrapping!
-            self.cycles += 5 - self.x() + self.w()
-            self.PC = self.PC + 1
-        # STY dp
-        elif opcode == 0x84:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            self.write_memory(address, self.Y, byte_num = 2 - self.x(), wrapp=True) # zero bank wrapping!
-            self.cycles += 4 - self.x() + self.w()
-            self.PC = self.PC + 1
-        # STY abs
-        elif opcode == 0x8C:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            self.write_memory(address, self.Y, byte_num = 2 - self.x())
-            self.cycles += 5 - self.x()
-            self.PC = self.PC + 1
-        # STY dp, X
-        elif opcode == 0x94:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            self.write_memory(address, self.Y, byte_num = 2 - self.x(), wrapp=True) # zero bank wrapping!
-            self.cycles += 5 - self.x() + self.w()
-            self.PC = self.PC + 1
-        # STZ dp
-        elif opcode == 0x64:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            self.write_memory(address, 0x00, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.cycles += 4 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # STZ dp, X
-        elif opcode == 0x74:
-            byte = self.fetch_byte()
-            address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
-            self.write_memory(address, 0x00, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.cycles += 5 - self.m() + self.w()
-            self.PC = self.PC + 1
-        # STZ abs
-        elif opcode == 0x9C:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            self.write_memory(address, 0x00, byte_num = 2 - self.m())
-            self.cycles += 5 - self.m()
-            self.PC = self.PC + 1
-        # STZ abs, X
-        elif opcode == 0x9E:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
-            self.write_memory(address, 0x00, byte_num = 2 - self.m())
-            self.cycles += 6 - self.m()
-            self.PC = self.PC + 1
-        # TAX
-        elif opcode == 0x78:
-            self.compute_NZflags(self.A, self.isM())
-            self.X = self.A
-            self.cycles += 2
-            self.PC = self.PC + 1
-        # TCD
-        elif opcode == 0x5B:
-            self.compute_NZflags(self.A, self.isM())
-            self.DP = self.A
-            self.cycles += 2
-            self.PC += 1
-        # TCS
-        elif opcode == 0x1B:
-            self.compute_NZflags(self.A, self.isM())
-            if self.e:
-                self.SP = (self.SP & 0xFF00) | (self.A & 0x00FF)
-            else:
-                self.SP = self.A
-            self.cycles += 2
-            self.PC += 1
-        # TDC
-        elif opcode == 0x7B:
-            self.compute_NZflags(self.DP, False) # DP is always 16 bit
-            self.A = self.DP
-            self.cycles += 2
-            self.PC += 1
-        # TSC
-        elif opcode == 0x3B:
-            self.compute_NZflags(self.SP, False) # SP is always 16 bit
-            self.A = self.SP
-            self.cycles += 2
-            self.PC +=1
-        # TRB dir
-        elif opcode == 0x14:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.compute_trb(value)
-            self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.cycles += 7 - 2 * self.m() + self.w()
-            self.PC = self.PC + 1
-        # TRB abs
-        elif opcode == 0x1C:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_trb(value)
-            self.write_memory(address, result, byte_num=2 - self.m())
-            self.cycles += 8 - 2 * self.m()
-            self.PC = self.PC + 1
-        # TSB dir
-        elif opcode == 0x04:
-            byte = self.fetch_byte()
-            address = compute_addr.dp(byte, self.DP)
-            value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            result = self.compute_tsb(value)
-            self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
-            self.cycles += 7 - 2 * self.m() + self.w()
-            self.PC = self.PC + 1
-        # TSB abs
-        elif opcode == 0x0C:
-            bytes = self.fetch_twobyte()
-            address = compute_addr.abs(bytes, self.DBR)
-            value = self.read_memory(address, byte_num = 2 - self.m())
-            result = self.compute_tsb(value)
-            self.write_memory(address, result, byte_num=2 - self.m())
-            self.cycles += 8 - 2 * self.m()
-            self.PC = self.PC + 1
-        # TAX
-        elif opcode == 0xAA:
-            if self.isX():
-                self.X = (self.X & 0xFF00) | (self.A & 0x00FF)
-            else:
-                self.X = self.A
-            self.compute_NZflags(self.X, self.isX())
-            self.cycles += 2
-            self.PC += 1
-        # TAY
-        elif opcode == 0xA8:
-            if self.isX():
-                self.Y = (self.Y & 0xFF00) | (self.A & 0x00FF)
-            else:
-                self.Y = self.A
-            self.compute_NZflags(self.Y, self.isX())
-            self.cycles += 2
-            self.PC += 1
-        # TSX
-        elif opcode == 0xBA:
-            if self.isX():
-                self.X = (self.X & 0xFF00) | (self.SP & 0x00FF)
-            else:
-                self.X = self.SP
-            self.compute_NZflags(self.X, self.isX())
-            self.cycles += 2
-            self.PC += 1
-        # TXA
-        elif opcode == 0x8A:
-            if self.isM():
-                self.A = (self.A & 0xFF00) | (self.X & 0x00FF)
-            else:
-                self.A = self.X
-            self.compute_NZflags(self.A, self.isM())
-            self.cycles += 2
-            self.PC += 1
-        # TXS
-        elif opcode == 0x9A:
-            if self.e == 1:
-                self.SP = (self.SP & 0xFF00) | (self.X & 0x00FF)
-            else:
-                self.SP = self.X
-            # Flags are not set
-            self.cycles += 2
+        else:
+            const = self.fetch_twobyte()
+        result = self.Y - const
+        self.compute_NZflags(result, self.isM())
+        if self.Y >= const:
+            self.flag_c = 1
+        else:
+            self.flag_c = 0
+        self.cycles += 3 - self.x()
+        self.PC = self.PC + 1
+
+    # CPY dir
+    @instruction(0xC4)
+    def cpy_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        value = self.read_memory(address, byte_num=2 - self.m(), wrapp=True)  # zero bank wrapping!
+        result = self.Y - value
+        self.compute_NZflags(result, self.isX())
+        if self.Y >= value:
+            self.flag_c = 1
+        else:
+            self.flag_c = 0
+        self.cycles += 4 - self.x() + self.w()
+        self.PC = self.PC + 1
+
+    # CPY abs
+    @instruction(0xCC)
+    def cpy_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        value = self.read_memory(address, byte_num=2 - self.m())
+        result = self.Y - value
+        self.compute_NZflags(result, self.isM())
+        if self.Y >= value:
+            self.flag_c = 1
+        else:
+            self.flag_c = 0
+        self.cycles += 5 - self.x()
+        self.PC = self.PC + 1
+
+    # DEC A
+    @instruction(0x3A)
+    def dec_accumulator(self):
+        result = self.sub_twos_complement(self.A, 1, is8BitMode = self.isM())
+        self.compute_NZflags(result, self.isM())
+        self.A = result
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # DEC dp
+    @instruction(0xC6)
+    def dec_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        result = self.sub_twos_complement(value, 1, is8BitMode=self.isM())
+        self.compute_NZflags(result, self.isM())
+        self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True)  # zero bank wrapping!
+        self.cycles += 7 - self.m()*2 + self.w()
+        self.PC = self.PC + 1
+
+    # DEC abs
+    @instruction(0xCE)
+    def dec_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        value = self.read_memory(address, byte_num = 2 - self.m())
+        result = self.sub_twos_complement(value, 1, is8BitMode = self.isM())
+        self.compute_NZflags(result, self.isM())
+        self.write_memory(address, result, byte_num = 2 - self.m()) # no wrapping
+        self.cycles += 8 - self.m() * 2
+        self.PC = self.PC + 1
+
+    # DEC dp, X
+    @instruction(0xD6)
+    def dec_dp_x(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
+        value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        result = self.sub_twos_complement(value, 1, is8BitMode = self.isM())
+        self.compute_NZflags(result, self.isM())
+        self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True)  # zero bank wrapping!
+        self.cycles += 8 - self.m() * 2 + self.w()
+        self.PC = self.PC + 1
+
+    # DEC abs, X
+    @instruction(0xDE)
+    def dec_abs_x(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
+        value = self.read_memory(address, byte_num = 2 - self.m())
+        result = self.sub_twos_complement(value, 1, is8BitMode=self.isM())
+        self.compute_NZflags(result, self.isM())
+        self.write_memory(address, result, byte_num = 2 - self.m())
+        self.cycles += 9 - self.m() * 2
+        self.PC = self.PC + 1
+
+    # DEX
+    @instruction(0xCA)
+    def dex(self):
+        result = self.sub_twos_complement(self.X, 1, is8BitMode = self.isX())
+        self.compute_NZflags(result, self.isX())
+        self.X = result
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # DEY
+    @instruction(0x88)
+    def dey(self):
+        result = self.sub_twos_complement(self.Y, 1, is8BitMode = self.isX())
+        self.compute_NZflags(result, self.isX())
+        self.Y = result
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # INC A
+    @instruction(0x1A)
+    def inc_accumulator(self):
+        if self.isM():
+            result = (self.A + 1) & 0x0000FF
+        else:
+            result = (self.A + 1) & 0x00FFFF
+        self.compute_NZflags(result, self.isM())
+        self.A = result
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # INC dp
+    @instruction(0xE6)
+    def inc_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        if self.isM():
+            result = (value + 1) & 0x0000FF
+        else:
+            result = (value + 1) & 0x00FFFF
+        self.compute_NZflags(result, self.isM())
+        self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True)  # zero bank wrapping!
+        self.cycles += 7 - self.m()*2 + self.w()
+        self.PC = self.PC + 1
+
+    # INC abs
+    @instruction(0xEE)
+    def inc_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        value = self.read_memory(address, byte_num = 2 - self.m())
+        if self.isM():
+            result = (value + 1) & 0x0000FF
+        else:
+            result = (value + 1) & 0x00FFFF
+        self.compute_NZflags(result, self.isM())
+        self.write_memory(address, result, byte_num = 2 - self.m()) # no wrapping
+        self.cycles += 8 - self.m() * 2
+        self.PC = self.PC + 1
+
+    # INC dp, X
+    @instruction(0xF6)
+    def inc_dp_x(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
+        value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        if self.isM():
+            result = (value + 1) & 0x0000FF
+        else:
+            result = (value + 1) & 0x00FFFF
+        self.compute_NZflags(result, self.isM())
+        self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True)  # zero bank wrapping!
+        self.cycles += 8 - self.m() * 2 + self.w()
+        self.PC = self.PC + 1
+
+    # INC abs, X
+    @instruction(0xFE)
+    def inc_abs_x(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
+        value = self.read_memory(address, byte_num = 2 - self.m())
+        if self.isM():
+            result = (value + 1) & 0x0000FF
+        else:
+            result = (value + 1) & 0x00FFFF
+        self.compute_NZflags(result, self.isM())
+        self.write_memory(address, result, byte_num = 2 - self.m())
+        self.cycles += 9 - self.m() * 2
+        self.PC = self.PC + 1
+
+    # INX
+    @instruction(0xE8)
+    def inx(self):
+        if self.isX():
+            result = (self.X + 1) & 0x0000FF
+        else:
+            result = (self.X + 1) & 0x00FFFF
+        self.compute_NZflags(result, self.isX())
+        self.X = result
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # INY
+    @instruction(0xC8)
+    def iny(self):
+        if self.isX():
+            result = (self.Y + 1) & 0x0000FF
+        else:
+            result = (self.Y + 1) & 0x00FFFF
+        self.compute_NZflags(result, self.isX())
+        self.Y = result
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # JMP addr
+    @instruction(0x4C)
+    def jmp_abs(self):
+        label = self.fetch_twobyte()
+        self.cycles += 3
+        self.PC = label
+
+    # JMP long
+    @instruction(0x5C)
+    def jmp_long(self):
+        address = self.fetch_threebyte()
+        self.PBR = address >> 16
+        self.cycles += 4
+        self.PC = address & 0x00FFFF
+
+    # JMP (addr)
+    @instruction(0x6C)
+    def jmp_abs_indirect(self):
+        addr = self.fetch_twobyte()
+        label = self.read_memory((0x0 << 16) + addr, byte_num = 2, wrapp=True) # zero bank wrapping!
+        self.cycles += 5
+        self.PC = label
+
+    # JMP (addr, X)
+    @instruction(0x7C)
+    def jmp_abs_x_indirect(self):
+        addr = self.fetch_twobyte()
+        wrapped_addr = (addr + self.X) & 0xFFFF
+        label = self.read_memory((self.DBR << 16) + wrapped_addr, byte_num = 2, wrapp=True) # zero bank wrapping!
+        self.cycles += 6
+        self.PC = label
+
+    # JMP [addr]
+    @instruction(0xDC)
+    def jmp_abs_indirect_long(self):
+        addr = self.fetch_twobyte()
+        label = self.read_memory((0x0 << 16) + addr, byte_num = 3, wrapp=True) # zero bank wrapping!
+        self.PBR = (label & 0xFF0000) >> 16
+        self.cycles += 6
+        self.PC = label & 0x00FFFF
+
+    # JSL long
+    @instruction(0x22)
+    def jsl_long(self):
+        address = self.fetch_threebyte()
+        self.push_stack_8bit(self.PBR) # save return addr
+        self.push_stack(self.PC)       # save return addr (last byte of JSL)
+        self.PBR = address >> 16
+        self.cycles += 8
+        self.PC = address & 0x00FFFF
+
+    # JSR addr
+    @instruction(0x20)
+    def jsr_abs(self):
+        label = self.fetch_twobyte()
+        self.push_stack(self.PC) # save return addr (last byte of JSR)
+        self.cycles += 6
+        self.PC = label
+
+    # JSR (addr, X)
+    @instruction(0xFC)
+    def jsr_abs_x_indirect(self):
+        addr = self.fetch_twobyte()
+        self.push_stack(self.PC)  # save return addr (last byte of JSR)
+        wrapped_addr = (addr + self.X) & 0xFFFF
+        label = self.read_memory((self.DBR << 16) + wrapped_addr, byte_num = 2, wrapp=True) # zero bank wrapping!
+        self.cycles += 8
+        self.PC = label
+
+    # LDX #const
+    @instruction(0xA2)
+    def ldx_immediate(self):
+        if self.isX(): # 8 Bit Y/X
+            const = self.fetch_byte() # X=1 -> 8 Bit X -> one byte
+        else:  # 16 Bit X/Y
+            const = self.fetch_twobyte()  # X=0 -> 16 Bit X -> two byte
+        result = const
+        self.compute_NZflags(result, self.isX())
+        self.X = result
+        self.cycles += 3 - self.x()
+        self.PC = self.PC + 1
+
+    # LDX dp
+    @instruction(0xA6)
+    def ldx_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        self.compute_NZflags(value, self.isX())
+        self.X = value
+        self.cycles += 4 - self.x() + self.w()
+        self.PC = self.PC + 1
+
+    # LDX abs
+    @instruction(0xAE)
+    def ldx_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        value = self.read_memory(address, byte_num = 2 - self.m())
+        self.compute_NZflags(value, self.isX())
+        self.X = value
+        self.cycles += 5 - self.x()
+        self.PC = self.PC + 1
+
+    # LDX dp, Y
+    @instruction(0xB6)
+    def ldx_dp_y(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp_y(byte, self.DP, self.Y, self.isX())
+        value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        self.compute_NZflags(value, self.isX())
+        self.X = value
+        self.cycles += 5 - self.x() + self.w()
+        self.PC = self.PC + 1
+
+    # LDX abs, Y
+    @instruction(0xBE)
+    def ldx_abs_y(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs_y(bytes, self.DBR, self.Y, self.isX())
+        value = self.read_memory(address, byte_num = 2 - self.m())
+        self.compute_NZflags(value, self.isX())
+        self.X = value
+        self.cycles += 6 - 2 * self.x() + ((bytes ^ address) >> 8 & self.x())  # page crossing, see composer.PAGE_CROSSING
+        self.PC = self.PC + 1
+
+    # LDY #const
+    @instruction(0xA0)
+    def ldy_immediate(self):
+        if self.isX():  # 8 Bit Y/X
+            const = self.fetch_byte()     # X=1 ->  8 Bit Y -> one byte
+        else:           # 16 Bit X/Y
+            const = self.fetch_twobyte()  # X=0 -> 16 Bit Y -> two byte
+        result = const
+        self.compute_NZflags(result, self.isX())
+        self.Y = result
+        self.cycles += 3 - self.x()
+        self.PC = self.PC + 1
+
+    # LDY dp
+    @instruction(0xA4)
+    def ldy_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        self.compute_NZflags(value, self.isX())
+        self.Y = value
+        self.cycles += 4 - self.x() + self.w()
+        self.PC = self.PC + 1
+
+    # LDY abs
+    @instruction(0xAC)
+    def ldy_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        value = self.read_memory(address, byte_num = 2 - self.m())
+        self.compute_NZflags(value, self.isX())
+        self.Y = value
+        self.cycles += 5 - self.x()
+        self.PC = self.PC + 1
+
+    # LDY dp, X
+    @instruction(0xB4)
+    def ldy_dp_x(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
+        value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        self.compute_NZflags(value, self.isX())
+        self.Y = value
+        self.cycles += 5 - self.x() + self.w()
+        self.PC = self.PC + 1
+
+    # LDY abs, X
+    @instruction(0xBC)
+    def ldy_abs_x(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
+        value = self.read_memory(address, byte_num = 2 - self.m())
+        self.compute_NZflags(value, self.isX())
+        self.Y = value
+        self.cycles += 6 - 2 * self.x() + ((bytes ^ address) >> 8 & self.x())  # page crossing, see composer.PAGE_CROSSING
+        self.PC = self.PC + 1
+
+    # LSR A
+    @instruction(0x4A)
+    def lsr_accumulator(self):
+        result = self.A >> 1
+        self.compute_NZflags(result, self.isM())
+        if self.A & 0b1 == 1:
+            self.flag_c = 1
+        else:
+            self.flag_c = 0
+        self.A = result
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # MVN srcbk, destbk
+    @instruction(0x54)
+    def mvn(self):
+        banks = self.fetch_twobyte()  # destination bank first
+        self.block_move(banks & 0x00FF, banks >> 8, 1)
+        self.PC = self.PC + 1
+
+    # MVP srcbk, destbk
+    @instruction(0x44)
+    def mvp(self):
+        banks = self.fetch_twobyte()  # destination bank first
+        self.block_move(banks & 0x00FF, banks >> 8, -1)
+        self.PC = self.PC + 1
+
+    # NOP
+    @instruction(0xEA)
+    def nop(self):
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # PEA imm
+    @instruction(0xF4)
+    def pea_immediate(self):
+        bytes = self.fetch_twobyte()
+        self.push_stack(bytes)
+        self.cycles += 5
+        self.PC = self.PC + 1
+
+    # PEI dir
+    @instruction(0xD4)
+    def pei_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        value = self.read_memory(address, byte_num = 2, wrapp=True)
+        self.push_stack(value)
+        self.cycles = 6 + self.w()
+        self.PC = self.PC + 1
+
+    # PER imm
+    @instruction(0x62)
+    def per_immediate(self):
+        bytes = self.fetch_twobyte()
+        self.push_stack(bytes + self.PC+1)
+        self.cycles += 6
+        self.PC = self.PC + 1
+
+    # PHA
+    @instruction(0x48)
+    def pha(self):
+        if self.isM():# 8 bit mode
+            self.push_stack_8bit(self.A & 0x00FF)
+            self.cycles += 3
             self.PC += 1
-        # TXY
-        elif opcode == 0x9B:
-            if self.isX():
-                self.Y = (self.Y & 0xFF00) | (self.X & 0x00FF)
-            else:
-                self.Y = self.X
-            self.compute_NZflags(self.Y, self.isX())
-            self.cycles += 2
+        else: # 16 bit mode
+            self.push_stack(self.A)
+            self.cycles += 4
             self.PC += 1
-        # TYA
-        elif opcode == 0x98:
-            if self.isM():
-                self.A = (self.A & 0xFF00) | (self.Y & 0x00FF)
-            else:
-                self.A = self.Y
-            self.compute_NZflags(self.A, self.isM())
-            self.cycles += 2
+
+    # PHB
+    @instruction(0x8B)
+    def phb(self):
+        self.push_stack_8bit(self.DBR)
+        self.cycles += 3
+        self.PC = self.PC + 1
+
+    # PHD
+    @instruction(0x0B)
+    def phd(self):
+        self.push_stack(self.DP)
+        self.cycles += 4
+        self.PC = self.PC + 1
+
+    # PHK
+    @instruction(0x4B)
+    def phk(self):
+        self.push_stack_8bit(self.PBR)
+        self.cycles += 3
+        self.PC = self.PC + 1
+
+    # PHP
+    @instruction(0x08)
+    def php(self):
+        self.push_stack_8bit(self.P)
+        self.cycles += 3
+        self.PC = self.PC + 1
+
+    # PHX
+    @instruction(0xDA)
+    def phx(self):
+        if self.isX():
+            self.push_stack_8bit(self.X & 0x00FF)
+            self.cycles += 3
             self.PC += 1
-        # TYX
-        elif opcode == 0xBB:
-            if self.isX():
-                self.X = (self.X & 0xFF00) | (self.Y & 0x00FF)
-            else:
-                self.X = self.Y
-            self.compute_NZflags(self.X, self.isX())
-            self.cycles += 2
+        else:
+            self.push_stack(self.X)
+            self.cycles += 4
             self.PC += 1
-        # TAX
-        elif opcode == 0xAA:
-            if self.isX():
-                self.X = (self.X & 0xFF00) | (self.A & 0x00FF)
-            else:
-                self.X = self.A
-            self.compute_NZflags(self.X, self.isX())
-            self.cycles += 2
+
+    # PHY
+    @instruction(0x5A)
+    def phy(self):
+        if self.isX():# x flag also controls Y register.
+            self.push_stack_8bit(self.Y & 0x00FF)
+            self.cycles += 3
             self.PC += 1
-        # TAY
-        elif opcode == 0xA8:
-            if self.isX():
-                self.Y = (self.Y & 0xFF00) | (self.A & 0x00FF)
-            else:
-                self.Y = self.A
-            self.compute_NZflags(self.Y, self.isX())
-            self.cycles += 2
+        else:
+            self.push_stack(self.Y)
+            self.cycles += 4
             self.PC += 1
-        # TSX
-        elif opcode == 0xBA:
-            if self.isX():
-                self.X = (self.X & 0xFF00) | (self.SP & 0x00FF)
-            else:
-                self.X = self.SP
-            self.compute_NZflags(self.X, self.isX())
-            self.cycles += 2
+
+    # PLA
+    @instruction(0x68)
+    def pla(self):
+        if self.isM(): # 8 bit mode
+            A_low = self.pop_stack_8bit()
+            A_high = self.A & 0xFF00
+            self.A = A_high + A_low # in 8 bit mode the high byte of the A register persists
+            self.compute_NZflags(A_low, True)
+            self.cycles += 4
             self.PC += 1
-        # TXA
-        elif opcode == 0x8A:
-            if self.isM():
-                self.A = (self.A & 0xFF00) | (self.X & 0x00FF)
-            else:
-                self.A = self.X
-            self.compute_NZflags(self.A, self.isM())
-            self.cycles += 2
+        else: # 16 bit mode
+            self.A = self.pop_stack()
+            self.compute_NZflags(self.A, False)
+            self.cycles += 5
             self.PC += 1
-        # TXS
-        elif opcode == 0x9A:
-            if self.isX():
-                self.SP = (self.SP & 0xFF00) | (self.X & 0x00FF)
-            else:
-                self.SP = self.X
-            # Flags are not set
-            self.cycles += 2
+
+    # PLB
+    @instruction(0xAB)
+    def plb(self):
+        result = self.pop_stack_8bit()
+        self.compute_NZflags(result, True)
+        self.DBR = result
+        self.cycles += 4
+        self.PC += 1
+
+    # PLD
+    @instruction(0x2B)
+    def pld(self):
+        result = self.pop_stack()
+        self.compute_NZflags(result, False)
+        self.DP = result
+        self.cycles += 5
+        self.PC += 1
+
+    # PLP
+    @instruction(0x28, changes_mode=True)
+    def plp(self):
+        self.P = self.pop_stack_8bit()
+        if self.e:
+            self.P = self.P | 0b00110000
+        self.cycles += 4
+        self.PC += 1
+
+    # PLX
+    @instruction(0xFA)
+    def plx(self):
+        if self.isX():
+            self.X = self.pop_stack_8bit() # in 8 bit mode the high byte of X is forced to 0
+            self.compute_NZflags(self.X,True)
+            self.cycles += 4
             self.PC += 1
-        # TXY
-        elif opcode == 0x9B:
-            if self.isX():
-                self.Y = (self.Y & 0xFF00) | (self.X & 0x00FF)
-            else:
-                self.Y = self.X
-            self.compute_NZflags(self.Y, self.isX())
-            self.cycles += 2
+        else:
+            self.X = self.pop_stack()
+            self.compute_NZflags(self.X,False)
+            self.cycles += 5
             self.PC += 1
-        # TYA
-        elif opcode == 0x98:
-            if self.isM():
-                self.A = (self.A & 0xFF00) | (self.Y & 0x00FF)
-            else:
-                self.A = self.Y
-            self.compute_NZflags(self.A, self.isM())
-            self.cycles += 2
+
+    # PLY
+    @instruction(0x7A)
+    def ply(self):
+        if self.isX(): # there is no y flag. the x flag controls the Y register.
+            self.Y = self.pop_stack_8bit() # in 8 bit mode the high byte of Y is forced to 0
+            self.compute_NZflags(self.Y,True)
+            self.cycles += 4
             self.PC += 1
-        # TYX
-        elif opcode == 0xBB:
-            if self.isX():
-                self.X = (self.X & 0xFF00) | (self.Y & 0x00FF)
-            else:
-                self.X = self.Y
-            self.compute_NZflags(self.X, self.isX())
-            self.cycles += 2
+        else:
+            self.Y = self.pop_stack()
+            self.compute_NZflags(self.Y,False)
+            self.cycles += 5
             self.PC += 1
-        # XBA
-        elif opcode == 0xEB:
-            AH = (self.A & 0xFF00) >> 8
-            AL = (self.A & 0x00FF)
-            self.compute_NZflags(AH, True)  # 8 bit
-            self.A = (AL << 8) + AH
-            self.cycles += 3
-            self.PC = self.PC + 1
-        # XCE
-        elif opcode == 0xFB:
-            c = self.P & 0b00000001
-            if self.e == 1:
-                self.setC()
-            else:
-                self.clearC()
-            self.e = c
-            if self.e == 1: # 8 Bit 6502 Emu-mode
-                self.setM() # 8 Bit A/M
-                self.setX() # 8 Bit X/M
-                self.SP = self.SP & 0x00FF
-                self.SP = self.SP | 0x0100
-                self.X = self.X & 0x00FF
-                self.Y = self.Y & 0x00FF
-            self.cycles += 2
-            self.PC = self.PC + 1
+
+    # REP
+    @instruction(0xC2, changes_mode=True)
+    def rep(self):
+        const = self.fetch_byte()
+        nconst = ~const
+        self.P = self.P & nconst
+        if self.e: # if e is one, m and x will always be 1
+            self.P = self.P | 0b00110000
+        self.cycles += 3
+        self.PC = self.PC + 1
+
+    # ROL A
+    @instruction(0x2A)
+    def rol_accumulator(self):
+        result = self.A << 1
+        if self.flag_c:
+            result = result & 0b1111111111111111
+        else:
+            result = result & 0b1111111111111110
+        self.compute_NZflags(result, self.isM())
+        if self.A & 0b10000000 != 0:
+            self.flag_c = 1
+        else:
+            self.flag_c = 0
+        self.A = result
+        self.PC = self.PC + 1
+
+    # ROR A
+    @instruction(0x6A)
+    def ror_accumulator(self):
+        result = self.A >> 1
+        if self.flag_c:
+            result = result & 0b1111111111111111
+        else:
+            result = result & 0b0111111111111111
+        self.compute_NZflags(result, self.isM())
+        if self.A & 0b00000001 != 0:
+            self.flag_c = 1
+        else:
+            self.flag_c = 0
+        self.A = result
+        self.PC = self.PC + 1
+
+    # RTI
+    @instruction(0x40, changes_mode=True)
+    def rti(self):
+        P = self.pop_stack_8bit()
+        if self.e:  # if e is one, m and x will always be 1
+            P = P | 0b00110000
+        self.P = P
+        addr = self.pop_stack()
+        if not self.e:
+            self.PBR = self.pop_stack_8bit()
+        self.cycles += 7 - self.e
+        self.PC = addr  # the pushed address is the one of the next instruction
+
+    # RTS
+    @instruction(0x60)
+    def rts(self):
+        addr = self.pop_stack() # get return addr
+        self.cycles += 6
+        self.PC = addr +1
+
+    # RTL
+    @instruction(0x6B)
+    def rtl(self):
+        addr = self.pop_stack()      # get return addr
+        bank = self.pop_stack_8bit() # get return addr
+        self.PBR = bank
+        self.cycles += 6
+        self.PC = addr +1
+
+    # SEC
+    @instruction(0x38)
+    def sec(self):
+        self.flag_c = 1
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # SED
+    @instruction(0xF8)
+    def sed(self):
+        self.flag_d = 1
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # SEI (Disable Interrupts) Set I to 1
+    @instruction(0x78)
+    def sei(self):
+        self.flag_i = 1
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # SEP #const
+    @instruction(0xE2, changes_mode=True)
+    def sep_immediate(self):
+        const = self.fetch_byte()
+        self.P = self.P | const;
+        self.cycles += 3
+        self.PC = self.PC + 1
+
+    # STP
+    @instruction(0xDB, ends_block=True)
+    def stp(self):
+        self.stopped = True
+        self.cycles += 3
+        self.PC = self.PC + 1
+
+    # STX dp
+    @instruction(0x86)
+    def stx_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        self.write_memory(address, self.X, byte_num = 2 - self.x(), wrapp=True) # zero bank wrapping!
+        self.cycles += 4 - self.x() + self.w()
+        self.PC = self.PC + 1
+
+    # STX abs
+    @instruction(0x8E)
+    def stx_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        self.write_memory(address, self.X, byte_num = 2 - self.x())
+        self.cycles += 5 - self.x()
+        self.PC = self.PC + 1
+
+    # STX dp, Y
+    @instruction(0x96)
+    def stx_dp_y(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp_y(byte, self.DP, self.Y, self.isX())
+        self.write_memory(address, self.X, byte_num = 2 - self.x(), wrapp=True) # zero bank wrapping!
+        self.cycles += 5 - self.x() + self.w()
+        self.PC = self.PC + 1
+
+    # STY dp
+    @instruction(0x84)
+    def sty_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        self.write_memory(address, self.Y, byte_num = 2 - self.x(), wrapp=True) # zero bank wrapping!
+        self.cycles += 4 - self.x() + self.w()
+        self.PC = self.PC + 1
+
+    # STY abs
+    @instruction(0x8C)
+    def sty_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        self.write_memory(address, self.Y, byte_num = 2 - self.x())
+        self.cycles += 5 - self.x()
+        self.PC = self.PC + 1
+
+    # STY dp, X
+    @instruction(0x94)
+    def sty_dp_x(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
+        self.write_memory(address, self.Y, byte_num = 2 - self.x(), wrapp=True) # zero bank wrapping!
+        self.cycles += 5 - self.x() + self.w()
+        self.PC = self.PC + 1
+
+    # STZ dp
+    @instruction(0x64)
+    def stz_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        self.write_memory(address, 0x00, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        self.cycles += 4 - self.m() + self.w()
+        self.PC = self.PC + 1
+
+    # STZ dp, X
+    @instruction(0x74)
+    def stz_dp_x(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp_x(byte, self.DP, self.X, self.isX())
+        self.write_memory(address, 0x00, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        self.cycles += 5 - self.m() + self.w()
+        self.PC = self.PC + 1
+
+    # STZ abs
+    @instruction(0x9C)
+    def stz_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        self.write_memory(address, 0x00, byte_num = 2 - self.m())
+        self.cycles += 5 - self.m()
+        self.PC = self.PC + 1
+
+    # STZ abs, X
+    @instruction(0x9E)
+    def stz_abs_x(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs_x(bytes, self.DBR, self.X, self.isX())
+        self.write_memory(address, 0x00, byte_num = 2 - self.m())
+        self.cycles += 6 - self.m()
+        self.PC = self.PC + 1
+
+    # TCD
+    @instruction(0x5B)
+    def tcd(self):
+        self.compute_NZflags(self.A, self.isM())
+        self.DP = self.A
+        self.cycles += 2
+        self.PC += 1
+
+    # TCS
+    @instruction(0x1B)
+    def tcs(self):
+        self.compute_NZflags(self.A, self.isM())
+        if self.e:
+            self.SP = (self.SP & 0xFF00) | (self.A & 0x00FF)
+        else:
+            self.SP = self.A
+        self.cycles += 2
+        self.PC += 1
+
+    # TDC
+    @instruction(0x7B)
+    def tdc(self):
+        self.compute_NZflags(self.DP, False) # DP is always 16 bit
+        self.A = self.DP
+        self.cycles += 2
+        self.PC += 1
+
+    # TSC
+    @instruction(0x3B)
+    def tsc(self):
+        self.compute_NZflags(self.SP, False) # SP is always 16 bit
+        self.A = self.SP
+        self.cycles += 2
+        self.PC +=1
+
+    # TRB dir
+    @instruction(0x14)
+    def trb_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        result = self.compute_trb(value)
+        self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        self.cycles += 7 - 2 * self.m() + self.w()
+        self.PC = self.PC + 1
+
+    # TRB abs
+    @instruction(0x1C)
+    def trb_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        value = self.read_memory(address, byte_num = 2 - self.m())
+        result = self.compute_trb(value)
+        self.write_memory(address, result, byte_num=2 - self.m())
+        self.cycles += 8 - 2 * self.m()
+        self.PC = self.PC + 1
+
+    # TSB dir
+    @instruction(0x04)
+    def tsb_dp(self):
+        byte = self.fetch_byte()
+        address = compute_addr.dp(byte, self.DP)
+        value = self.read_memory(address, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        result = self.compute_tsb(value)
+        self.write_memory(address, result, byte_num = 2 - self.m(), wrapp=True) # zero bank wrapping!
+        self.cycles += 7 - 2 * self.m() + self.w()
+        self.PC = self.PC + 1
+
+    # TSB abs
+    @instruction(0x0C)
+    def tsb_abs(self):
+        bytes = self.fetch_twobyte()
+        address = compute_addr.abs(bytes, self.DBR)
+        value = self.read_memory(address, byte_num = 2 - self.m())
+        result = self.compute_tsb(value)
+        self.write_memory(address, result, byte_num=2 - self.m())
+        self.cycles += 8 - 2 * self.m()
+        self.PC = self.PC + 1
+
+    # TAX
+    @instruction(0xAA)
+    def tax(self):
+        if self.isX():
+            self.X = (self.X & 0xFF00) | (self.A & 0x00FF)
+        else:
+            self.X = self.A
+        self.compute_NZflags(self.X, self.isX())
+        self.cycles += 2
+        self.PC += 1
+
+    # TAY
+    @instruction(0xA8)
+    def tay(self):
+        if self.isX():
+            self.Y = (self.Y & 0xFF00) | (self.A & 0x00FF)
+        else:
+            self.Y = self.A
+        self.compute_NZflags(self.Y, self.isX())
+        self.cycles += 2
+        self.PC += 1
+
+    # TSX
+    @instruction(0xBA)
+    def tsx(self):
+        if self.isX():
+            self.X = (self.X & 0xFF00) | (self.SP & 0x00FF)
+        else:
+            self.X = self.SP
+        self.compute_NZflags(self.X, self.isX())
+        self.cycles += 2
+        self.PC += 1
+
+    # TXA
+    @instruction(0x8A)
+    def txa(self):
+        if self.isM():
+            self.A = (self.A & 0xFF00) | (self.X & 0x00FF)
+        else:
+            self.A = self.X
+        self.compute_NZflags(self.A, self.isM())
+        self.cycles += 2
+        self.PC += 1
+
+    # TXS
+    @instruction(0x9A)
+    def txs(self):
+        if self.e == 1:
+            self.SP = (self.SP & 0xFF00) | (self.X & 0x00FF)
         else:
-            from opcodes import opcode_map
-            print("unkown opcode:", hex(opcode), " maybe:", opcode_map[opcode])
-            raise NotImplementedError()
+            self.SP = self.X
+        # Flags are not set
+        self.cycles += 2
+        self.PC += 1
 
+    # TXY
+    @instruction(0x9B)
+    def txy(self):
+        if self.isX():
+            self.Y = (self.Y & 0xFF00) | (self.X & 0x00FF)
+        else:
+            self.Y = self.X
+        self.compute_NZflags(self.Y, self.isX())
+        self.cycles += 2
+        self.PC += 1
+
+    # TYA
+    @instruction(0x98)
+    def tya(self):
+        if self.isM():
+            self.A = (self.A & 0xFF00) | (self.Y & 0x00FF)
+        else:
+            self.A = self.Y
+        self.compute_NZflags(self.A, self.isM())
+        self.cycles += 2
+        self.PC += 1
+
+    # TYX
+    @instruction(0xBB)
+    def tyx(self):
+        if self.isX():
+            self.X = (self.X & 0xFF00) | (self.Y & 0x00FF)
+        else:
+            self.X = self.Y
+        self.compute_NZflags(self.X, self.isX())
+        self.cycles += 2
+        self.PC += 1
+
+    # WAI
+    @instruction(0xCB, ends_block=True)
+    def wai(self):
+        self.waiting = True
+        self.cycles += 3
+        self.PC = self.PC + 1
+
+    # WDM
+    @instruction(0x42)
+    def wdm(self):
+        byte = self.fetch_byte()  # reserved, does nothing
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+    # XBA
+    @instruction(0xEB)
+    def xba(self):
+        AH = (self.A & 0xFF00) >> 8
+        AL = (self.A & 0x00FF)
+        self.compute_NZflags(AH, True)  # 8 bit
+        self.A = (AL << 8) + AH
+        self.cycles += 3
+        self.PC = self.PC + 1
+
+    # XCE
+    @instruction(0xFB, changes_mode=True)
+    def xce(self):
+        c = self.flag_c
+        if self.e == 1:
+            self.flag_c = 1
+        else:
+            self.flag_c = 0
+        self.e = c
+        if self.e == 1: # 8 Bit 6502 Emu-mode
+            self.flag_m = 1 # 8 Bit A/M
+            self.flag_x = 1 # 8 Bit X/M
+            self.SP = self.SP & 0x00FF
+            self.SP = self.SP | 0x0100
+            self.X = self.X & 0x00FF
+            self.Y = self.Y & 0x00FF
+        self.update_mode()
+        self.cycles += 2
+        self.PC = self.PC + 1
+
+
+    # BRK and COP: return to the instruction behind the signature byte
+    def software_interrupt(self, kind):
+        self.interrupt(kind, self.PC + 1, self.P)
+
+    # Pushes PBR (native mode only), the return address and P, then continues
+    # in bank 0 at the handler of the interrupt in the current mode
+    def interrupt(self, kind, return_address, P):
+        if self.vectors is None:
+            self.resolve_vectors()
+        if not self.e:
+            self.push_stack_8bit(self.PBR)
+        self.push_stack(return_address & 0xFFFF)
+        self.push_stack_8bit(P)
+        self.flag_i = 1
+        self.flag_d = 0
+        self.PBR = 0
+        self.cycles += 8 - self.e
+        self.PC = self.vectors[self.e][kind]
+
+    # The vectors are in ROM and do not change, so they are read only once,
+    # on the first interrupt. vectors[e][kind] is the address of the handler
+    # in bank 0.
+    def resolve_vectors(self):
+        self.vectors = ([self.read_memory(vector, byte_num=2) for vector in NATIVE_VECTORS],
+                        [self.read_memory(vector, byte_num=2) for vector in EMULATION_VECTORS])
+
+    # NMI (vblank), taken at the next event boundary (see run_to)
+    def nmi(self):
+        self.nmi_pending = True
+
+    # the IRQ line is level triggered: the interrupt is taken at every event
+    # boundary while the line is active and I is clear
+    def irq(self, active=True):
+        self.irq_line = active
+
+    # Enters the handler of a pending interrupt, between two instructions.
+    # Any interrupt ends WAI, even an IRQ masked by I (without calling the
+    # handler). Nothing but a reset ends STP.
+    def service_interrupts(self):
+        if self.stopped:
+            return
+        if self.nmi_pending:
+            self.nmi_pending = False
+            kind = Interrupt.NMI
+        elif self.irq_line and not self.flag_i:
+            kind = Interrupt.IRQ
+        else:
+            self.waiting = self.waiting and not self.irq_line
+            return
+        self.waiting = False
+        P = self.P
+        if self.e:
+            P = P & 0b11101111  # B flag clear: no BRK
+        self.interrupt(kind, self.PC & 0xFFFF, P)
 
     # used by BXX opcodes.
     def computeBXX(self, nearlabel):
@@ -2154,6 +1662,41 @@ class CPU65816(object):
             self.cycles += self.p(self.PC + 1, nextPC)  # page boundary check
         return nextPC
 
+    # Used by MVN (step 1) and MVP (step -1). Moves A + 1 bytes from
+    # source_bank:X to destination_bank:Y, 7 cycles per byte. The hardware
+    # moves one byte per execution of the instruction, here everything is
+    # moved at once: by a slice copy if the memory can (see
+    # MemoryMapper.move), else byte by byte.
+    def block_move(self, destination_bank, source_bank, step):
+        count = self.A + 1
+        if self.isX():
+            mask = 0x00FF
+        else:
+            mask = 0xFFFF
+        self.DBR = destination_bank
+        self.cycles += 7 * count
+        source = self.X
+        destination = self.Y
+        self.A = 0xFFFF
+        self.X = (source + step * count) & mask
+        self.Y = (destination + step * count) & mask
+        if step > 0:
+            first = min(source, destination)
+            last = max(source, destination) + count - 1
+        else:
+            first = min(source, destination) - count + 1
+            last = max(source, destination)
+        move = getattr(self.memory, 'move', None)
+        if move is not None and first >= 0 and last <= mask:  # X and Y do not wrap
+            low = 0 if step > 0 else count - 1
+            if move((source_bank << 16) + source - low, (destination_bank << 16) + destination - low,
+                    count, step):
+                return
+        for i in range(count):
+            self.memory.write((destination_bank << 16) + destination, self.memory.read((source_bank << 16) + source))
+            source = (source + step) & mask
+            destination = (destination + step) & mask
+
     # compute twos complement by hand.
     def sub_twos_complement(self, value, arg, is8BitMode):
         if is8BitMode:
@@ -2163,27 +1706,78 @@ class CPU65816(object):
         return result
 
 
+    # value - arg - borrow (the inverted carry flag), sets the C and V flag
+    def subtract_with_borrow(self, value, arg, is8BitMode):
+        if is8BitMode:
+            value = value & 0x00FF
+            result = value - arg - 1 + self.flag_c
+            self.flag_v = ((value ^ arg) & (value ^ result) & 0x80) >> 7
+            mask = 0x00FF
+        else:
+            result = value - arg - 1 + self.flag_c
+            self.flag_v = ((value ^ arg) & (value ^ result) & 0x8000) >> 15
+            mask = 0xFFFF
+        if result >= 0:
+            self.flag_c = 1
+        else:
+            self.flag_c = 0
+        return result & mask
+
+    # ADC (table bcd.ADC) and SBC (bcd.SBC) in decimal mode, one lookup per
+    # byte, sets the C and V flag
+    def decimal_arithmetic(self, table, value, arg, is8BitMode):
+        entry = table[(self.flag_c << 16) | ((value & 0x00FF) << 8) | (arg & 0x00FF)]
+        result = entry & 0x00FF
+        if not is8BitMode:
+            entry = table[((entry & bcd.CARRY) << 8) | (value & 0xFF00) | (arg >> 8)]
+            result = result | ((entry & 0x00FF) << 8)
+        self.flag_c = (entry & bcd.CARRY) >> 8
+        self.flag_v = (entry & bcd.OVERFLOW) >> 9
+        return result
+
+    # ASL (carry_in 0) and ROL (carry_in C) of memory, sets C, N and Z
+    def shift_left(self, value, carry_in, is8BitMode):
+        if is8BitMode:
+            self.flag_c = (value >> 7) & 1
+            result = ((value << 1) | carry_in) & 0x00FF
+        else:
+            self.flag_c = (value >> 15) & 1
+            result = ((value << 1) | carry_in) & 0xFFFF
+        self.compute_NZflags(result, is8BitMode)
+        return result
+
+    # LSR (carry_in 0) and ROR (carry_in C) of memory, sets C, N and Z
+    def shift_right(self, value, carry_in, is8BitMode):
+        if is8BitMode:
+            result = (value >> 1) | (carry_in << 7)
+        else:
+            result = (value >> 1) | (carry_in << 15)
+        self.flag_c = value & 1
+        self.compute_NZflags(result, is8BitMode)
+        return result
+
     # compute twos complement by hand.
     def add_twos_complement(self, value, arg, is8BitMode):
         if is8BitMode:
+            value = value & 0x00FF
             if value <= 0x7F and value + arg > 0x7F:  # MAX_INT (SIGNED)
-                self.setV()  # Overflow Flag
+                self.flag_v = 1  # Overflow Flag
             else:
-                self.clearV()
+                self.flag_v = 0
             if value <= 0xFF and value + arg > 0xFF:  # MAX_INT (UNSIGNED)
-                self.setC()  # Carry Flag
+                self.flag_c = 1  # Carry Flag
             else:
-                self.clearC()
+                self.flag_c = 0
             result = (value + arg) & 0x0000FF
         else:
             if value <= 0x7FFF and value + arg > 0x7FFF:  # MAX_INT (SIGNED)
-                self.setV()  # Overflow Flag
+                self.flag_v = 1  # Overflow Flag
             else:
-                self.clearV()
+                self.flag_v = 0
             if value <= 0xFFFF and value + arg > 0xFFFF:  # MAX_INT (UNSIGNED)
-                self.setC()  # Carry Flag
+                self.flag_c = 1  # Carry Flag
             else:
-                self.clearC()
+                self.flag_c = 0
             result = (value + arg) & 0x00FFFF
         return result
 
@@ -2204,31 +1798,17 @@ class CPU65816(object):
     # the n flag is set if the value and the accumulator is 0
     def compute_bit_flags(self, value):
         if self.isM():          # 8 bit mode
-            if value & 0x80:
-                self.setN()
-            else:
-                self.clearN()
             if value & 0x40:
-                self.setV()
-            else:
-                self.clearV()
-            if not value & (self.A & 0x00FF):
-                self.setZ()
+                self.flag_v = 1
             else:
-                self.clearZ()
+                self.flag_v = 0
+            self.nz = ((value & 0x80) << 9) | (value & self.A & 0x00FF)
         else:                   # 16 bit mode
-            if value & 0x8000:
-                self.setN()
-            else:
-                self.clearN()
             if value & 0x4000:
-                self.setV()
+                self.flag_v = 1
             else:
-                self.clearV()
-            if not value & self.A:
-                self.setZ()
-            else:
-                self.clearZ()
+                self.flag_v = 0
+            self.nz = ((value & 0x8000) << 1) | (value & self.A & 0xFFFF)
 
     # sets the Z flag if (value & accumulator = 0)
     # resets the bits in the data that are 1s in the accumulator
@@ -2268,18 +1848,18 @@ class CPU65816(object):
         self.PC = self.PC + 1
         # PC wrapping: if PC = 0xFFFF then PC + 1 = 0x0000
         self.PC = self.PC & 0xFFFF
-        return self.memory.read((self.PBR << 16) +self.PC)
+        return self.read_code(self.PC)
 
     # little endian
     def fetch_twobyte(self):
         self.PC = self.PC + 1
         # PC wrapping: if PC = 0xFFFF then PC + 1 = 0x0000
         self.PC = self.PC & 0xFFFF
-        addr = self.memory.read((self.PBR << 16) + self.PC)
+        addr = self.read_code(self.PC)
         self.PC = self.PC + 1
         # PC wrapping: if PC = 0xFFFF then PC + 1 = 0x0000
         self.PC = self.PC & 0xFFFF
-        addr = (self.memory.read((self.PBR << 16) + self.PC) << 8) + addr
+        addr = (self.read_code(self.PC) << 8) + addr
         return addr
 
     # little endian
@@ -2287,69 +1867,117 @@ class CPU65816(object):
         self.PC = self.PC + 1
         # PC wrapping: if PC = 0xFFFF then PC + 1 = 0x0000
         self.PC = self.PC & 0xFFFF
-        addr = self.memory.read((self.PBR << 16) +self.PC)
+        addr = self.read_code(self.PC)
         self.PC = self.PC + 1
         # PC wrapping: if PC = 0xFFFF then PC + 1 = 0x0000
         self.PC = self.PC & 0xFFFF
-        addr = (self.memory.read((self.PBR << 16) +self.PC) << 8) + addr
+        addr = (self.read_code(self.PC) << 8) + addr
         self.PC = self.PC + 1
         # PC wrapping: if PC = 0xFFFF then PC + 1 = 0x0000
         self.PC = self.PC & 0xFFFF
-        addr = (self.memory.read((self.PBR << 16) +self.PC) << 16) + addr
+        addr = (self.read_code(self.PC) << 16) + addr
         return addr
 
+    # Reads the byte at PBR:pc. Instructions in ROM (or WRAM) are read
+    # directly from the list behind the program bank instead of going through
+    # the memory mapper, the list is looked up again when PBR changes.
+    def read_code(self, pc):
+        if self.PBR != self.code_bank:
+            self.resolve_code_bank()
+        if self.code_first <= pc <= self.code_last:
+            return self.code_buffer[self.code_base + pc]
+        return self.memory.read((self.PBR << 16) + pc)
+
+    def resolve_code_bank(self):
+        self.code_bank = self.PBR
+        window = None
+        code_window = getattr(self.memory, 'code_window', None)
+        if code_window is not None:
+            window = code_window(self.PBR)
+        if window is None:
+            self.code_buffer, self.code_base, self.code_first, self.code_last = None, 0, 1, 0
+        else:
+            self.code_buffer, self.code_base, self.code_first, self.code_last = window
+
     def read_memory(self, address, byte_num, wrapp=False):
         address = address & 0xFFFFFF
+        if address + byte_num <= 0x2000 and self.low_wram is not None:
+            return self.read_low_wram(address, byte_num)
         if byte_num == 1:
-            byte0 = self.memory.read(address)
-            return byte0
+            return self.memory.read(address)
         elif byte_num == 2:
-            byte0 = self.memory.read(address)
-            if wrapp:
-                byte1 = self.memory.read((address + 1) & 0xFFFF)
-            else:
-                byte1 = self.memory.read(address + 1)
-            return byte0 + (byte1 << 8)
+            return self.read16(address, wrapp)
         elif byte_num == 3:
-            byte0 = self.memory.read(address)
-            if wrapp:
-                byte1 = self.memory.read((address + 1) & 0xFFFF)
-            else:
-                byte1 = self.memory.read(address + 1)
-            if wrapp:
-                byte2 = self.memory.read((address + 2) & 0xFFFF)
-            else:
-                byte2 = self.memory.read(address + 2)
-            return byte0 + (byte1 << 8) + (byte2 << 16)
+            return self.read24(address, wrapp)
         return -1
 
     def write_memory(self, address, value, byte_num, wrapp=False):
         address = address & 0xFFFFFF
+        if address + byte_num <= 0x2000 and self.low_wram is not None \
+                and (address >> 8) not in self.memory.code_pages \
+                and ((address + byte_num - 1) >> 8) not in self.memory.code_pages:
+            self.write_low_wram(address, value, byte_num)
+            return
         if byte_num == 1:
             self.memory.write(address, value & 0xFF)
         elif byte_num == 2:
-            self.memory.write(address, value & 0xFF)
-            if wrapp:
-                self.memory.write((address + 1) & 0xFFFF, (value & 0xFF00) >> 8)
-            else:
-                self.memory.write(address + 1, (value & 0xFF00) >> 8)
+            self.write16(address, value, wrapp)
+
+    # Direct page and stack almost always are in the first 8KB of WRAM
+    # (00:0000 - 1FFF). Accesses there index the WRAM list directly instead
+    # of going through the memory mapper. Writes to pages with cached code
+    # still go through the mapper, which tells the block cache.
+    def resolve_low_wram(self):
+        low_wram = getattr(self.memory, 'low_wram', None)
+        if low_wram is not None:
+            low_wram = low_wram()
+        self.low_wram = low_wram
+
+    # called by the memory after it mapped pages to other lists (see
+    # MemoryMapper.write_shared): the lists read directly are looked up again
+    def resolve_mapping(self):
+        self.resolve_low_wram()
+        self.code_bank = None
+
+    # 16 and 24 bit accesses with one call to the memory if it has
+    # read16, read24 and write16 (see MemoryMapper.read16), else byte by byte
+    def resolve_multibyte_access(self):
+        memory = self.memory
+        self.read16 = getattr(memory, 'read16', None) or functools.partial(read16_bytewise, memory)
+        self.read24 = getattr(memory, 'read24', None) or functools.partial(read24_bytewise, memory)
+        self.write16 = getattr(memory, 'write16', None) or functools.partial(write16_bytewise, memory)
+
+    def read_low_wram(self, address, byte_num):
+        low_wram = self.low_wram
+        if byte_num == 1:
+            return low_wram[address]
+        elif byte_num == 2:
+            return low_wram[address] + (low_wram[address + 1] << 8)
+        return low_wram[address] + (low_wram[address + 1] << 8) + (low_wram[address + 2] << 16)
+
+    def write_low_wram(self, address, value, byte_num):
+        self.low_wram[address] = value & 0xFF
+        if byte_num == 2:
+            self.low_wram[address + 1] = (value & 0xFF00) >> 8
 
     def push_stack(self, value):
-        self.memory.write(self.SP, (value & 0xFF00) >> 8)
-        self.stack.append((value & 0xFF00) >> 8)  # only for debugging
+        self.write_memory(self.SP, (value & 0xFF00) >> 8, 1)
         self.SP = self.SP - 1
-        self.memory.write(self.SP, value & 0x00FF)
-        self.stack.append(value & 0x00FF)  # only for debugging
+        self.write_memory(self.SP, value & 0x00FF, 1)
         self.SP = self.SP - 1
+        if self.stack is not None:  # only for debugging
+            self.stack.append(('push', self.SP + 2, (value & 0xFF00) >> 8))
+            self.stack.append(('push', self.SP + 1, value & 0x00FF))
         #print("push16")
         #for i in range(self.SP, 0x2000):
         #    print(hex(i)+":"+str(self.memory.read(i)))
         #print("end push16")
 
     def push_stack_8bit(self, value):
-        self.memory.write(self.SP, value & 0x00FF)
-        self.stack.append(value& 0x00FF) # only for debugging
+        self.write_memory(self.SP, value & 0x00FF, 1)
         self.SP = self.SP - 1
+        if self.stack is not None:  # only for debugging
+            self.stack.append(('push', self.SP + 1, value & 0x00FF))
         #print("push8")
         #for i in range(self.SP, 0x2000):
         #    print(hex(i)+":"+str(self.memory.read(i)))
@@ -2357,11 +1985,12 @@ class CPU65816(object):
 
     def pop_stack(self):
         self.SP = self.SP + 1
-        low = self.memory.read(self.SP)
-        self.stack.pop() # only for debugging
+        low = self.read_memory(self.SP, 1)
         self.SP = self.SP + 1
-        high = self.memory.read(self.SP)
-        self.stack.pop()  # only for debugging
+        high = self.read_memory(self.SP, 1)
+        if self.stack is not None:  # only for debugging
+            self.stack.append(('pull', self.SP - 1, low))
+            self.stack.append(('pull', self.SP, high))
         #print("pop16")
         #for i in range(self.SP, 0x2000):
         #    print(hex(i)+":"+str(self.memory.read(i)))
@@ -2370,33 +1999,25 @@ class CPU65816(object):
 
     def pop_stack_8bit(self):
         self.SP = self.SP + 1
-        byte = self.memory.read(self.SP)
-        self.stack.pop()  # only for debugging
+        byte = self.read_memory(self.SP, 1)
+        if self.stack is not None:  # only for debugging
+            self.stack.append(('pull', self.SP, byte))
         #print("pop8")
         #for i in range(self.SP, 0x2000):
         #    print(hex(i)+":"+str(self.memory.read(i)))
         #print("end pop8")
         return byte
 
+    # Lazy N and Z flag: most results which set N and Z are overwritten
+    # before a branch or PHP reads the flags, so only the result is kept in
+    # nz. An 8 bit result is moved to the high byte, for both widths N is
+    # bit 15 and Z is set if the low 16 bits are 0. Bit 16 sets N
+    # independent of the result (for N and Z set at the same time).
     def compute_NZflags(self, value, is8BitMode):
         if is8BitMode:
-            if value & 0b10000000 != 0: # 8 Bit Mode
-                self.setN()
-            else:
-                self.clearN()
-            if value & 0x00FF == 0:
-                self.setZ()
-            else:
-                self.clearZ()
-        if not is8BitMode:
-            if value & 0b1000000000000000 != 0: # 16 Bit Mode
-                self.setN()
-            else:
-                self.clearN()
-            if value & 0xFFFF == 0:
-                self.setZ()
-            else:
-                self.clearZ()
+            self.nz = (value & 0x00FF) << 8
+        else:
+            self.nz = value & 0xFFFF
 
 
 
@@ -2407,134 +2028,143 @@ class CPU65816(object):
             return 0
 
     def m(self):
-        if self.isM():
-            return 1
-        else:
-            return 0
+        return self.flag_m
 
-    # TODO: what is old and new page in instructions like LDA? Remove 0x0 hack
-    # 1 if page boundary is crossed, 0 otherwise
-    def p(self, old_page=0x0, new_page=0x0):
+    # 1 if page boundary is crossed, 0 otherwise (branches in emulation mode,
+    # indexed addressing computes it in place, see composer.PAGE_CROSSING)
+    def p(self, old_page, new_page):
         if not (old_page & 0x00FF00) == (new_page & 0x00FF00):
             return 1
         return 0
 
     def x(self):
-        if self.isX():
-            return 1
-        else:
-            return 0
+        return self.flag_x
 
     def c(self):
-        if self.isC():
-            return 1
-        else:
-            return 0
+        return self.flag_c
 
     # True = Negative
     # False = Positive
     def isN(self):
-        return self.P & 0b10000000 != 0
+        return self.nz & 0x18000 != 0
 
     # True = Overflow
     # False = no Overflow
     def isV(self):
-        return self.P & 0b01000000 != 0
+        return self.flag_v == 1
 
     # True  = 8 Bit Accumulator and Memory
     # False = 16 Bit Accumulator and Memory
     def isM(self):
-        return self.P & 0b00100000 != 0
+        return self.flag_m == 1
 
     # True = X and Y 8 Bit
     # False = X and Y 16 Bit
     def isX(self):
-        return self.P & 0b00010000 != 0
+        return self.flag_x == 1
 
     # Break in Emulation-Mode
     def isB(self):
-        return self.P & 0b00010000 != 0
+        return self.flag_x == 1
 
     # True = BCD
     # False = 'normal' binary arithmetic
     def isD(self):
-        return self.P & 0b00001000 != 0
+        return self.flag_d == 1
 
     # IRQ Disbale = True (1)
     # IRQ Enable = False (0)
     def isI(self):
-        return self.P & 0b00000100 != 0
+        return self.flag_i == 1
 
     # True = zero
     # False = not zero
     def isZ(self):
-        return self.P & 0b00000010 != 0
+        return self.nz & 0xFFFF == 0
 
     # True = carry
     # False = no carry
     def isC(self):
-        return self.P & 0b00000001 != 0
+        return self.flag_c == 1
 
     # use if result was negative
     def setN(self):
-        self.P = self.P | 0b10000000
+        self.nz = self.nz | 0x10000
 
     # use if overflow
     def setV(self):
-        self.P = self.P | 0b01000000
+        self.flag_v = 1
 
     # switch to A 8 Bit
     def setM(self):
-        self.P = self.P | 0b00100000
+        self.flag_m = 1
 
     # switch X/Y to 8 Bit
     def setX(self):
-        self.P = self.P | 0b00010000
+        self.flag_x = 1
 
     # switch to BCD from 'normal' binary arithmetic
     def setD(self):
-        self.P = self.P | 0b00001000
+        self.flag_d = 1
 
     # IRQ Disbale
     def setI(self):
-        self.P = self.P | 0b00000100
+        self.flag_i = 1
 
     # use if computation was zero
     def setZ(self):
-        self.P = self.P | 0b00000010
+        self.nz = self.nz & 0x18000 and 0x10000
 
     # use if carry
     def setC(self):
-        self.P = self.P | 0b00000001
+        self.flag_c = 1
 
     # use if result was positive
     def clearN(self):
-        self.P = self.P & 0b01111111
+        self.nz = self.nz & 0xFFFF and 1
 
     # use if no overflow
     def clearV(self):
-        self.P = self.P & 0b10111111
+        self.flag_v = 0
 
     # switch to A 16 Bit
     def clearM(self):
-        self.P = self.P & 0b11011111
+        self.flag_m = 0
 
     # switch X/Y to 16 Bit
     def clearX(self):
-        self.P = self.P & 0b11101111
+        self.flag_x = 0
 
     # switch from BCD to 'normal' binary arithmetic
     def clearD(self):
-        self.P = self.P & 0b11110111
+        self.flag_d = 0
 
     # IRQ enable
     def clearI(self):
-        self.P = self.P & 0b11111011
+        self.flag_i = 0
 
     # clear zero
     def clearZ(self):
-        self.P = self.P & 0b11111101
+        self.nz = (self.nz & 0x18000) | 1
 
     # clear carry
     def clearC(self):
-        self.P = self.P & 0b11111110
+        self.flag_c = 0
+
+
+# 256 entry dispatch table: opcode byte -> handler. Opcodes without a handler
+# end up in unknown_opcode.
+def build_opcode_table(cpu_class):
+    table = [cpu_class.unknown_opcode] * 256
+    for name in dir(cpu_class):
+        handler = getattr(cpu_class, name)
+        opcode = getattr(handler, 'opcode', None)
+        if opcode is not None:
+            table[opcode] = handler
+    return table
+
+from composer import compose_handlers
+from specializer import build_mode_tables, mode_index
+
+compose_handlers(CPU65816)
+MODE_TABLES = build_mode_tables(CPU65816, build_opcode_table(CPU65816))
@@ -3,6 +3,19 @@ class DMAController(object):
     def __init__(self):
         self.registers = {}
 
+    # Bytes the channels set in MDMAEN (bit n: channel n) transfer, from
+    # their byte counters DASn (43n5 low, 43n6 high, 0 is 64 KB). The
+    # counters are 0 after the transfer.
+    def transfer_size(self, channels):
+        count = 0
+        for channel in range(8):
+            if channels & (1 << channel):
+                address = 0x4305 + (channel << 4)
+                count += (self.registers.get(address, 0) | (self.registers.get(address + 1, 0) << 8)) or 0x10000
+                self.registers[address] = 0
+                self.registers[address + 1] = 0
+        return count
+
     # called by the memory mapper
     def read(self, address):
         return self.registers[address]
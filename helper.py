@@ -1,3 +1,6 @@
+import mmap
+
+
 def get_two_bytes_little_endian(byte0, byte1):
     b0 = hex(byte0)[2:]
     b0 = (2 - len(b0)) * "0" + b0
@@ -5,12 +8,27 @@ def get_two_bytes_little_endian(byte0, byte1):
     b1 = (2 - len(b1)) * "0" + b1
     return  int(b1 + b0, 16)
 
+# some copiers put a header of 512 bytes in front of the ROM
+COPIER_HEADER_SIZE = 512
+
+
 def open_as_byte_array(rom_name):
     file = open(rom_name, 'rb')
     b_array = bytearray(file.read())
     file.close()
     return b_array
 
+# Maps the ROM file read-only instead of reading it: every process loading
+# the same file shares one copy of it in the page cache. Returns (mapping,
+# index of the first ROM byte), a copier header (the file size is no
+# multiple of 1024, see ROMHeader) is skipped by that index, not by copying.
+def map_rom(rom_name):
+    with open(rom_name, 'rb') as file:
+        rom = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(rom) % 1024 != 0:
+        return rom, COPIER_HEADER_SIZE
+    return rom, 0
+
 # prints a byte array hex-style
 def print_hex_dump(rom_byte_array):
     ba = rom_byte_array
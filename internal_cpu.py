@@ -63,9 +63,13 @@ class InternalCPURegisters(object):
         elif address == 0x420D:
             return self.MEMSEL_8      # ROM Speed Register
         elif address == 0x4210:
-            return self.RDNMI_8       # Interrupt Flag Registers
+            value = self.RDNMI_8      # Interrupt Flag Registers
+            self.RDNMI_8 = value & 0x7F  # reading acknowledges the NMI
+            return value
         elif address == 0x4211:
-            return self.TIMEUP_8      # Interrupt Flag Registers
+            value = self.TIMEUP_8     # Interrupt Flag Registers
+            self.TIMEUP_8 = value & 0x7F  # reading acknowledges the IRQ (see Scheduler.update_irq)
+            return value
         elif address == 0x4212:
             return self.HVBJOY_8      # PPU Status Register
         elif address == 0x4213:
@@ -189,4 +193,4 @@ class InternalCPURegisters(object):
         elif address == 0x421F:
             self.JOY4H_8 = value       # Controller Port Data Registers(Pad4 - High)
             return
-        print("Error write Internal CPU Address: " + hex(address) + value(value))
+        print("Error write Internal CPU Address: " + hex(address) + " " + hex(value))
@@ -1,3 +1,6 @@
+import copy
+import functools
+
 from cartrige import CartrigeType
 from dma import DMAController, HDMAController
 from internal_cpu import InternalCPURegisters
@@ -14,34 +17,454 @@ from ppu import PPU
 # standardized (LoROM, HiROM, ..) but it can differ from the implementation here
 # on some games. Only in rare cases the mapping is done by the SNES
 # instead of the cartrige (e.g. RAM access)
+WRAM_SIZE = 0x20000  # 128 KB
+
+
+# RAM and SRAM None: the mapper allocates them as bytearray (WRAM_SIZE and
+# SRAM_size bytes), which wram() and sram() can show without copying.
+# ROM_offset is the index of the first ROM byte in ROM, e.g. behind the
+# copier header of a mapped file (see helper.map_rom).
+# fork() branches the memory into a second one, the WRAM and the SRAM are
+# shared page by page until one of both writes to a page (copy on write).
 class MemoryMapper(object):
-    def __init__(self, header, RAM, ROM, SRAM, use_MAD1_mapping, SRAM_size):
+    def __init__(self, header, RAM, ROM, SRAM, use_MAD1_mapping, SRAM_size, ROM_offset=0):
+        if RAM is None:
+            RAM = bytearray(WRAM_SIZE)
+        if SRAM is None:
+            SRAM = bytearray(SRAM_size)
         self.header = header
+        self.code_pages = set()  # WRAM pages with cached code (see block_cache.py)
+        self.code_cache = None
         cartrige_type = header.getCartridgeType()
         if cartrige_type == CartrigeType.LOROM:
-            self.mapper = LoROMMemoryMapper(RAM, ROM, SRAM, use_MAD1_mapping, SRAM_size)
+            self.mapper = LoROMMemoryMapper(RAM, ROM, SRAM, use_MAD1_mapping, SRAM_size, ROM_offset)
         elif cartrige_type == CartrigeType.HIROM:
-            self.mapper = HiROMMemoryMapper(RAM, ROM, SRAM, use_MAD1_mapping, SRAM_size)
+            self.mapper = HiROMMemoryMapper(RAM, ROM, SRAM, use_MAD1_mapping, SRAM_size, ROM_offset)
         else:
             raise NotImplementedError()
+        self.read_pages, self.write_pages = build_page_table(self.mapper)
+        self.plan = None  # see ForkPlan, found on the first fork
+        self.chunks = None  # (memory, index) of every chunk after the first fork
+        self.private = set()  # chunks only this memory has, it writes them directly
+        self.remapped = None  # called after pages were mapped to a copy (see write_shared)
 
     # called by the CPU
     def read(self, address):
-        bank = (address & 0xFF0000) >> 16 # get first two bytes (MSB)
-        offset = address & 0x00FFFF
-        return self.mapper.read(bank, offset)
+        address = address & 0xFFFFFF
+        memory, index = self.read_pages[address >> PAGE_BITS]
+        if memory is None:
+            return index(address)  # I/O
+        return memory[index + address]
 
     # called by the CPU
     def write(self, address, value):
-        bank = (address & 0xFF0000) >> 16 # get first two bytes (MSB)
-        offset = address & 0x00FFFF
-        self.mapper.write(bank, offset, value)
+        address = address & 0xFFFFFF
+        memory, index = self.write_pages[address >> PAGE_BITS]
+        if memory is None:
+            index(address, value)  # I/O
+        else:
+            memory[index + address] = value
+        if self.code_pages:
+            page = wram_page(address)
+            if page in self.code_pages:
+                self.code_cache.invalidate_page(page)
+
+    # 16 bit read: the second byte is at address + 1, with wrapp at
+    # (address + 1) & 0xFFFF (zero bank wrapping). If both bytes are in one
+    # page the page is only looked up once.
+    def read16(self, address, wrapp=False):
+        address = address & 0xFFFFFF
+        second = address + 1
+        if wrapp:
+            second = second & 0xFFFF
+        page = address >> PAGE_BITS
+        if second >> PAGE_BITS == page:
+            memory, index = self.read_pages[page]
+            if memory is not None:
+                index = index + address
+                return memory[index] + (memory[index + 1] << 8)
+        return self.read(address) + (self.read(second) << 8)
+
+    # 24 bit read, see read16
+    def read24(self, address, wrapp=False):
+        address = address & 0xFFFFFF
+        second = address + 1
+        third = address + 2
+        if wrapp:
+            second = second & 0xFFFF
+            third = third & 0xFFFF
+        page = address >> PAGE_BITS
+        if third >> PAGE_BITS == page:
+            memory, index = self.read_pages[page]
+            if memory is not None:
+                index = index + address
+                return memory[index] + (memory[index + 1] << 8) + (memory[index + 2] << 16)
+        return self.read(address) + (self.read(second) << 8) + (self.read(third) << 16)
+
+    # 16 bit write, see read16
+    def write16(self, address, value, wrapp=False):
+        address = address & 0xFFFFFF
+        second = address + 1
+        if wrapp:
+            second = second & 0xFFFF
+        page = address >> PAGE_BITS
+        if second >> PAGE_BITS == page:
+            memory, index = self.write_pages[page]
+            if memory is not None:
+                index = index + address
+                memory[index] = value & 0xFF
+                memory[index + 1] = (value & 0xFF00) >> 8
+                if self.code_pages:
+                    for page in (wram_page(address), wram_page(second)):
+                        if page in self.code_pages:
+                            self.code_cache.invalidate_page(page)
+                return
+        self.write(address, value & 0xFF)
+        self.write(second, (value & 0xFF00) >> 8)
+
+    # (list, index of offset) if the length bytes from bank:offset are
+    # plain memory in one list, the same mapping as read and write.
+    # None for I/O, ROM if write is True and ranges that wrap around.
+    def buffer(self, bank, offset, length, write):
+        pages = self.write_pages if write else self.read_pages
+        address = (bank << 16) + offset
+        last = address + length - 1
+        if last >> 16 != bank:
+            return None
+        memory, index = pages[address >> PAGE_BITS]
+        if memory is None:
+            return None
+        for page in range((address >> PAGE_BITS) + 1, (last >> PAGE_BITS) + 1):
+            # the next page has to continue the list where this one ends
+            if pages[page][0] is not memory or pages[page][1] != index:
+                return None
+        return memory, index + address
+
+    # False if the byte at address can be written (WRAM, SRAM, I/O), code
+    # read from there may change
+    def is_rom(self, address):
+        memory, index = self.write_pages[(address & 0xFFFFFF) >> PAGE_BITS]
+        return memory is None and index is write_ROM
+
+    # Zero copy views of the WRAM and the SRAM (only if they are a
+    # bytearray): bytes(memory.wram()) is a snapshot, comparing or hashing
+    # them works on the whole buffer at once. After a fork the memory is
+    # spread over chunks, then it is a copy of them.
+    def wram(self):
+        return self.view('RAM')
+
+    def sram(self):
+        return self.view('SRAM')
+
+    def view(self, name):
+        memory = getattr(self.mapper, name)
+        if self.chunks is None:
+            return memoryview(memory)
+        chunks = sorted((index, chunk) for chunk, (source, index) in enumerate(self.plan.chunk_sources)
+                        if source == name)
+        if not chunks:
+            return memoryview(memory)  # copied on fork, see ForkPlan
+        return memoryview(b''.join(bytes(self.chunk(chunk)) for index, chunk in chunks))
+
+    # the list of which the first 8KB are 00:0000 - 1FFF (see
+    # CPU65816.resolve_low_wram)
+    def low_wram(self):
+        buffer = self.buffer(0x00, 0x0000, 0x2000, True)
+        if buffer is None or buffer[1] != 0:
+            return None
+        return buffer[0]
+
+    # The largest part of the bank instructions can be read from directly
+    # (see CPU65816.read_code): (list, index of offset 0 in it, first offset,
+    # last offset) or None
+    def code_window(self, bank):
+        for first, last in ((0x0000, 0xFFFF), (0x8000, 0xFFFF), (0x0000, 0x1FFF)):
+            buffer = self.buffer(bank, first, last - first + 1, False)
+            if buffer is not None:
+                return buffer[0], buffer[1] - first, first, last
+        return None
+
+    # MVN (step 1) and MVP (step -1): moves count bytes, source and
+    # destination are the lowest addresses of both ranges, which do not
+    # cross a bank. If both ranges are plain memory (WRAM, SRAM, ROM) this is
+    # one slice copy, otherwise nothing is done and False is returned: the
+    # CPU then moves byte by byte, through read and write.
+    def move(self, source, destination, count, step):
+        source_buffer = self.buffer((source & 0xFF0000) >> 16, source & 0x00FFFF, count, False)
+        destination_buffer = self.buffer((destination & 0xFF0000) >> 16, destination & 0x00FFFF,
+                                                count, True)
+        if source_buffer is None or destination_buffer is None:
+            return False
+        source_buffer, s = source_buffer
+        destination_buffer, d = destination_buffer
+        distance = (d - s) * step
+        if source_buffer is destination_buffer and 0 < distance < count:
+            # the move reads bytes it has written before, the first bytes
+            # moved repeat (e.g. MVN from X to X+1 fills the memory)
+            if step > 0:
+                pattern = source_buffer[s:s + distance]
+                values = (pattern * (count // distance + 1))[:count]
+            else:
+                pattern = source_buffer[s + count - distance:s + count]
+                values = (pattern * (count // distance + 1))[-count:]
+        else:
+            values = source_buffer[s:s + count]
+        destination_buffer[d:d + count] = values
+        if self.code_pages:
+            for address in range(destination & 0xFFFF00, destination + count, 0x100):
+                page = wram_page(address)
+                if page in self.code_pages:
+                    self.code_cache.invalidate_page(page)
+        return True
+
+    # A second memory with the same content, both go on independently. The
+    # ROM is shared, the registers behind the I/O pages are copied. The
+    # WRAM and the SRAM are cut into chunks of one page (see ForkPlan),
+    # which both memories share: the write pages of a shared chunk copy it
+    # on the first write (see write_shared). A fork costs the page table and
+    # later the pages which are written, not the 128 KB of WRAM.
+    def fork(self):
+        if self.plan is None:
+            self.plan = ForkPlan(self.mapper)
+            self.chunks = [(getattr(self.mapper, name), index) for name, index in self.plan.chunk_sources]
+            self.private = set(range(len(self.chunks)))
+        for chunk in self.private:
+            self.share(chunk)
+        self.private = set()
+        child = copy.copy(self)
+        child.mapper = self.mapper.fork()
+        child.code_pages = set()
+        child.code_cache = None
+        child.remapped = None
+        child.read_pages = list(self.read_pages)
+        child.write_pages = list(self.write_pages)
+        child.chunks = list(self.chunks)
+        child.private = set()
+        for chunk in range(len(child.chunks)):
+            child.share(chunk)
+        read_io, write_io = (None, child.mapper.read_io), (None, child.mapper.write_io)
+        for page, access in self.plan.io_pages:
+            if access & READ:
+                child.read_pages[page] = read_io
+            if access & WRITE:
+                child.write_pages[page] = write_io
+        for name, pages in self.plan.copied:
+            memory = getattr(self.mapper, name)[:]
+            setattr(child.mapper, name, memory)
+            for page, access, index, address, size in pages:
+                read_page, write_page = memory_page(memory, index, address, size)
+                if access & READ:
+                    child.read_pages[page] = read_page
+                if access & WRITE:
+                    child.write_pages[page] = write_page
+        if self.remapped is not None:
+            self.remapped()
+        return child
+
+    # the write pages of the chunk copy it first
+    def share(self, chunk):
+        write = functools.partial(self.write_shared, chunk)
+        for page in self.plan.chunk_pages[chunk]:
+            self.write_pages[page] = (None, write)
+
+    # the first write to a shared chunk: it is copied and all of its pages
+    # are mapped to the copy, which only this memory has
+    def write_shared(self, chunk, address, value):
+        memory = self.chunk(chunk)
+        self.chunks[chunk] = (memory, 0)
+        self.private.add(chunk)
+        for page in self.plan.chunk_pages[chunk]:
+            self.read_pages[page] = self.write_pages[page] = (memory, -(page << PAGE_BITS))
+        memory[address & (PAGE_SIZE - 1)] = value
+        if self.remapped is not None:
+            self.remapped()
+
+    # copy of the PAGE_SIZE bytes of the chunk
+    def chunk(self, chunk):
+        memory, index = self.chunks[chunk]
+        return memory[index:index + PAGE_SIZE]
+
+
+# 256 byte page of the WRAM (0 - 0x1FF) or None if the address is not in WRAM.
+# The same for all cartrige types: 0x7E:0000 - 0x7F:FFFF and the mirror of
+# the first 8KB at 0x00-0x3F:0000 - 1FFF (and 0x80-0xBF)
+def wram_page(address):
+    bank = (address & 0xFF0000) >> 16
+    offset = address & 0x00FFFF
+    if bank == 0x7E or bank == 0x7F:
+        return ((bank & 0x01) << 8) + (offset >> 8)
+    elif (bank & 0x7F) <= 0x3F and offset <= 0x1FFF:
+        return offset >> 8
+    return None
+
+
+# Wraps the memory of a CPU and remembers the last write to a watched
+# address (see CPU65816.add_watchpoint)
+class WatchedMemory(object):
+    def __init__(self, memory, addresses):
+        self.memory = memory
+        self.addresses = addresses
+        self.hit = None
+
+    def read(self, address):
+        return self.memory.read(address)
+
+    def write(self, address, value):
+        self.memory.write(address, value)
+        if address in self.addresses:
+            self.hit = address
+
+    # writes go through write() to see them
+    def low_wram(self):
+        return None
+
+    def write16(self, address, value, wrapp=False):
+        write16_bytewise(self, address, value, wrapp)
+
+    # block moves go byte by byte to see every write
+    def move(self, source, destination, count, step):
+        return False
+
+    # everything else (header, code_pages, ...) is the one of the wrapped memory
+    def __getattr__(self, name):
+        return getattr(self.memory, name)
+
+
+# 16 and 24 bit accesses byte by byte through read and write, for memories
+# without read16, read24 and write16 (see MemoryMapper.read16)
+def read16_bytewise(memory, address, wrapp=False):
+    second = address + 1
+    if wrapp:
+        second = second & 0xFFFF
+    return memory.read(address) + (memory.read(second) << 8)
+
+
+def read24_bytewise(memory, address, wrapp=False):
+    second = address + 1
+    third = address + 2
+    if wrapp:
+        second = second & 0xFFFF
+        third = third & 0xFFFF
+    return memory.read(address) + (memory.read(second) << 8) + (memory.read(third) << 16)
+
+
+def write16_bytewise(memory, address, value, wrapp=False):
+    second = address + 1
+    if wrapp:
+        second = second & 0xFFFF
+    memory.write(address, value & 0xFF)
+    memory.write(second, (value & 0xFF00) >> 8)
+
+
+# The memory map is a page table: the 16 MB address space is cut into
+# 8KB pages, 8 per bank. A page of read_pages and write_pages is either
+# plain memory, (list, index), so that address is list[index + address], or
+# I/O, (None, function of the address). The table is built once from the
+# regions of the cartrige type (see LoROMMemoryMapper.regions), then every
+# read and write is one shift, one index and one list access.
+PAGE_BITS = 13
+PAGE_SIZE = 1 << PAGE_BITS
+PAGES = 0x1000000 >> PAGE_BITS
+
+# access of a region
+READ = 1
+WRITE = 2
+
+
+def build_page_table(mapper):
+    read_pages = [(None, read_unmapped)] * PAGES
+    write_pages = [(None, write_ROM)] * PAGES
+    for address, access, memory, index, size in region_pages(mapper.regions()):
+        if memory is None:
+            read_page, write_page = (None, mapper.read_io), (None, mapper.write_io)
+        else:
+            read_page, write_page = memory_page(memory, index, address, size)
+        if access & READ:
+            read_pages[address >> PAGE_BITS] = read_page
+        if access & WRITE:
+            write_pages[address >> PAGE_BITS] = write_page
+    return read_pages, write_pages
+
+
+# (address, access, memory, index of the address in memory, size of the
+# mirror) of every page of the regions
+def region_pages(regions):
+    for first_bank, last_bank, first_offset, last_offset, access, memory, start, bank_size, size in regions:
+        for bank in range(first_bank, last_bank + 1):
+            for offset in range(first_offset, last_offset + 1, PAGE_SIZE):
+                index = start + (bank - first_bank) * bank_size + offset - first_offset
+                yield (bank << 16) + offset, access, memory, index, size
+
+
+# the read and the write page of the page at address starting at
+# memory[index], which is repeated every size bytes (a mirror) if size is
+# not None
+def memory_page(memory, index, address, size):
+    if size is not None:
+        index = index % size
+        if index + PAGE_SIZE > size:
+            # the mirror starts again inside the page
+            def read(a):
+                return memory[(index + a - address) % size]
+
+            def write(a, value):
+                memory[(index + a - address) % size] = value
+            return (None, read), (None, write)
+    return (memory, index - address), (memory, index - address)
+
+
+# What a fork changes in the page table (see MemoryMapper.fork), found once
+# from the regions of the writable pages:
+#  - io_pages: (page, access) of the I/O pages
+#  - chunk_sources: (name of the memory, index) of the first byte of every
+#    chunk, chunk_pages: the pages of every chunk (more than one if mirrored)
+#  - copied: (name of the memory, [(page, access, index, address, size of
+#    the mirror)]) of the memories copied on every fork instead, because
+#    their mirror starts again inside a page (SRAM smaller than a page)
+class ForkPlan(object):
+    def __init__(self, mapper):
+        self.io_pages = []
+        self.chunk_sources = []
+        self.chunk_pages = []
+        self.copied = []
+        memories = {}
+        for address, access, memory, index, size in region_pages(mapper.regions()):
+            if not access & WRITE:
+                continue
+            if memory is None:
+                self.io_pages.append((address >> PAGE_BITS, access))
+                continue
+            name = 'RAM' if memory is mapper.RAM else 'SRAM'
+            memories.setdefault(name, []).append((address >> PAGE_BITS, access, index, address, size))
+        for name, pages in sorted(memories.items()):
+            if any(size is not None and index % size + PAGE_SIZE > size
+                   for page, access, index, address, size in pages):
+                self.copied.append((name, pages))
+                continue
+            chunks = {}  # index -> chunk
+            for page, access, index, address, size in pages:
+                if size is not None:
+                    index = index % size
+                if index not in chunks:
+                    chunks[index] = len(self.chunk_sources)
+                    self.chunk_sources.append((name, index))
+                    self.chunk_pages.append([])
+                self.chunk_pages[chunks[index]].append(page)
+
+
+def read_unmapped(address):
+    raise IllegalAddressExcpetion()
+
+
+def write_ROM(address, value):
+    raise CanNotWriteROMException()
 
 
 class LoROMMemoryMapper(object):
-    def __init__(self, RAM, ROM, SRAM, use_MAD1_mapping, SRAM_size):
+    def __init__(self, RAM, ROM, SRAM, use_MAD1_mapping, SRAM_size, ROM_offset=0):
         self.RAM  = RAM # TODO: maybe rename to WRAM
         self.ROM  = ROM
+        self.ROM_offset = ROM_offset  # index of the first ROM byte in ROM
         self.SRAM = SRAM
         self.use_MAD1_mapping = use_MAD1_mapping
         self.SRAM_size = SRAM_size
@@ -49,24 +472,57 @@ class LoROMMemoryMapper(object):
         self.hdm = HDMAController()
         self.internal_cpu_registers = InternalCPURegisters()
         self.ppu = PPU()
-
-    def read(self, bank, offset):
-        if   bank >= 0x00 and bank <= 0x3F:
-            return self.read_system(bank, offset)
-        elif bank >= 0x40 and bank <= 0x6F:
-            return self.read_ROM(bank, offset)
-        elif bank >= 0x70 and bank <= 0x7D:
-            return self.read_SRAM_ROM(bank, offset)
-        elif bank >= 0x7E and bank <= 0x7F:
-            return self.read_RAM(bank, offset)
-        elif bank >= 0x80 and bank <= 0xFF:
-            return self.read_upper_mirror(bank, offset)
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x00:0000 - 3F:FFFF read ROM and system stuff
+        self.dma_started = None  # called with the bytes of a DMA started by MDMAEN (see Scheduler)
+
+    # the same memories, own copies of the registers (see MemoryMapper.fork)
+    def fork(self):
+        child = copy.copy(self)
+        child.dma = copy.deepcopy(self.dma)
+        child.hdm = copy.deepcopy(self.hdm)
+        child.internal_cpu_registers = copy.deepcopy(self.internal_cpu_registers)
+        child.ppu = copy.deepcopy(self.ppu)
+        child.dma_started = None
+        return child
+
+    # The memory map (see build_page_table): (first bank, last bank, first
+    # offset, last offset, access, memory, index of first bank:first offset,
+    # bytes per bank, size of the mirror). Memory None is I/O (read_io,
+    # write_io), 0 bytes per bank means every bank has the same memory.
+    # Reads outside of the regions raise IllegalAddressExcpetion, writes
+    # CanNotWriteROMException.
     # TODO: the doc on the internet is very inconsistent about the memory ranges
-    def read_system(self, bank, offset):
+    def regions(self):
+        regions = []
+        # 0x80:0000 - 0xFD:FFFF mirror 0x00:0000 - 0x7D:FFFF
+        for mirror in (0x00, 0x80):
+            regions += [
+                (mirror + 0x00, mirror + 0x3F, 0x0000, 0x1FFF, READ | WRITE, self.RAM, 0, 0, None),
+                (mirror + 0x00, mirror + 0x3F, 0x2000, 0x7FFF, READ | WRITE, None, 0, 0, None),
+                (mirror + 0x00, mirror + 0x3F, 0x8000, 0xFFFF, READ, self.ROM, self.ROM_offset, 0x8000, None),
+                # only 32 KB in 64KB, the other half is "maybe" mirrored
+                (mirror + 0x40, mirror + 0x6F, 0x8000, 0xFFFF, READ, self.ROM, self.ROM_offset + 0x28000, 0x10000, None),
+                # SRAM inside the cartirge, if it is smaller than 32Kbyte it is
+                # repeated on and on (SRAM mirror)
+                (mirror + 0x70, mirror + 0x7D, 0x0000, 0x7FFF, READ | WRITE, self.SRAM, 0, 0, self.SRAM_size),
+                # ROM from 38:XXXX in 32KB chunks
+                (mirror + 0x70, mirror + 0x7D, 0x8000, 0xFFFF, READ, self.ROM, self.ROM_offset + 0x380000, 0x8000, None),
+            ]
+            if not self.use_MAD1_mapping:
+                regions.append((mirror + 0x40, mirror + 0x6F, 0x0000, 0x7FFF, READ, self.ROM,
+                                self.ROM_offset + 0x20000, 0x10000, None))
+        regions += [
+            # the RAM inside the SNES: 8KB LowRAM, 24KB HighRAM, 96KB ExRAM
+            (0x7E, 0x7E, 0x0000, 0xFFFF, READ | WRITE, self.RAM, 0, 0, None),
+            (0x7F, 0x7F, 0x0000, 0xFFFF, READ | WRITE, self.RAM, 0x10000, 0, None),
+            # more SRAM and ROM instead of the RAM mirror
+            (0xFE, 0xFF, 0x0000, 0x7FFF, READ | WRITE, self.SRAM, 0, 0, self.SRAM_size),
+            (0xFE, 0xFF, 0x8000, 0xFFFF, READ, self.ROM, self.ROM_offset + 0x3F0000, 0x8000, None),
+        ]
+        return regions
+
+    # 0x00:2000 - 3F:7FFF system stuff (and the mirror at 0x80)
+    def read_io(self, address):
+        offset = address & 0x00FFFF
         if offset <= 0x41FF:
             if offset >= 0x2000 and offset <= 0x2FFF:
                 print(f'** Likely referencing PPU or APU--ignore read {hex(offset)}')
@@ -75,9 +531,7 @@ class LoROMMemoryMapper(object):
             elif offset >= 0x4000 and offset <= 0x41FF:
                 print(f'** Likely referencing user inputs--ignore read {hex(offset)}')
             return self.RAM[offset]
-            '''if offset <= 0x1FFF:
-                return self.RAM[offset]
-            elif offset>= 0x2000 and offset <= 0x2FFF: # maybe 21FF is correct
+            '''if offset>= 0x2000 and offset <= 0x2FFF: # maybe 21FF is correct
                 # TODO: PPU, APU, Hardware Registers
                 # 0x2100 - 0x213F PPU (or PPU2 ?)
                 # 0x2180 - 0x2183 (insde RAM?)
@@ -95,111 +549,20 @@ class LoROMMemoryMapper(object):
             # 0x4200 - 0x420D CPU
             # 0x4100 - 0x421F CPU
             # 0x4300 - 0x437F CPU
-            if offset == 0x4200:
+            if offset <= 0x421F:
                 return self.internal_cpu_registers.read(offset)
             elif offset >= 0x4300 and offset <= 0x43FF:
                 return self.dma.read(offset)
             print("Error read Address: " + hex(offset))
             return 0
-        elif offset >= 0x6000 and offset <= 0x7FFF:
+        else:
             # TODO: enhancement chip memory
             raise NotImplementedError()
-        elif offset >= 0x8000:
-            # read ROM
-            ROM_bank = (bank) * 0x8000
-            return self.ROM[ROM_bank + (offset-0x8000)]
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x40:0000 - 6F:FFFF read ROM (only 32 KB in 64KB, the other half is "maybe" mirrored)
-    def read_ROM(self, bank, offset):
-        if offset <= 0x7FFF and not self.use_MAD1_mapping:
-            # read ROM
-            ROM_bank = 0x20000 + (bank-0x40) * 0x10000
-            return self.ROM[ROM_bank + offset]
-        elif offset >= 0x8000:
-            # read ROM
-            ROM_bank = 0x20000 + (bank-0x40) * 0x10000
-            return self.ROM[ROM_bank + offset]
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x70:0000 - 7D:FFFF reads the SRAM inside the cartirge or the ROM
-    def read_SRAM_ROM(self, bank, offset):
-        if offset >= 0x0000 and offset <= 0x7FFF:
-            # read SRAM
-            # if the SRAM is smaller than 32Kbyte it is repeated on and on (SRAM mirror)
-            return self.SRAM[offset % self.SRAM_size]
-        elif offset >= 0x8000 and offset <= 0xFFFF:
-            # read ROM from 38:XXXX in 32KB chunks
-            ROM_bank = 0x380000 + (bank-0x70)*0x8000
-            return self.ROM[ROM_bank + (offset-0x8000)]
-        else:
-            raise IllegalAddressExcpetion()
 
-    # 0x7E:0000 - 0x7F:FFFF read the RAM inside the SNES
-    def read_RAM(self, bank, offset):
-        # 8KB LowRAM, 24KB HighRAM, 96KB ExRAM
-        if bank == 0x7E:
-            return self.RAM[offset]
-        elif bank == 0x7F:
-            return self.RAM[0x8000 + offset]
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x80:0000 - 0xFF:FFFF mirror (same as self.read except RAM)
-    def read_upper_mirror(self, bank, offset):
-        if   bank >= (0x00+0x80) and bank <= (0x3F+0x80):
-            return self.read_system(bank-0x80, offset)
-        elif bank >= (0x40+0x80) and bank <= (0x6F+0x80):
-            return self.read_ROM(bank-0x80, offset)
-        elif bank >= (0x70+0x80) and bank <= (0x7D+0x80):
-            return self.read_SRAM_ROM(bank-0x80, offset)
-        elif bank >= (0x7E+0x80) and bank <= (0x7F+0x80):
-            return self.read_more_SRAM_ROM(bank, offset) # different to self.read
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0xFE:0000 - 0xFF:FFFF read more SRAM and ROM
-    def read_more_SRAM_ROM(self, bank, offset):
-        if bank == 0xFE:
-            if offset >= 0x0000 and offset <= 0x7FFF:
-                return self.SRAM[offset]
-            elif offset >= 0x8000 and offset <= 0xFFFF:
-                return self.ROM[0x3E8000 + offset]
-            else:
-                raise IllegalAddressExcpetion()
-        elif bank == 0xFF:
-            if offset >= 0x0000 and offset <= 0x7FFF:
-                return self.SRAM[offset]
-            elif offset >= 0x8000 and offset <= 0xFFFF:
-                return self.ROM[0x3F0000 + offset]
-            else:
-                raise IllegalAddressExcpetion()
-        else:
-            raise IllegalAddressExcpetion()
-
-    def write(self, bank, offset, value):
-        if   bank >= 0x00 and bank <= 0x3F:
-            self.write_system(bank, offset, value)
-        elif bank >= 0x40 and bank <= 0x6F:
-            raise CanNotWriteROMException()
-        elif bank >= 0x70 and bank <= 0x7D:
-            self.write_SRAM_ROM(bank, offset, value)
-        elif bank >= 0x7E and bank <= 0x7F:
-            self.write_RAM(bank, offset, value)
-        elif bank >= 0x80 and bank <= 0xFF:
-            self.write_upper_mirror(bank, offset, value)
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x00:0000 - 3F:FFFF write system stuff
-    # TODO: the doc on the internet is very inconsistent about the memory ranges
-    # TODO: do we need the bak arg?
-    def write_system(self, bank, offset, value):
-        if offset <= 0x1FFF:
-            self.RAM[offset] = value
-        elif offset>= 0x2000 and offset <= 0x2FFF: # maybe 21FF is correct
+    # 0x00:2000 - 3F:7FFF system stuff (and the mirror at 0x80)
+    def write_io(self, address, value):
+        offset = address & 0x00FFFF
+        if offset>= 0x2000 and offset <= 0x2FFF: # maybe 21FF is correct
             # TODO: PPU, APU, Hardware Registers
             # 0x2100 - 0x213F PPU (or PPU2 ?)
             # 0x2180 - 0x2183 (insde RAM?)
@@ -216,317 +579,67 @@ class LoROMMemoryMapper(object):
             # TODO: DMA, PPU2, Hardware Registers
             # 0x4200 - 0x420D CPU
             # 0x4100 - 0x421F CPU
-            if offset == 0x4200:
+            if offset <= 0x421F:
                 self.internal_cpu_registers.write(offset, value)
+                if offset == 0x420B and value and self.dma_started is not None:
+                    self.dma_started(self.dma.transfer_size(value))
                 return
             elif offset >= 0x4300 and offset <= 0x43FF:
                 self.dma.write(offset, value)
                 return
             # 0x4300 - 0x437F CPU
             print("Error write Address: " + hex(offset)+ str(value))
-        elif offset >= 0x6000 and offset <= 0x7FFF:
+        else:
             # TODO: enhancement chip memory
             raise NotImplementedError()
-        elif offset >= 0x8000:
-            # write ROM
-            raise CanNotWriteROMException()
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x70:0000 - 7D:FFFF writes the SRAM inside the cartirge or the ROM
-    def write_SRAM_ROM(self, bank, offset, value):
-        if offset >= 0x0000 and offset <= 0x7FFF:
-            # write SRAM
-            # if the SRAM is smaller than 32Kbyte it is repeated on and on (SRAM mirror)
-            self.SRAM[offset % self.SRAM_size] = value
-        elif offset >= 0x8000 and offset <= 0xFFFF:
-            # write ROM
-            raise CanNotWriteROMException()
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x7E:0000 - 0x7F:FFFF writes the RAM inside the SNES
-    def write_RAM(self, bank, offset, value):
-        # 8KB LowRAM, 24KB HighRAM, 96KB ExRAM
-        if bank == 0x7E:
-            self.RAM[offset] = value
-        elif bank == 0x7F:
-            self.RAM[0x8000 + offset] = value
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x80:0000 - 0xFF:FFFF mirror (same as self.write except RAM)
-    def write_upper_mirror(self, bank, offset, value):
-        if   bank >= (0x00+0x80) and bank <= (0x3F+0x80):
-            self.write_system(bank-0x80, offset, value)
-        elif bank >= (0x40+0x80) and bank <= (0x6F+0x80):
-            # write ROM
-            raise CanNotWriteROMException()
-        elif bank >= (0x70+0x80) and bank <= (0x7D+0x80):
-            self.write_SRAM_ROM(bank-0x80, offset, value)
-        elif bank >= (0x7E+0x80) and bank <= (0x7F+0x80):
-            self.write_more_SRAM_ROM(bank, offset, value) # different to self.write
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0xFE:0000 - 0xFF:FFFF read more SRAM and ROM
-    def write_more_SRAM_ROM(self, bank, offset, value):
-        if bank == 0xFE:
-            if offset >= 0x0000 and offset <= 0x7FFF:
-                self.SRAM[offset] = value
-            elif offset >= 0x8000 and offset <= 0xFFFF:
-                # write ROM
-                raise CanNotWriteROMException()
-            else:
-                raise IllegalAddressExcpetion()
-        elif bank == 0xFF:
-            if offset >= 0x0000 and offset <= 0x7FFF:
-                self.SRAM[offset] = value
-            elif offset >= 0x8000 and offset <= 0xFFFF:
-                # write ROM
-                raise CanNotWriteROMException()
-            else:
-                raise IllegalAddressExcpetion()
-        else:
-            raise IllegalAddressExcpetion()
+
 
 class HiROMMemoryMapper(object):
-    def __init__(self, RAM, ROM, SRAM, use_MAD1_mapping, SRAM_size):
+    def __init__(self, RAM, ROM, SRAM, use_MAD1_mapping, SRAM_size, ROM_offset=0):
         self.RAM  = RAM # WRAM
         self.ROM  = ROM
+        self.ROM_offset = ROM_offset  # index of the first ROM byte in ROM
         self.SRAM = SRAM
         self.use_MAD1_mapping = use_MAD1_mapping
         self.SRAM_size = SRAM_size
 
-    def read(self, bank, offset):
-        if   bank >= 0x00 and bank <= 0x1F:
-            return self.read_system(bank, offset)
-        elif bank >= 0x20 and bank <= 0x3F:
-            return self.read_system2(bank, offset)
-        elif bank >= 0x40 and bank <= 0x7D:
-            return self.read_ROM(bank, offset)
-        elif bank >= 0x7E and bank <= 0x7F:
-            return self.read_RAM(bank, offset)
-        elif bank >= 0x80 and bank <= 0xFF:
-            return self.read_upper_mirror(bank, offset)
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x00:0000 - 1F:FFFF read ROM and system stuff
-    # TODO: the doc on the internet is very inconsistent about the memory ranges
-    def read_system(self, bank, offset):
-        if offset <= 0x1FFF:
-            return self.RAM[offset]
-        elif offset>= 0x2000 and offset <= 0x2FFF: # maybe 21FF is correct
-            # TODO: PPU, APU, Hardware Registers
-            # 0x2100 - 0x213F PPU (or PPU2 ?)
-            # 0x2180 - 0x2183 (inside RAM?)
-            raise NotImplementedError()
-        elif offset >= 0x3000 and offset <= 0x3FFF:
-            # TODO: Super-FX, DSP
-            raise NotImplementedError()
-        elif offset >= 0x4000 and offset <= 0x41FF: # maybe 40FF is correct
-            # TODO: Joypad Registers / Controller
-            # 0x4016 - 0x4017 CPU
-            raise NotImplementedError()
-        elif offset >= 0x4200 and offset <= 0x5FFF: # maybe 44FF is correct
-            # TODO: DMA, PPU2, Hardware Registers
-            # 0x4200 - 0x420D CPU
-            # 0x4100 - 0x421F CPU
-            # 0x4300 - 0x437F CPU
-            raise NotImplementedError()
-        elif offset >= 0x6000 and offset <= 0x7FFF:
-            # TODO: enhancement chip memory
-            raise NotImplementedError()
-        elif offset >= 0x8000:
-            # read ROM
-            ROM_bank = (bank) * 0x10000
-            return self.ROM[ROM_bank + offset]
-        else:
-            raise IllegalAddressExcpetion()
-
-
-    # 0x20:0000 - 3F:FFFF read ROM, SRAM and system stuff
-    # TODO: the doc on the internet is very inconsistent about the memory ranges
-    def read_system2(self, bank, offset):
-        if offset <= 0x1FFF:
-            return self.RAM[offset]
-        elif offset>= 0x2000 and offset <= 0x2FFF: # maybe 21FF is correct
-            # TODO: PPU, APU, Hardware Registers
-            # 0x2100 - 0x213F PPU (or PPU2 ?)
-            # 0x2180 - 0x2183 (insde RAM?)
-            raise NotImplementedError()
-        elif offset >= 0x3000 and offset <= 0x3FFF:
-            # TODO: Super-FX, DSP
-            raise NotImplementedError()
-        elif offset >= 0x4000 and offset <= 0x41FF: # maybe 40FF is correct
-            # TODO: Joypad Registers / Controller
-            # 0x4016 - 0x4017 CPU
-            raise NotImplementedError()
-        elif offset >= 0x4200 and offset <= 0x5FFF: # maybe 44FF is correct
-            # TODO: DMA, PPU2, Hardware Registers
-            # 0x4200 - 0x420D CPU
-            # 0x4100 - 0x421F CPU
-            # 0x4300 - 0x437F CPU
-            raise NotImplementedError()
-        elif offset >= 0x6000 and offset <= 0x7FFF:
-            # write SRAM
-            SRAM_page = (bank-0x20)*0x1FFF
-            # if the SRAM is smaller than 32Kbyte it is repeated on and on (SRAM mirror)
-            return self.SRAM[SRAM_page % self.SRAM_size]
-        elif offset >= 0x8000:
-            # read ROM
-            ROM_bank = (bank) * 0x10000
-            return self.ROM[ROM_bank + offset]
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x40:0000 - 7D:FFFF read ROM
-    def read_ROM(self, bank, offset):
-        if offset >= 0x0000  and offset <= 0xFFFF:
-            # read ROM
-            ROM_bank = (bank-0x40) * 0x10000
-            return self.ROM[ROM_bank + offset]
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x7E:0000 - 0x7F:FFFF read the RAM inside the SNES
-    def read_RAM(self, bank, offset):
-        # 8KB LowRAM, 24KB HighRAM, 96KB ExRAM
-        if bank == 0x7E:
-            return self.RAM[offset]
-        elif bank == 0x7F:
-            return self.RAM[0x8000 + offset]
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x80:0000 - 0xFF:FFFF mirror (same as self.read except RAM)
-    def read_upper_mirror(self, bank, offset):
-        if   bank >= (0x00+0x80) and bank <= (0x1F+0x80):
-            return self.read_system(bank-0x80, offset)
-        elif bank >= (0x20+0x80) and bank <= (0x3F+0x80):
-            return self.read_system2(bank-0x80, offset)
-        elif bank >= (0x40+0x80) and bank <= (0x7D+0x80):
-            return self.read_ROM(bank-0x80, offset)
-        elif bank >= (0x7E+0x80) and bank <= (0x7F+0x80):
-            return self.read_more_ROM(bank, offset) # different to self.read
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0xFE:0000 - 0xFF:FFFF read more ROM
-    def read_more_ROM(self, bank, offset):
-        if bank == 0xFE:
-            return self.ROM[0x3E0000 + offset]
-        elif bank == 0xFF:
-            return self.ROM[0x3F0000 + offset]
-        else:
-            raise IllegalAddressExcpetion()
-
-    def write(self, bank, offset, value):
-        if bank >= 0x00 and bank <= 0x1F:
-            self.write_system(bank, offset, value)
-        elif bank >= 0x20 and bank <= 0x3F:
-            self.write_system2(bank, offset, value)
-        elif bank >= 0x40 and bank <= 0x7D:
-            raise CanNotWriteROMException()
-        elif bank >= 0x7E and bank <= 0x7F:
-            self.write_RAM(bank, offset, value)
-        elif bank >= 0x80 and bank <= 0xFF:
-            self.write_upper_mirror(bank, offset, value)
-        else:
-            raise IllegalAddressExcpetion()
-
-
-    # 0x00:0000 - 1F:FFFF write system stuff
-    # TODO: the doc on the internet is very inconsistent about the memory ranges
-    def write_system(self, bank, offset, value):
-        if offset <= 0x1FFF:
-            self.RAM[offset] = value
-        elif offset >= 0x2000 and offset <= 0x2FFF:  # maybe 21FF is correct
-            # TODO: PPU, APU, Hardware Registers
-            # 0x2100 - 0x213F PPU (or PPU2 ?)
-            # 0x2180 - 0x2183 (insde RAM?)
-            raise NotImplementedError()
-        elif offset >= 0x3000 and offset <= 0x3FFF:
-            # TODO: Super-FX, DSP
-            raise NotImplementedError()
-        elif offset >= 0x4000 and offset <= 0x41FF:  # maybe 40FF is correct
-            # TODO: Joypad Registers / Controller
-            # 0x4016 - 0x4017 CPU
-            raise NotImplementedError()
-        elif offset >= 0x4200 and offset <= 0x5FFF:  # maybe 44FF is correct
-            # TODO: DMA, PPU2, Hardware Registers
-            # 0x4200 - 0x420D CPU
-            # 0x4100 - 0x421F CPU
-            # 0x4300 - 0x437F CPU
-            raise NotImplementedError()
-        elif offset >= 0x6000 and offset <= 0x7FFF:
-            # TODO: enhancement chip memory
-            raise NotImplementedError()
-        elif offset >= 0x8000:
-            # write ROM
-            raise CanNotWriteROMException()
-        else:
-            raise IllegalAddressExcpetion()
-
-
-    # 0x20:0000 - 3F:FFFF write SRAM and system stuff
-    # TODO: the doc on the internet is very inconsistent about the memory ranges
-    def write_system2(self, bank, offset, value):
-        if offset <= 0x1FFF:
-            self.RAM[offset] = value
-        elif offset >= 0x2000 and offset <= 0x2FFF:  # maybe 21FF is correct
-            # TODO: PPU, APU, Hardware Registers
-            # 0x2100 - 0x213F PPU (or PPU2 ?)
-            # 0x2180 - 0x2183 (insde RAM?)
-            raise NotImplementedError()
-        elif offset >= 0x3000 and offset <= 0x3FFF:
-            # TODO: Super-FX, DSP
-            raise NotImplementedError()
-        elif offset >= 0x4000 and offset <= 0x41FF:  # maybe 40FF is correct
-            # TODO: Joypad Registers / Controller
-            # 0x4016 - 0x4017 CPU
-            raise NotImplementedError()
-        elif offset >= 0x4200 and offset <= 0x5FFF:  # maybe 44FF is correct
-            # TODO: DMA, PPU2, Hardware Registers
-            # 0x4200 - 0x420D CPU
-            # 0x4100 - 0x421F CPU
-            # 0x4300 - 0x437F CPU
-            raise NotImplementedError()
-        elif offset >= 0x6000 and offset <= 0x7FFF:
-            # write SRAM
-            SRAM_page = (bank - 0x20) * 0x1FFF
-            # if the SRAM is smaller than 32Kbyte it is repeated on and on (SRAM mirror)
-            self.SRAM[SRAM_page % self.SRAM_size] = value
-        elif offset >= 0x8000:
-            # write ROM
-            raise CanNotWriteROMException()
-        else:
-            raise IllegalAddressExcpetion()
-
-    # 0x7E:0000 - 0x7F:FFFF write the RAM inside the SNES
-    def write_RAM(self, bank, offset, value):
-        # 8KB LowRAM, 24KB HighRAM, 96KB ExRAM
-        if bank == 0x7E:
-            self.RAM[offset] = value
-        elif bank == 0x7F:
-            self.RAM[0x8000 + offset] = value
-        else:
-            raise IllegalAddressExcpetion()
-
-
-    # 0x80:0000 - 0xFF:FFFF mirror (same as self.write except RAM)
-    def write_upper_mirror(self, bank, offset, value):
-        if bank >= (0x00 + 0x80) and bank <= (0x1F + 0x80):
-            self.write_system(bank - 0x80, offset, value)
-        elif bank >= (0x20 + 0x80) and bank <= (0x3F + 0x80):
-            self.write_system2(bank - 0x80, offset, value)
-        elif bank >= (0x40 + 0x80) and bank <= (0x7D + 0x80):
-            raise CanNotWriteROMException()
-        elif bank >= (0x7E + 0x80) and bank <= (0x7F + 0x80):
-            raise CanNotWriteROMException() # different to self.write
-        else:
-            raise IllegalAddressExcpetion()
+    # no registers yet, see LoROMMemoryMapper.fork
+    def fork(self):
+        return copy.copy(self)
+
+    # see LoROMMemoryMapper.regions
+    def regions(self):
+        regions = []
+        # 0x80:0000 - 0xFD:FFFF mirror 0x00:0000 - 0x7D:FFFF
+        for mirror in (0x00, 0x80):
+            regions += [
+                (mirror + 0x00, mirror + 0x3F, 0x0000, 0x1FFF, READ | WRITE, self.RAM, 0, 0, None),
+                (mirror + 0x00, mirror + 0x3F, 0x2000, 0x5FFF, READ | WRITE, None, 0, 0, None),
+                (mirror + 0x00, mirror + 0x1F, 0x6000, 0x7FFF, READ | WRITE, None, 0, 0, None),
+                # SRAM, 8KB per bank, if it is smaller it is repeated on and on (SRAM mirror)
+                (mirror + 0x20, mirror + 0x3F, 0x6000, 0x7FFF, READ | WRITE, self.SRAM, 0, 0x2000, self.SRAM_size),
+                (mirror + 0x00, mirror + 0x3F, 0x8000, 0xFFFF, READ, self.ROM, self.ROM_offset + 0x8000, 0x10000, None),
+                (mirror + 0x40, mirror + 0x7D, 0x0000, 0xFFFF, READ, self.ROM, self.ROM_offset, 0x10000, None),
+            ]
+        regions += [
+            # the RAM inside the SNES: 8KB LowRAM, 24KB HighRAM, 96KB ExRAM
+            (0x7E, 0x7E, 0x0000, 0xFFFF, READ | WRITE, self.RAM, 0, 0, None),
+            (0x7F, 0x7F, 0x0000, 0xFFFF, READ | WRITE, self.RAM, 0x10000, 0, None),
+            # more ROM instead of the RAM mirror
+            (0xFE, 0xFF, 0x0000, 0xFFFF, READ, self.ROM, self.ROM_offset + 0x3E0000, 0x10000, None),
+        ]
+        return regions
+
+    # 0x00:2000 - 3F:7FFF system stuff (and the mirror at 0x80)
+    # TODO: PPU, APU, Hardware Registers (0x2000 - 0x2FFF), Super-FX, DSP
+    # (0x3000 - 0x3FFF), Joypad Registers / Controller (0x4000 - 0x41FF),
+    # DMA, PPU2, Hardware Registers (0x4200 - 0x5FFF), enhancement chip
+    # memory (0x6000 - 0x7FFF in 0x00 - 0x1F)
+    def read_io(self, address):
+        raise NotImplementedError()
+
+    def write_io(self, address, value):
+        raise NotImplementedError()
 
 
 class SA1ROMMemoryMapper(object):
@@ -217,6 +217,10 @@ opcode_map = {
     0x1D: ('ORA', Mode.ABSOLUTE_INDEXED_WITH_X,     0b10000010, 3, 4, 'OR Accumulator With Memory'),  # ORA addr, X
     0x1F: ('ORA', Mode.ABSOLUTE_INDEXED_LONG_X,     0b10000010, 4, 5, 'OR Accumulator With Memory'),  # ORA long, X
 
+    0xF4: ('PEA', Mode.ABSOLUTE,                    0b00000000, 3, 5, 'Push Effective Absolute Address'), # PEA addr
+    0xD4: ('PEI', Mode.DIRECT_INDIRECT,             0b00000000, 2, 6, 'Push Effective Indirect Address'), # PEI (dp)
+    0x62: ('PER', Mode.RELATIVE_LONG,               0b00000000, 3, 6, 'Push Effective PC Relative Indirect Address'), # PER label
+
     0x48: ('PHA', Mode.IMPLIED,                     0b00000000, 1, 3, 'Push Accumulator'), # PHA
     0x8B: ('PHB', Mode.IMPLIED,                     0b00000000, 1, 3, 'Push Data Bank Register'), # PHB
     0x0B: ('PHD', Mode.IMPLIED,                     0b00000000, 1, 4, 'Push Direct Page Register'), # PHD
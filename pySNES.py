@@ -1,36 +1,43 @@
 from cartrige import ROMHeader
-from helper import open_as_byte_array
+from helper import map_rom
 from disassembler import Disassembler
 from cpu import CPU65816
 from graphics import PictureProcessingUnit
 from memory import MemoryMapper
+from scheduler import Scheduler
+import timing
 import sys
 
 if len(sys.argv) <= 1:
-    print("usage: python PySNES.py ROM_PATH [start] [end]")
+    print("usage: python PySNES.py ROM_PATH [--trace]")
     exit(0)
 
-ROM = open_as_byte_array(sys.argv[1])
+ROM, ROM_offset = map_rom(sys.argv[1])
 #print_hex_dump(ba)[0:32]
 header = ROMHeader(ROM)
 header.dump()
 d = Disassembler()
-RAM  = [0] * (2 ** 17 - 1)  # 128 KB
-SRAM = [0] * 0x7FFF         # 32 KB
-
-memory = MemoryMapper(header, RAM, ROM, SRAM, False, 0x7FFF)
+memory = MemoryMapper(header, None, ROM, None, False, 0x8000, ROM_offset)  # 128 KB WRAM, 32 KB SRAM
 c = CPU65816(memory)
+c.resolve_vectors()  # the interrupt vectors of the cartridge
 ppu = PictureProcessingUnit()
 ppu.init()
+FRAMES = 60  # one second
+scheduler = Scheduler(c, getattr(memory.mapper, 'internal_cpu_registers', None))
+if '--trace' not in sys.argv:
+    scheduler.run_frames(FRAMES)
+    print("A={0:6} X={1:6} Y={2:6} DP={3:6} SP={4:6} P={5:6} PBR={6:4} PC={7:6} cycles={8}".format(
+        hex(c.A), hex(c.X), hex(c.Y), hex(c.DP), hex(c.SP), hex(c.P), hex(c.PBR), hex(c.PC), c.cycles))
+    exit(0)
+c.trace_stack(8)
 while True:
     instr_str = d.disassemble_single_opcode(memory, c.PC, add_new_line=False,
                                   add_descr=False, add_addr=False, M=c.isM(), X=c.isX())
     debug = "{0:<16} A={1:6} X={2:6} Y={3:6} DP={4:6} SP={5:6} P={6:6} PC={7:6} e={8:6} Stack:{9}"
     debug = debug.format(instr_str, hex(c.A), hex(c.X), hex(c.Y), hex(c.DP),
-                               hex(c.SP), hex(c.P), hex(c.PC), hex(c.e), c.stack)
+                               hex(c.SP), hex(c.P), hex(c.PC), hex(c.e), list(c.stack))
     print(debug)
-    # FIXME:
-    if c.cycles > 100000:
+    if c.cycles > FRAMES * timing.CYCLES_PER_FRAME:
         break
     c.fetch_decode_execute()
 
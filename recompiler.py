@@ -0,0 +1,786 @@
+import ast
+import builtins
+import inspect
+import operator
+import sys
+import types
+
+from specializer import NEXT_INSTRUCTION, is_self_attribute, method_sources, parse_method, self_method_name
+
+
+# Dynamic recompiler
+#
+# A block of the block cache (see block_cache.py) that was executed often
+# enough is translated to the source code of one Python function:
+#
+#  - the bodies of the handlers (specialized for the mode, see
+#    specializer.py) are copied one after the other with the operand
+#    and PC of the instruction filled in as constants
+#  - calls of small helpers (read_memory, compute_NZflags, isC, setN,
+#    compute_addr.dp, ...) are replaced by their bodies
+#  - expressions with constant operands are computed and branches with a
+#    constant condition are removed
+#  - the registers live in local variables and are written back to the CPU
+#    at the end of the block and before calls that could read them
+#
+# The semantics stay the ones of cpu.py, the recompiler only moves the code.
+
+# registers kept in local variables while the block runs
+REGISTERS = ('A', 'X', 'Y', 'SP', 'DP', 'DBR', 'nz', 'flag_c', 'flag_v', 'flag_d', 'flag_i', 'flag_m', 'flag_x',
+             'cycles', 'memory')
+
+# attributes of the CPU that are plain values (P and e are properties)
+PLAIN_ATTRIBUTES = REGISTERS + ('PC', 'PBR', 'stack', 'emulation', 'mode', 'handlers', 'block_cache',
+                                 'waiting', 'stopped', 'low_wram')
+
+MAX_INLINE_DEPTH = 5
+
+# statements the recompiler does not know how to move around
+UNSUPPORTED = (ast.For, ast.While, ast.Try, ast.With, ast.FunctionDef, ast.ClassDef, ast.Lambda,
+               ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal, ast.Yield, ast.Delete)
+
+BINARY_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+                    ast.LShift: operator.lshift, ast.RShift: operator.rshift,
+                    ast.BitAnd: operator.and_, ast.BitOr: operator.or_, ast.BitXor: operator.xor,
+                    ast.Mod: operator.mod, ast.FloorDiv: operator.floordiv}
+UNARY_OPERATORS = {ast.Not: operator.not_, ast.Invert: operator.invert, ast.USub: operator.neg,
+                   ast.UAdd: operator.pos}
+COMPARE_OPERATORS = {ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt,
+                     ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge}
+
+
+class NotRecompilable(Exception):
+    pass
+
+
+# a single function can not be inlined, the call stays
+class NotInlinable(Exception):
+    pass
+
+
+class Recompiler(object):
+    def __init__(self, cpu_class):
+        module = sys.modules[cpu_class.__module__]
+        self.sources = method_sources(module, inspect.getsource(module), cpu_class.__name__)
+        self.cpu_globals = vars(module)
+        self.properties = set(name for name, value in vars(cpu_class).items()
+                              if isinstance(value, property))
+        self.trees = {}
+        self.templates = {}  # handler -> body with the helpers inlined
+        self.namespace = {}  # globals of the recompiled blocks
+        self.instances = 0  # every inlined function gets its own local names
+
+    # returns the function running the block, raises NotRecompilable
+    def compile_block(self, block):
+        body = []
+        last = len(block.instructions) - 1
+        for i, (handler, operand, pc) in enumerate(block.instructions):
+            body.extend(self.instruction(handler, operand, pc, i == last))
+        body = localize_registers(body)
+        body = propagate_constants(body, {})
+        body = merge_cycles(body)
+        body = remove_dead_stores(body)
+        name = 'block_%02X_%04X' % (block.address >> 16, block.address & 0xFFFF)
+        filename = '<block %02X:%04X>' % (block.address >> 16, block.address & 0xFFFF)
+        return self.compile_function(name, ['self'], body, filename)
+
+    # Returns a superinstruction: one function running the handlers one after
+    # the other. It is called like a handler, with PC on the last byte of the
+    # first instruction and the tuple of the operands as operand (see
+    # BlockCache.fuse). Raises NotRecompilable.
+    def compile_sequence(self, handlers):
+        # the locals of the templates are renamed to <name>_<number>, no handler has a local 'fused'
+        operands = ['fused_%d' % i for i in range(len(handlers))]
+        body = [ast.parse('%s = operand' % ', '.join(operands)).body[0]]
+        for i, handler in enumerate(handlers):
+            operand_name, template = self.template(handler)
+            statements = substitute(copy_tree(template), {operand_name: ast.Name(id=operands[i], ctx=ast.Load())})
+            if i < len(handlers) - 1:
+                # PC on the last byte of the next instruction instead of its first
+                if not statements or ast.dump(statements[-1], annotate_fields=False) != NEXT_INSTRUCTION:
+                    raise NotRecompilable()
+                next_pc = 'self.PC = (self.PC + %d) & 0xFFFF' % (1 + handlers[i + 1].operand_size)
+                statements[-1] = ast.parse(next_pc).body[0]
+            body.extend(statements)
+        body = localize_registers(body)
+        body = merge_cycles(body)
+        body = remove_dead_stores(body)
+        name = '_'.join(['fused'] + [handler.__name__ for handler in handlers])
+        return self.compile_function(name, ['self', 'operand'], body, '<' + name + '>')
+
+    def compile_function(self, name, params, body, filename):
+        arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg=param) for param in params],
+                                  kwonlyargs=[], kw_defaults=[], defaults=[])
+        function = ast.FunctionDef(name=name, args=arguments, body=body or [ast.Pass()], decorator_list=[],
+                                   returns=None)
+        module = ast.fix_missing_locations(ast.Module(body=[function], type_ignores=[]))
+        source = ast.unparse(module)
+        functions = {}
+        exec(compile(source, filename, 'exec'), self.namespace, functions)
+        compiled = functions[name]
+        compiled.source = source
+        return compiled
+
+    def instruction(self, handler, operand, pc, is_last):
+        operand_name, template = self.template(handler)
+        body = substitute(copy_tree(template), {operand_name: ast.Constant(operand)})
+        body = fold_pc(body, pc)
+        body = [ConstantFolder().visit(statement) for statement in body]
+        body = flatten_constant_ifs(body)
+        if not is_last:
+            # the next instruction has its PC as constant
+            if not body or not (is_pc_store(body[-1]) and isinstance(body[-1].value, ast.Constant)):
+                raise NotRecompilable()
+            body = body[:-1]
+        if any(is_unsafe(statement) for statement in body):
+            body.insert(0, pc_store(pc))
+        return body
+
+    # (name of the operand, body of the handler with the helpers inlined).
+    # The locals of a template are the same in every block, that is fine:
+    # a handler always writes a local before it reads it.
+    def template(self, handler):
+        if handler not in self.templates:
+            if not hasattr(handler, 'tree'):
+                raise NotRecompilable()  # e.g. unknown_opcode
+            try:
+                params, defaults, body = self.prepare(self.function_tree(handler), handler.__globals__)
+            except NotInlinable:
+                raise NotRecompilable()
+            self.templates[handler] = params[0], self.inline(body, 0)
+        return self.templates[handler]
+
+    def method_tree(self, name):
+        if name not in self.trees:
+            self.trees[name] = parse_method(self.sources, name)
+        return copy_tree(self.trees[name])
+
+    # tree of a function compiled by the specializer or a plain module function
+    def function_tree(self, function):
+        tree = getattr(function, 'tree', None)
+        if tree is None:
+            if function not in self.trees:
+                try:
+                    source = inspect.getsource(function)
+                except (OSError, TypeError):
+                    raise NotInlinable()
+                self.trees[function] = ast.parse(source).body[0]
+            tree = self.trees[function]
+        return copy_tree(tree)
+
+    # copies a function body with fresh local names, returns
+    # (parameter names without self, defaults, body)
+    def prepare(self, tree, globals_):
+        for node in ast.walk(tree):
+            if isinstance(node, UNSUPPORTED) and node is not tree:
+                raise NotInlinable()
+        if tree.args.vararg or tree.args.kwarg or tree.args.kwonlyargs:
+            raise NotInlinable()
+        self.instances += 1
+        params = [arg.arg for arg in tree.args.args]
+        local_names = set(params)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+                local_names.add(node.id)
+        local_names.discard('self')
+        names = {}
+        for name in local_names:
+            names[name] = '%s_%d' % (name, self.instances)
+        body = [Renamer(self, names, globals_).visit(statement) for statement in tree.body]
+        params = [names.get(param, param) for param in params if param != 'self']
+        return params, tree.args.defaults, body
+
+    # name of a global of the inlined code in the namespace of the block
+    def alias(self, globals_, name):
+        if name in globals_:
+            value = globals_[name]
+        elif hasattr(builtins, name):
+            value = getattr(builtins, name)
+        else:
+            raise NotInlinable()
+        alias = name
+        n = 0
+        while alias in REGISTERS or (alias in self.namespace and self.namespace[alias] is not value):
+            n += 1
+            alias = '%s_g%d' % (name, n)
+        self.namespace[alias] = value
+        return alias
+
+    # (tree, globals, arguments without self) of a call that can be inlined or None
+    def resolve(self, call):
+        func = call.func
+        name = self_method_name(func)
+        if name is not None:
+            if name in self.properties or name not in self.sources:
+                return None
+            return self.method_tree(name), self.cpu_globals, call.args
+        function = None
+        args = call.args
+        if isinstance(func, ast.Name):
+            function = self.namespace.get(func.id)
+            if hasattr(function, 'tree'):
+                # functions of the specializer, called like name(self, ...)
+                if not args or not is_self(args[0]):
+                    return None
+                args = args[1:]
+        elif isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+            module = self.namespace.get(func.value.id)
+            if not isinstance(module, types.ModuleType):
+                return None
+            function = getattr(module, func.attr, None)
+            if not isinstance(function, types.FunctionType):
+                return None
+        if not isinstance(function, types.FunctionType):
+            return None
+        try:
+            return self.function_tree(function), function.__globals__, args
+        except NotInlinable:
+            return None
+
+    # parameter name -> argument expression
+    def bind(self, call, params, defaults, args):
+        values = {}
+        if len(args) > len(params):
+            raise NotInlinable()
+        for param, arg in zip(params, args):
+            values[param] = arg
+        for keyword in call.keywords:
+            param = [p for p in params if p.rsplit('_', 1)[0] == keyword.arg]
+            if keyword.arg is None or len(param) != 1 or param[0] in values:
+                raise NotInlinable()
+            values[param[0]] = keyword.value
+        for param, default in zip(params[len(params) - len(defaults):], defaults):
+            if param not in values:
+                values[param] = copy_tree(default)
+        if len(values) != len(params):
+            raise NotInlinable()
+        return values
+
+    # statements replacing 'target = call' (or the call as statement) or None
+    def inline_call(self, call, target):
+        resolved = self.resolve(call)
+        if resolved is None:
+            return None
+        tree, globals_, args = resolved
+        try:
+            params, defaults, body = self.prepare(tree, globals_)
+            values = self.bind(call, params, defaults, args)
+            body = convert_returns(body, target)
+        except NotInlinable:
+            return None
+        stored = stored_names(body)
+        statements = []
+        direct = {}
+        for param in params:
+            value = values[param]
+            if param not in stored and (isinstance(value, ast.Constant) or is_self(value)):
+                direct[param] = value
+            else:
+                statements.append(ast.Assign(targets=[ast.Name(id=param, ctx=ast.Store())], value=value))
+        return statements + substitute(body, direct)
+
+    # expression replacing a call of a function which only computes a value
+    # or None
+    def inline_expression(self, call):
+        resolved = self.resolve(call)
+        if resolved is None:
+            return None
+        tree, globals_, args = resolved
+        try:
+            params, defaults, body = self.prepare(tree, globals_)
+            values = self.bind(call, params, defaults, args)
+            result = ast.Name(id='result_%d' % self.instances, ctx=ast.Store())
+            body = simplify_ifs(convert_returns(body, result))
+        except NotInlinable:
+            return None
+        if len(body) != 1 or not isinstance(body[0], ast.Assign) \
+                or not is_name(body[0].targets[0], result.id):
+            return None
+        expression = body[0].value
+        uses = name_loads(expression)
+        for param in params:
+            value = values[param]
+            if not (isinstance(value, (ast.Constant, ast.Name))
+                    or (uses.count(param) <= 1 and not contains_call(value))):
+                return None
+        return substitute([ast.Expr(value=expression)], values)[0].value
+
+    def inline(self, statements, depth):
+        result = []
+        for statement in statements:
+            result.extend(self.inline_statement(statement, depth))
+        return result
+
+    def inline_statement(self, statement, depth):
+        if depth > MAX_INLINE_DEPTH:
+            return [statement]
+        statement = ExpressionInliner(self, depth).visit(statement)
+        if isinstance(statement, ast.If):
+            statement.body = self.inline(statement.body, depth)
+            statement.orelse = self.inline(statement.orelse, depth)
+            return [statement]
+        call, target = None, None
+        if isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Call):
+            call = statement.value
+        elif isinstance(statement, ast.Assign) and len(statement.targets) == 1 \
+                and isinstance(statement.value, ast.Call):
+            call, target = statement.value, statement.targets[0]
+        if call is not None:
+            inlined = self.inline_call(call, target)
+            if inlined is not None:
+                return self.inline(inlined, depth + 1)
+        return [statement]
+
+
+RECOMPILERS = {}
+
+
+def recompiler_for(cpu_class):
+    if cpu_class not in RECOMPILERS:
+        RECOMPILERS[cpu_class] = Recompiler(cpu_class)
+    return RECOMPILERS[cpu_class]
+
+
+# renames the local variables of an inlined function and the globals to
+# their names in the namespace of the block
+class Renamer(ast.NodeTransformer):
+    def __init__(self, compiler, names, globals_):
+        self.compiler = compiler
+        self.names = names
+        self.globals = globals_
+
+    def visit_Name(self, node):
+        if node.id in self.names:
+            node.id = self.names[node.id]
+        elif node.id != 'self':
+            node.id = self.compiler.alias(self.globals, node.id)
+        return node
+
+
+class ExpressionInliner(ast.NodeTransformer):
+    def __init__(self, compiler, depth):
+        self.compiler = compiler
+        self.depth = depth
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if self.depth > MAX_INLINE_DEPTH:
+            return node
+        expression = self.compiler.inline_expression(node)
+        if expression is None:
+            return node
+        return ExpressionInliner(self.compiler, self.depth + 1).visit(expression)
+
+    # statements inside an if are handled by Recompiler.inline
+    def visit_If(self, node):
+        node.test = self.visit(node.test)
+        return node
+
+
+class Substitution(ast.NodeTransformer):
+    def __init__(self, values):
+        self.values = values
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load) and node.id in self.values:
+            return copy_tree(self.values[node.id])
+        return node
+
+
+def substitute(statements, values):
+    if not values:
+        return statements
+    return [Substitution(values).visit(statement) for statement in statements]
+
+
+# every 'return value' becomes 'target = value'. The statements after an if
+# with a return in it are moved into the branches, so every return ends
+# its path.
+def convert_returns(statements, target):
+    result = []
+    for i, statement in enumerate(statements):
+        if isinstance(statement, ast.Return):
+            value = statement.value or ast.Constant(None)
+            if target is not None:
+                result.append(ast.Assign(targets=[copy_tree(target)], value=value))
+            elif contains_call(value):
+                result.append(ast.Expr(value=value))
+            return result
+        if isinstance(statement, ast.If) and contains_return(statement):
+            rest = statements[i + 1:]
+            statement.body = convert_returns(statement.body + copy_tree(rest), target)
+            statement.orelse = convert_returns(statement.orelse + rest, target)
+            result.append(statement)
+            return result
+        if contains_return(statement):
+            raise NotInlinable()
+        result.append(statement)
+    if target is not None:
+        result.append(ast.Assign(targets=[copy_tree(target)], value=ast.Constant(None)))
+    return result
+
+
+# 'if c: t = a else: t = b' -> 't = a if c else b'
+def simplify_ifs(statements):
+    result = []
+    for statement in statements:
+        if isinstance(statement, ast.If):
+            statement.body = simplify_ifs(statement.body)
+            statement.orelse = simplify_ifs(statement.orelse)
+            body, orelse = statement.body, statement.orelse
+            if len(body) == 1 and len(orelse) == 1 and isinstance(body[0], ast.Assign) \
+                    and isinstance(orelse[0], ast.Assign) and len(body[0].targets) == 1 \
+                    and len(orelse[0].targets) == 1 and isinstance(body[0].targets[0], ast.Name) \
+                    and is_name(orelse[0].targets[0], body[0].targets[0].id):
+                value = ast.IfExp(test=statement.test, body=body[0].value, orelse=orelse[0].value)
+                statement = ast.Assign(targets=body[0].targets, value=value)
+        result.append(statement)
+    return result
+
+
+# replaces the reads of self.PC by the PC of the instruction, which is
+# only known as long as the instruction did not write PC
+def fold_pc(statements, pc):
+    fold_pc_statements(statements, pc, False)
+    return statements
+
+
+def fold_pc_statements(statements, pc, stored):
+    for i, statement in enumerate(statements):
+        if isinstance(statement, ast.If):
+            statement.test = fold_pc_expression(statement.test, pc, stored)
+            stored = fold_pc_statements(statement.body, pc, stored) | \
+                fold_pc_statements(statement.orelse, pc, stored)
+        elif isinstance(statement, ast.AugAssign) and is_pc(statement.target):
+            if stored:
+                raise NotRecompilable()
+            value = ast.BinOp(left=ast.Constant(pc), op=statement.op,
+                              right=fold_pc_expression(statement.value, pc, stored))
+            statements[i] = ast.Assign(targets=[statement.target], value=value)
+            stored = True
+        elif isinstance(statement, ast.Assign):
+            statement.value = fold_pc_expression(statement.value, pc, stored)
+            for target in statement.targets:
+                if is_pc(target):
+                    stored = True
+                else:
+                    fold_pc_expression(target, pc, stored)
+        elif isinstance(statement, (ast.Expr, ast.AugAssign, ast.Raise, ast.Pass)):
+            for field, value in ast.iter_fields(statement):
+                if isinstance(value, ast.expr):
+                    setattr(statement, field, fold_pc_expression(value, pc, stored))
+        else:
+            raise NotRecompilable()
+    return stored
+
+
+class PCFolder(ast.NodeTransformer):
+    def __init__(self, pc, stored):
+        self.pc = pc
+        self.stored = stored
+
+    def visit_Attribute(self, node):
+        if is_pc(node) and isinstance(node.ctx, ast.Load):
+            if self.stored:
+                raise NotRecompilable()
+            return ast.Constant(self.pc)
+        self.generic_visit(node)
+        return node
+
+
+def fold_pc_expression(node, pc, stored):
+    return PCFolder(pc, stored).visit(node)
+
+
+# computes operations on constants
+class ConstantFolder(ast.NodeTransformer):
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        function = BINARY_OPERATORS.get(type(node.op))
+        if function and isinstance(node.left, ast.Constant) and isinstance(node.right, ast.Constant):
+            return fold(function, node, node.left.value, node.right.value)
+        return node
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        function = UNARY_OPERATORS.get(type(node.op))
+        if function and isinstance(node.operand, ast.Constant):
+            return fold(function, node, node.operand.value)
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if len(node.ops) == 1 and type(node.ops[0]) in COMPARE_OPERATORS \
+                and isinstance(node.left, ast.Constant) and isinstance(node.comparators[0], ast.Constant):
+            return fold(COMPARE_OPERATORS[type(node.ops[0])], node,
+                        node.left.value, node.comparators[0].value)
+        return node
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        if all(isinstance(value, ast.Constant) for value in node.values):
+            result = node.values[0].value
+            for value in node.values[1:]:
+                if isinstance(node.op, ast.And):
+                    result = result and value.value
+                else:
+                    result = result or value.value
+            return ast.Constant(result)
+        return node
+
+    def visit_IfExp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.test, ast.Constant):
+            return node.body if node.test.value else node.orelse
+        return node
+
+
+def fold(function, node, *values):
+    try:
+        return ast.Constant(function(*values))
+    except (ArithmeticError, TypeError, ValueError):
+        return node
+
+
+# 'if constant:' is replaced by the branch which is taken
+def flatten_constant_ifs(statements):
+    result = []
+    for statement in statements:
+        if isinstance(statement, ast.If):
+            if isinstance(statement.test, ast.Constant):
+                result.extend(flatten_constant_ifs(statement.body if statement.test.value
+                                                   else statement.orelse))
+                continue
+            statement.body = flatten_constant_ifs(statement.body) or [ast.Pass()]
+            statement.orelse = flatten_constant_ifs(statement.orelse)
+        result.append(statement)
+    return result
+
+
+# forward propagation of local variables holding a constant or a copy of
+# another local variable
+def propagate_constants(statements, known):
+    result = []
+    for statement in statements:
+        if isinstance(statement, ast.If):
+            statement.test = ConstantFolder().visit(substitute_expression(statement.test, known))
+            if isinstance(statement.test, ast.Constant):
+                branch = statement.body if statement.test.value else statement.orelse
+                result.extend(propagate_constants(branch, known))
+                continue
+            statement.body = propagate_constants(statement.body, dict(known))
+            statement.orelse = propagate_constants(statement.orelse, dict(known))
+            forget(known, stored_names([statement]))
+            result.append(statement)
+            continue
+        if isinstance(statement, ast.Pass):
+            continue
+        for field, value in ast.iter_fields(statement):
+            if isinstance(value, ast.expr) and field not in ('targets', 'target'):
+                setattr(statement, field, ConstantFolder().visit(substitute_expression(value, known)))
+        forget(known, stored_names([statement]))
+        if is_propagated(statement):
+            known[statement.targets[0].id] = statement.value
+        result.append(statement)
+    return result
+
+
+# 'name = constant' or 'name = other_name'
+def is_propagated(statement):
+    if not isinstance(statement, ast.Assign) or len(statement.targets) != 1 \
+            or not isinstance(statement.targets[0], ast.Name):
+        return False
+    if isinstance(statement.value, ast.Name):
+        return statement.value.id != statement.targets[0].id
+    return isinstance(statement.value, ast.Constant)
+
+
+def forget(known, names):
+    for name in names:
+        known.pop(name, None)
+    for name, value in list(known.items()):
+        if isinstance(value, ast.Name) and value.id in names:
+            del known[name]
+
+
+def substitute_expression(node, known):
+    if not known:
+        return node
+    return Substitution(known).visit(node)
+
+
+# self.A -> A and so on, see REGISTERS. Statements which could read or write
+# the registers on the CPU object (calls which were not inlined, properties)
+# get the registers written back before and read again after them.
+def localize_registers(statements):
+    used = set()
+    for statement in statements:
+        if not is_unsafe(statement):
+            used |= register_attributes(statement)
+    if not used:
+        return statements
+    order = [register for register in REGISTERS if register in used]
+    result = [load_register(register) for register in order]
+    dirty = set()
+    for statement in statements:
+        if is_unsafe(statement):
+            result.extend(store_register(register) for register in order if register in dirty)
+            result.append(statement)
+            result.extend(load_register(register) for register in order)
+            dirty = set()
+        else:
+            localizer = RegisterLocalizer()
+            result.append(localizer.visit(statement))
+            dirty |= localizer.stored
+    result.extend(store_register(register) for register in order if register in dirty)
+    return result
+
+
+class RegisterLocalizer(ast.NodeTransformer):
+    def __init__(self):
+        self.stored = set()
+
+    def visit_Attribute(self, node):
+        if is_self(node.value) and node.attr in REGISTERS:
+            if not isinstance(node.ctx, ast.Load):
+                self.stored.add(node.attr)
+            return ast.Name(id=node.attr, ctx=node.ctx)
+        self.generic_visit(node)
+        return node
+
+
+def register_attributes(statement):
+    return set(node.attr for node in ast.walk(statement)
+               if isinstance(node, ast.Attribute) and is_self(node.value) and node.attr in REGISTERS)
+
+
+def load_register(register):
+    return ast.Assign(targets=[ast.Name(id=register, ctx=ast.Store())],
+                      value=ast.Attribute(value=ast.Name(id='self', ctx=ast.Load()), attr=register,
+                                          ctx=ast.Load()))
+
+
+def store_register(register):
+    return ast.Assign(targets=[ast.Attribute(value=ast.Name(id='self', ctx=ast.Load()), attr=register,
+                                             ctx=ast.Store())],
+                      value=ast.Name(id=register, ctx=ast.Load()))
+
+
+# 'cycles += 2' ... 'cycles += 3' -> 'cycles += 5' as long as nothing reads cycles
+def merge_cycles(statements):
+    result = []
+    pending = 0
+    for statement in statements:
+        if isinstance(statement, ast.AugAssign) and is_name(statement.target, 'cycles') \
+                and isinstance(statement.op, ast.Add):
+            value = statement.value
+            if isinstance(value, ast.Constant):
+                pending += value.value
+                continue
+            if isinstance(value, ast.BinOp) and isinstance(value.op, ast.Add) \
+                    and isinstance(value.left, ast.Constant) and 'cycles' not in name_loads(value.right):
+                pending += value.left.value
+                statement.value = value.right
+        elif pending and ('cycles' in name_loads(statement) or is_unsafe(statement)):
+            result.append(cycles_increment(pending))
+            pending = 0
+        result.append(statement)
+    if pending:
+        result.append(cycles_increment(pending))
+    return result
+
+
+def cycles_increment(value):
+    return ast.AugAssign(target=ast.Name(id='cycles', ctx=ast.Store()), op=ast.Add(), value=ast.Constant(value))
+
+
+# removes assignments to temporaries that are never read
+def remove_dead_stores(statements):
+    while True:
+        loads = set(node.id for statement in statements for node in ast.walk(statement)
+                    if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load))
+        removed = [False]
+        statements = remove_stores(statements, loads, removed)
+        if not removed[0]:
+            return statements
+
+
+def remove_stores(statements, loads, removed):
+    result = []
+    for statement in statements:
+        if isinstance(statement, ast.Assign) and len(statement.targets) == 1 \
+                and isinstance(statement.targets[0], ast.Name) and statement.targets[0].id not in loads \
+                and statement.targets[0].id not in REGISTERS and not contains_call(statement.value):
+            removed[0] = True
+            continue
+        if isinstance(statement, ast.If):
+            statement.body = remove_stores(statement.body, loads, removed) or [ast.Pass()]
+            statement.orelse = remove_stores(statement.orelse, loads, removed)
+        result.append(statement)
+    return result
+
+
+# the statement may read or write CPU state the recompiler can not see
+def is_unsafe(statement):
+    for node in ast.walk(statement):
+        if isinstance(node, ast.Call):
+            if self_method_name(node.func) is not None:
+                return True
+            if any(is_self(arg) for arg in node.args) or any(is_self(k.value) for k in node.keywords):
+                return True
+        elif isinstance(node, ast.Attribute) and is_self(node.value) and node.attr not in PLAIN_ATTRIBUTES:
+            return True
+    return False
+
+
+# a lot faster than copy.deepcopy
+def copy_tree(node):
+    if isinstance(node, ast.AST):
+        if isinstance(node, ast.expr_context):
+            return node
+        new = node.__class__()
+        for field in node._fields:
+            setattr(new, field, copy_tree(getattr(node, field, None)))
+        return new
+    if isinstance(node, list):
+        return [copy_tree(child) for child in node]
+    return node
+
+
+def is_self(node):
+    return isinstance(node, ast.Name) and node.id == 'self'
+
+
+def is_name(node, name):
+    return isinstance(node, ast.Name) and node.id == name
+
+
+def is_pc(node):
+    return isinstance(node, ast.Attribute) and is_self_attribute(node, 'PC')
+
+
+def is_pc_store(statement):
+    return isinstance(statement, ast.Assign) and len(statement.targets) == 1 and is_pc(statement.targets[0])
+
+
+def pc_store(pc):
+    return ast.Assign(targets=[ast.Attribute(value=ast.Name(id='self', ctx=ast.Load()), attr='PC',
+                                             ctx=ast.Store())], value=ast.Constant(pc))
+
+
+def contains_call(node):
+    return any(isinstance(child, ast.Call) for child in ast.walk(node))
+
+
+def contains_return(node):
+    return any(isinstance(child, ast.Return) for child in ast.walk(node))
+
+
+def stored_names(statements):
+    return set(node.id for statement in statements for node in ast.walk(statement)
+               if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load))
+
+
+def name_loads(node):
+    return [child.id for child in ast.walk(node)
+            if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load)]
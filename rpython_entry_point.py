@@ -19,11 +19,8 @@ def main(argv):
     header = ROMHeader(ba)
     header.dump()
     c = CPU65816(MemoryMock())
-    while True:
-        # FIXME:
-        if c.cycles > 10000:
-            break
-        c.fetch_decode_execute(ba)
+    # FIXME:
+    c.run(10000)
     return 0
 
 def target(*args):
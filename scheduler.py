@@ -0,0 +1,154 @@
+import copy
+import heapq
+
+import timing
+from cpu import StopReason
+
+
+# Timed events
+#
+# Everything besides the CPU which happens at a certain time (the end of a
+# scanline, the NMI at the start of vblank, the H/V IRQ timer, the end of a
+# DMA transfer) is an event in a priority queue ordered by the cycle it is
+# due at. The CPU runs uninterrupted up to the next event (see
+# CPU65816.run_to, which also takes pending interrupts there), then all due
+# events are handled. Instead of checking the time after every instruction
+# there is one comparison per block and one heap operation per event.
+#
+# The scanline events are always there: at the end of every scanline the
+# next one is scheduled, vblank starts and the IRQ timer of the new
+# scanline is set up. registers are the InternalCPURegisters (NMITIMEN,
+# HTIME, VTIME, RDNMI, TIMEUP), without them (None) no NMI and no IRQ is
+# raised.
+class Scheduler(object):
+    def __init__(self, cpu, registers=None):
+        self.cpu = cpu
+        self.registers = registers
+        self.queue = []  # heap of (cycle, number, callback)
+        self.scheduled = 0  # number of the next event: events due at the same cycle run in order
+        line = cpu.cycles // timing.CYCLES_PER_SCANLINE
+        self.scanline = line % timing.SCANLINES_PER_FRAME
+        self.dma_count = 0  # bytes of the DMA started by the last block (see start_dma)
+        self.schedule((line + 1) * timing.CYCLES_PER_SCANLINE, self.end_of_scanline)
+        self.connect()
+
+    # the memory mapper starts the DMA of a write to MDMAEN here
+    def connect(self):
+        mapper = getattr(self.cpu.memory, 'mapper', None)
+        if hasattr(mapper, 'dma_started'):
+            mapper.dma_started = self.start_dma
+
+    # A second scheduler with the same events for a fork of the CPU (see
+    # CPU65816.fork). The events of this scheduler (end of scanline, IRQ
+    # timer) are the ones of the fork, other callbacks are kept as they are.
+    def fork(self):
+        child = copy.copy(self)
+        child.cpu = self.cpu.fork()
+        if self.registers is not None:
+            registers = getattr(getattr(self.cpu.memory, 'mapper', None), 'internal_cpu_registers', None)
+            if registers is self.registers:
+                child.registers = child.cpu.memory.mapper.internal_cpu_registers
+            else:
+                child.registers = copy.deepcopy(self.registers)
+        child.queue = [(cycle, number, rebind(callback, self, child)) for cycle, number, callback in self.queue]
+        child.connect()
+        return child
+
+    # callback(cycle) is called once cpu.cycles reached cycle
+    def schedule(self, cycle, callback):
+        heapq.heappush(self.queue, (cycle, self.scheduled, callback))
+        self.scheduled += 1
+
+    # Runs the CPU and the events until cycle end or until the CPU stops for
+    # another reason (breakpoint, ...). Returns a StopReason.
+    def run_to(self, end):
+        cpu = self.cpu
+        queue = self.queue
+        while cpu.cycles < end:
+            reason = cpu.run_to(min(queue[0][0], end))
+            if reason == StopReason.HALTED:
+                cpu.halted = False
+                self.dma(self.dma_count, self.end_of_dma)
+                self.dma_count = 0
+                reason = StopReason.CYCLES
+            while queue[0][0] <= cpu.cycles:
+                cycle, number, callback = heapq.heappop(queue)
+                callback(cycle)
+            self.update_irq()
+            if reason != StopReason.CYCLES:
+                return reason
+        return StopReason.CYCLES
+
+    def run(self, cycles):
+        return self.run_to(self.cpu.cycles + cycles)
+
+    # runs until the end of the n-th frame from now (see timing.py)
+    def run_frames(self, n):
+        frame = self.cpu.cycles // timing.CYCLES_PER_FRAME
+        return self.run_to((frame + n) * timing.CYCLES_PER_FRAME)
+
+    # A DMA transfer of count bytes: the CPU is halted until it is done, one
+    # byte every MASTER_CYCLES_PER_DMA_BYTE master cycles. done(cycle) is
+    # called at the end.
+    def dma(self, count, done=None):
+        cycles = count * timing.MASTER_CYCLES_PER_DMA_BYTE // timing.MASTER_CYCLES_PER_CYCLE
+        self.cpu.cycles += cycles
+        if done is not None:
+            self.schedule(self.cpu.cycles, done)
+
+    # A write to MDMAEN started a DMA of count bytes. The write happens in
+    # the middle of a block, which keeps the cycles in a local variable: the
+    # CPU stops after the block (see CPU65816.halted), then run_to() halts
+    # it for the transfer.
+    def start_dma(self, count):
+        self.dma_count += count
+        self.cpu.halted = True
+
+    # the channels are done, MDMAEN reads 0 again
+    def end_of_dma(self, cycle):
+        if self.registers is not None:
+            self.registers.MDMAEN_8 = 0
+
+    def end_of_scanline(self, cycle):
+        self.scanline = (self.scanline + 1) % timing.SCANLINES_PER_FRAME
+        self.schedule(cycle + timing.CYCLES_PER_SCANLINE, self.end_of_scanline)
+        registers = self.registers
+        if registers is None:
+            return
+        if self.scanline == timing.VBLANK_SCANLINE:
+            registers.RDNMI_8 = registers.RDNMI_8 | 0x80
+            registers.HVBJOY_8 = registers.HVBJOY_8 | 0x80
+            if registers.NMITIMEN_8 & 0x80:
+                self.cpu.nmi()
+        elif self.scanline == 0:
+            registers.RDNMI_8 = registers.RDNMI_8 & 0x7F
+            registers.HVBJOY_8 = registers.HVBJOY_8 & 0x7F
+        # NMITIMEN bit 4: IRQ at dot HTIME, bit 5: IRQ on scanline VTIME
+        # (at dot HTIME if bit 4 is set too, else at its start)
+        timer = (registers.NMITIMEN_8 >> 4) & 0x03
+        if timer == 0:
+            return
+        vtime = ((registers.VTIMEH_8 & 0x01) << 8) | registers.VTIMEL_8
+        if timer & 0x02 and vtime != self.scanline:
+            return
+        htime = 0
+        if timer & 0x01:
+            htime = ((registers.HTIMEH_8 & 0x01) << 8) | registers.HTIMEL_8
+        self.schedule(cycle + htime * timing.MASTER_CYCLES_PER_DOT // timing.MASTER_CYCLES_PER_CYCLE,
+                      self.timer_irq)
+
+    def timer_irq(self, cycle):
+        self.registers.TIMEUP_8 = self.registers.TIMEUP_8 | 0x80
+        self.cpu.irq()
+
+    # the IRQ line stays active until the program reads TIMEUP
+    def update_irq(self):
+        if self.registers is not None and not self.registers.TIMEUP_8 & 0x80:
+            self.cpu.irq(False)
+
+
+# the method of child for a method of scheduler, other callbacks stay
+def rebind(callback, scheduler, child):
+    if getattr(callback, '__self__', None) is scheduler:
+        return getattr(child, callback.__name__)
+    return callback
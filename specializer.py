@@ -0,0 +1,347 @@
+import ast
+import inspect
+import sys
+import textwrap
+
+
+# The 65816 changes the width of A/M and X/Y at runtime (M and X flag) and
+# behaves a bit differently in emulation mode (e flag). The opcode handlers
+# in cpu.py are written once for every width and ask self.isM(), self.m(),
+# self.isX(), self.x() and self.e whenever they have to decide.
+#
+# This module builds one handler table per (e, M, X) combination. Every
+# handler is re-compiled from its own source with those questions replaced
+# by constants, so the branches on the width flags are folded away at
+# compile time. The CPU swaps the active table only when REP, SEP, PLP, XCE
+# (or a direct write to P / e) changes one of the three flags.
+#
+# The compiled handlers take the operand of the instruction as parameter
+# instead of fetching it: handler(self, operand). Every handler gets the
+# attributes operand_size (bytes after the opcode) and ends_block (the
+# handler may not continue with the next instruction, see block_cache.py).
+
+# name of the parameter used by helpers that get the width passed in
+WIDTH_PARAMETER = 'is8BitMode'
+
+# operand fetches of the handlers and the number of bytes they read
+OPERAND_FETCHES = {'fetch_byte': 1, 'fetch_twobyte': 2, 'fetch_threebyte': 3}
+OPERAND_PARAMETER = 'operand'
+
+
+# index of the handler table for a mode
+def mode_index(e, m, x):
+    return (e << 2) | (m << 1) | x
+
+
+class ModeSpecializer(ast.NodeTransformer):
+    # mode is None for handlers that are not specialized, then only the
+    # calls of the width helpers are replaced
+    def __init__(self, mode, mode_helpers, width_helpers):
+        self.constants = {}
+        self.e = None
+        if mode is not None:
+            e, m, x = mode
+            self.constants = {'isM': bool(m), 'm': m, 'isX': bool(x), 'x': x}
+            self.e = e
+        self.mode_helpers = mode_helpers
+        self.width_helpers = width_helpers
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        name = self_method_name(node.func)
+        if name is None:
+            return node
+        if name in self.constants and not node.args:
+            return ast.copy_location(ast.Constant(self.constants[name]), node)
+        if name in self.mode_helpers:
+            return self.call_function(node, name, node.args, node.keywords)
+        if name in self.width_helpers:
+            return self.specialize_width_call(node, name)
+        return node
+
+    # self.compute_NZflags(v, True) -> compute_NZflags_8bit(self, v)
+    def specialize_width_call(self, node, name):
+        position = self.width_helpers[name]
+        args = list(node.args)
+        keywords = list(node.keywords)
+        width = None
+        if len(args) > position:
+            width = args.pop(position)
+        else:
+            for keyword in keywords:
+                if keyword.arg == WIDTH_PARAMETER:
+                    width = keyword.value
+                    keywords.remove(keyword)
+                    break
+        if not isinstance(width, ast.Constant):
+            return node
+        return self.call_function(node, width_variant_name(name, width.value), args, keywords)
+
+    def call_function(self, node, name, args, keywords):
+        call = ast.Call(func=ast.Name(id=name, ctx=ast.Load()),
+                        args=[ast.Name(id='self', ctx=ast.Load())] + list(args),
+                        keywords=keywords)
+        return ast.copy_location(call, node)
+
+    def visit_Attribute(self, node):
+        self.generic_visit(node)
+        if self.e is not None and is_self_attribute(node, 'e') and isinstance(node.ctx, ast.Load):
+            return ast.copy_location(ast.Constant(self.e), node)
+        return node
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not) and isinstance(node.operand, ast.Constant):
+            return ast.copy_location(ast.Constant(not node.operand.value), node)
+        return node
+
+    def visit_If(self, node):
+        self.generic_visit(node)
+        if isinstance(node.test, ast.Constant):
+            body = node.body if node.test.value else node.orelse
+            return body or [ast.copy_location(ast.Pass(), node)]
+        return node
+
+
+# replaces the width parameter of a helper by a constant
+class WidthSpecializer(ModeSpecializer):
+    def __init__(self, is8BitMode, width_helpers):
+        ModeSpecializer.__init__(self, None, (), width_helpers)
+        self.is8BitMode = is8BitMode
+
+    def visit_Name(self, node):
+        if node.id == WIDTH_PARAMETER and isinstance(node.ctx, ast.Load):
+            return ast.copy_location(ast.Constant(self.is8BitMode), node)
+        return node
+
+
+# Replaces the operand fetch of a handler (self.fetch_byte() and friends) by
+# the parameter 'operand'. The operand is read by the caller, which lets the
+# block cache decode an instruction once and run it many times.
+class OperandSpecializer(ast.NodeTransformer):
+    def __init__(self):
+        self.operand_size = 0
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        name = self_method_name(node.func)
+        if name in OPERAND_FETCHES and not node.args:
+            if self.operand_size:
+                raise Exception("Error: handler fetches more than one operand")
+            self.operand_size = OPERAND_FETCHES[name]
+            return ast.copy_location(ast.Name(id=OPERAND_PARAMETER, ctx=ast.Load()), node)
+        return node
+
+
+def self_method_name(func):
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) \
+            and func.value.id == 'self':
+        return func.attr
+    return None
+
+
+def is_self_attribute(node, attr):
+    return isinstance(node.value, ast.Name) and node.value.id == 'self' and node.attr == attr
+
+
+def width_variant_name(name, is8BitMode):
+    if is8BitMode:
+        return name + '_8bit'
+    return name + '_16bit'
+
+
+# source of every method of the class, dedented, with its first line number
+def method_sources(module, source, class_name):
+    tree = ast.parse(source, filename=module.__file__)
+    lines = source.splitlines(True)
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == class_name:
+            return dict((f.name, (textwrap.dedent(''.join(lines[f.lineno - 1:f.end_lineno])), f.lineno))
+                        for f in node.body if isinstance(f, ast.FunctionDef))
+    raise Exception("Error: can not find source of " + class_name)
+
+
+# parses a method again. Every call returns fresh nodes, which is a lot
+# cheaper than deep copying them.
+def parse_method(sources, name):
+    text, lineno = sources[name]
+    node = ast.parse(text).body[0]
+    ast.increment_lineno(node, lineno - node.lineno)
+    return node
+
+
+def compile_functions(function_nodes, namespace, filename):
+    for node in function_nodes:
+        node.decorator_list = []
+    tree = ast.Module(body=function_nodes, type_ignores=[])
+    ast.fix_missing_locations(tree)
+    exec(compile(tree, filename, 'exec'), namespace)
+    for node in function_nodes:
+        namespace[node.name].tree = node  # used by recompiler.py
+
+
+# returns a list of handler tables, indexed by mode_index(e, m, x)
+def build_mode_tables(cpu_class, generic_table):
+    module = sys.modules[cpu_class.__module__]
+    source = inspect.getsource(module)
+    sources = method_sources(module, source, cpu_class.__name__)
+    # handlers composed at import time carry their source (see composer.py)
+    for handler in generic_table:
+        if handler.__name__ not in sources and hasattr(handler, 'source'):
+            sources[handler.__name__] = (handler.source, 1)
+    methods = dict((name, parse_method(sources, name)) for name in sources)
+    handler_names = set(handler.__name__ for handler in generic_table)
+    # helpers that read the mode are specialized like the handlers
+    helper_flags = mode_helper_flags(methods, handler_names)
+    # helpers with a width parameter get an 8 and a 16 bit variant
+    width_helpers = {}
+    for name, node in methods.items():
+        arg_names = [arg.arg for arg in node.args.args]
+        if WIDTH_PARAMETER in arg_names:
+            width_helpers[name] = arg_names.index(WIDTH_PARAMETER) - 1  # without self
+
+    namespace = dict(vars(module))
+    width_variants = []
+    for name, position in width_helpers.items():
+        for is8BitMode in (True, False):
+            node = parse_method(sources, name)
+            del node.args.args[position + 1]
+            node = WidthSpecializer(is8BitMode, width_helpers).visit(node)
+            node.name = width_variant_name(name, is8BitMode)
+            width_variants.append(node)
+    compile_functions(width_variants, namespace, module.__file__)
+
+    # A handler is only compiled for the flags it really reads, e.g. ADC
+    # once for M=0 and once for M=1. The other flags are set to 0. Handlers
+    # that do not read a flag are compiled once, for mode None.
+    handler_flags = {}
+    changes_mode = {}
+    ends_block = {}
+    variants = {}
+    for handler in set(generic_table):
+        name = handler.__name__
+        flags = set()
+        changes_mode[name] = getattr(handler, 'changes_mode', False)
+        ends_block[name] = changes_mode[name] or getattr(handler, 'ends_block', False)
+        if not changes_mode[name]:  # reads the flags after changing them
+            flags = read_flags(methods[name], helper_flags)
+        handler_flags[name] = flags
+        if flags:
+            for mode in MODES:
+                variants.setdefault(representative(mode, flags), set()).add(name)
+        else:
+            variants.setdefault(None, set()).add(name)
+
+    compiled = {}
+    for mode, names in variants.items():
+        nodes = []
+        handlers = []
+        if mode is not None:
+            nodes = [ModeSpecializer(mode, helper_flags, width_helpers).visit(parse_method(sources, name))
+                     for name in helper_flags]
+        for name in names:
+            node = ModeSpecializer(mode, helper_flags, width_helpers).visit(parse_method(sources, name))
+            handlers.append(operand_handler(node, name))
+            nodes.append(node)
+        compiled[mode] = dict(namespace)
+        compile_functions(nodes, compiled[mode], module.__file__)
+        for name, operand_size, leaves_block in handlers:
+            function = compiled[mode][name]
+            function.operand_size = operand_size
+            function.ends_block = leaves_block or ends_block[name]
+
+    tables = [None] * len(MODES)
+    for mode in MODES:
+        table = []
+        for handler in generic_table:
+            flags = handler_flags[handler.__name__]
+            if flags:
+                table.append(compiled[representative(mode, flags)][handler.__name__])
+            else:
+                table.append(compiled[None][handler.__name__])
+        tables[mode_index(*mode)] = table
+    return tables
+
+
+# turns the handler into handler(self, operand), returns
+# (name, operand size, ends block)
+def operand_handler(node, name):
+    specializer = OperandSpecializer()
+    specializer.visit(node)
+    if specializer.operand_size and not uses_operand(node.body[0]):
+        # the handler must not depend on PC before the operand is fetched
+        raise Exception("Error: " + name + " must fetch its operand first")
+    node.args.args.append(ast.arg(arg=OPERAND_PARAMETER))
+    return name, specializer.operand_size, not falls_through(node)
+
+
+def uses_operand(statement):
+    for node in ast.walk(statement):
+        if isinstance(node, ast.Name) and node.id == OPERAND_PARAMETER:
+            return True
+    return False
+
+
+# True if the handler always goes on with the next instruction: the only
+# write to PC is the final 'self.PC = self.PC + 1' and PBR is not touched
+def falls_through(function_node):
+    last = function_node.body[-1]
+    if ast.dump(last, annotate_fields=False) != NEXT_INSTRUCTION:
+        return False
+    for statement in function_node.body[:-1]:
+        for node in ast.walk(statement):
+            targets = []
+            if isinstance(node, ast.Assign):
+                targets = node.targets
+            elif isinstance(node, ast.AugAssign):
+                targets = [node.target]
+            for target in targets:
+                if isinstance(target, ast.Attribute) and \
+                        (is_self_attribute(target, 'PC') or is_self_attribute(target, 'PBR')):
+                    return False
+    return True
+
+
+NEXT_INSTRUCTION = ast.dump(ast.parse('self.PC = self.PC + 1').body[0], annotate_fields=False)
+
+
+MODES = [(e, m, x) for e in (0, 1) for m in (0, 1) for x in (0, 1)]
+
+# calls on self that only depend on the mode and the flag they read
+FLAG_OF_CALL = {'isM': 'm', 'm': 'm', 'isX': 'x', 'x': 'x'}
+
+
+# the mode with every flag the function does not read set to 0
+def representative(mode, flags):
+    e, m, x = mode
+    return (e if 'e' in flags else 0, m if 'm' in flags else 0, x if 'x' in flags else 0)
+
+
+# set of mode flags ('e', 'm', 'x') the function reads, directly or through a helper
+def read_flags(function_node, helper_flags):
+    flags = set()
+    for node in ast.walk(function_node):
+        if isinstance(node, ast.Call):
+            name = self_method_name(node.func)
+            if name in FLAG_OF_CALL and not node.args:
+                flags.add(FLAG_OF_CALL[name])
+            elif name in helper_flags:
+                flags |= helper_flags[name]
+        elif isinstance(node, ast.Attribute) and is_self_attribute(node, 'e'):
+            flags.add('e')
+    return flags
+
+
+# helper method name -> flags it reads, for every helper that reads one
+def mode_helper_flags(methods, handler_names):
+    helpers = dict((name, set()) for name in methods
+                   if name not in handler_names and name not in FLAG_OF_CALL)
+    changed = True
+    while changed:  # helpers may call other helpers
+        changed = False
+        for name in helpers:
+            flags = read_flags(methods[name], helpers)
+            if flags != helpers[name]:
+                helpers[name] = flags
+                changed = True
+    return dict((name, flags) for name, flags in helpers.items() if flags)
@@ -0,0 +1,49 @@
+from pysnes.cartrige import CartrigeType
+from pysnes.memory import MemoryMapper
+
+# mocks shared by the tests of the CPU:
+#     from pysnes.test.mocks import HeaderMock, MemoryMock
+
+class HeaderMock():
+    def __init__(self):
+        self.reset_int_addr = 0x8000
+
+    def getCartridgeType(self):
+        return CartrigeType.LOROM
+
+# the code is put at the reset vector (plus start, e.g. 0x7E0000 for WRAM),
+# reading an address nothing was written to raises a KeyError
+class MemoryMock(object):
+    def __init__(self, ROM, start=0):
+        self.ram = {}
+        self.ROM = ROM
+        self.header = HeaderMock()
+        self.reads = 0
+        pc = self.header.reset_int_addr
+        for byte in ROM:
+            self.ram[pc+start] = byte
+            pc += 1
+
+    def read(self, address):
+        self.reads += 1
+        return self.ram[address]
+
+    def write(self, address, value):
+        self.ram[address] = value
+
+# every address reads as 0 until it is written
+class ZeroedMemoryMock(MemoryMock):
+    def read(self, address):
+        self.reads += 1
+        return self.ram.get(address, 0)
+
+
+# a LoROM MemoryMapper with the code at start in bank 0x7E (WRAM) or in the ROM
+def mapped_memory(code, start=0x8000, bank=0x00, mapper=MemoryMapper):
+    RAM = [0] * 2 ** 17
+    ROM = [0] * 2 ** 16
+    SRAM = [0] * 0x7FFF
+    buffer, base = (RAM, start) if bank == 0x7E else (ROM, start - 0x8000)
+    for i, byte in enumerate(code):
+        buffer[base + i] = byte
+    return mapper(HeaderMock(), RAM, ROM, SRAM, False, 0x7FFF)
@@ -583,3 +583,61 @@ def test_ADC_long_indexed_X():
     assert cpu.A == 0xBE02
     assert cpu.P == 0b11000000  # negative and overflow flag
     assert cpu.PC == 4 + mem.header.reset_int_addr
+
+
+def test_ADC_imm_decimal_8bit():
+    ROM = [0x69, 0x27]
+    mem = MemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.P = 0b00101000  # 8 Bit mode, decimal
+    cpu.e = 0
+    cpu.A = 0x15
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.A == 0x42
+    assert cpu.P == 0b00101000  # no carry
+
+
+def test_ADC_imm_decimal_carry_8bit():
+    ROM = [0x69, 0x01]
+    mem = MemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.P = 0b00101000  # 8 Bit mode, decimal
+    cpu.e = 0
+    cpu.A = 0x99
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.A == 0x00
+    assert cpu.P == 0b00101011  # zero, carry
+
+
+def test_ADC_imm_decimal_16bit():
+    ROM = [0x69, 0x01, 0x00]
+    mem = MemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.P = 0b00001001  # 16 Bit mode, decimal, carry
+    cpu.e = 0
+    cpu.A = 0x1298
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.A == 0x1300  # the carry of the low byte goes into the high byte
+    assert cpu.P == 0b00001000
+
+
+def test_ADC_imm_keeps_B_8bit():
+    ROM = [0x69, 0x20]
+    mem = MemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.P = 0b00100000  # 8 Bit mode
+    cpu.e = 0
+    cpu.A = 0x12F0
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.cycles == 2
+    assert cpu.A == 0x1210  # the carry of the low byte does not go into B
+    assert cpu.P == 0b00100001  # carry
+    assert cpu.PC == 2 + mem.header.reset_int_addr
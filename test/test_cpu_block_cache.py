@@ -0,0 +1,109 @@
+from pysnes.cpu import CPU65816
+from pysnes.test.mocks import MemoryMock, mapped_memory
+
+# .../PySNES/venv/$ py.test pysnes/test/
+
+
+def wram_cpu(code, start):
+    cpu = CPU65816(mapped_memory(code, start, 0x7E))
+    cpu.P = 0b00110000
+    cpu.PBR = 0x7E
+    cpu.DBR = 0x7E
+    cpu.PC = start
+    return cpu
+
+
+# LDA #$12, INX, INY, BNE $8000
+def test_block_runs_until_branch():
+    code = [0xA9, 0x12, 0xE8, 0xC8, 0xD0, 0xFA]
+    cpu = CPU65816(MemoryMock(code))
+    cpu.P = 0b00110000
+    stepped = CPU65816(MemoryMock(code))
+    stepped.P = 0b00110000
+
+    cpu.execute_block()
+    for i in range(4):
+        stepped.fetch_decode_execute()
+
+    assert cpu.PC == stepped.PC == 0x8000
+    assert cpu.A == stepped.A == 0x12
+    assert cpu.X == stepped.X == 1
+    assert cpu.Y == stepped.Y == 1
+    assert cpu.P == stepped.P
+    assert cpu.cycles == stepped.cycles
+
+
+def test_block_is_decoded_once():
+    mem = MemoryMock([0xE8, 0xC8, 0x80, 0xFC])  # INX, INY, BRA $8000
+    cpu = CPU65816(mem)
+    cpu.P = 0b00110000
+
+    cpu.execute_block()
+    reads = mem.reads
+    cpu.execute_block()
+
+    assert mem.reads == reads
+    assert cpu.X == 2
+    assert cpu.Y == 2
+    assert cpu.PC == 0x8000
+
+
+# the operand size of LDA #const depends on M
+def test_block_depends_on_mode():
+    mem = MemoryMock([0xA9, 0x34, 0x12, 0x80, 0xFB])
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00000000
+
+    cpu.execute_block()
+
+    assert cpu.A == 0x1234
+    assert cpu.PC == 0x8000
+    assert len(cpu.block_cache.blocks) == 1
+
+
+# REP #$20, LDA #$1234, BRA $8000
+def test_block_ends_at_mode_change():
+    mem = MemoryMock([0xC2, 0x20, 0xA9, 0x34, 0x12, 0x80, 0xF9])
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00110000
+
+    cpu.execute_block()
+
+    assert cpu.PC == 0x8002
+    assert cpu.A == 0
+
+    cpu.execute_block()
+
+    assert cpu.A == 0x1234
+    assert cpu.PC == 0x8000
+
+
+# LDA #$01, BRA $0100 in WRAM
+def test_block_in_WRAM_is_invalidated_on_write():
+    cpu = wram_cpu([0xA9, 0x01, 0x80, 0xFC], 0x0100)
+
+    cpu.execute_block()
+    assert cpu.A == 0x01
+
+    cpu.memory.write(0x7E0101, 0x05)
+    cpu.execute_block()
+
+    assert cpu.A == 0x05
+    assert cpu.PC == 0x0100
+
+
+# LDA #$AA, STA $0106, LDA #$00, BRA $0100 in WRAM: STA writes the operand
+# of the second LDA which is part of the running block
+def test_block_in_WRAM_modifying_itself():
+    cpu = wram_cpu([0xA9, 0xAA, 0x8D, 0x06, 0x01, 0xA9, 0x00, 0x80, 0xF7], 0x0100)
+
+    cpu.execute_block()
+
+    assert cpu.PC == 0x0105
+
+    cpu.execute_block()
+
+    assert cpu.A == 0xAA
+    assert cpu.PC == 0x0100
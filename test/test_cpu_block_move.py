@@ -0,0 +1,137 @@
+from pysnes.cpu import CPU65816
+from pysnes.test.mocks import ZeroedMemoryMock, mapped_memory
+
+# .../PySNES/venv/$ py.test pysnes/test/
+
+
+# only read and write, every byte goes through the memory mapper
+class ByteByByteMemory(object):
+    def __init__(self, memory):
+        self.memory = memory
+        self.header = memory.header
+
+    def read(self, address):
+        return self.memory.read(address)
+
+    def write(self, address, value):
+        self.memory.write(address, value)
+
+
+def test_MVN_byte_by_byte():
+    mem = ZeroedMemoryMock([0x54, 0x7E, 0x12])  # MVN $12, $7E
+    for i in range(4):
+        mem.write(0x121000 + i, i + 1)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00000000
+    cpu.A = 3
+    cpu.X = 0x1000
+    cpu.Y = 0x2000
+
+    cpu.fetch_decode_execute()
+
+    assert [mem.read(0x7E2000 + i) for i in range(4)] == [1, 2, 3, 4]
+    assert cpu.A == 0xFFFF
+    assert cpu.X == 0x1004
+    assert cpu.Y == 0x2004
+    assert cpu.DBR == 0x7E
+    assert cpu.cycles == 4 * 7
+    assert cpu.PC == 3 + mem.header.reset_int_addr
+
+
+def test_MVP_byte_by_byte():
+    mem = ZeroedMemoryMock([0x44, 0x7E, 0x12])  # MVP $12, $7E
+    for i in range(4):
+        mem.write(0x121000 + i, i + 1)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00000000
+    cpu.A = 3
+    cpu.X = 0x1003
+    cpu.Y = 0x2003
+
+    cpu.fetch_decode_execute()
+
+    assert [mem.read(0x7E2000 + i) for i in range(4)] == [1, 2, 3, 4]
+    assert cpu.X == 0x0FFF
+    assert cpu.Y == 0x1FFF
+
+
+def mapped_cpu(code, A, X, Y, P=0b00000000):
+    memory = mapped_memory(code)
+    for i in range(0x100):
+        memory.mapper.RAM[0x1000 + i] = i
+        memory.mapper.ROM[0x4000 + i] = 0xFF - i
+    cpu = CPU65816(memory)
+    cpu.e = 0
+    cpu.P = P
+    cpu.A, cpu.X, cpu.Y = A, X, Y
+    return cpu
+
+
+# runs the move once as slice copy and once byte by byte
+def compare_move(code, A, X, Y, P=0b00000000):
+    cpu = mapped_cpu(code, A, X, Y, P)
+    reference = mapped_cpu(code, A, X, Y, P)
+    reference.memory = ByteByByteMemory(reference.memory)
+
+    cpu.fetch_decode_execute()
+    reference.fetch_decode_execute()
+
+    assert cpu.memory.mapper.RAM == reference.memory.memory.mapper.RAM
+    assert (cpu.A, cpu.X, cpu.Y, cpu.DBR, cpu.cycles) == \
+        (reference.A, reference.X, reference.Y, reference.DBR, reference.cycles)
+    return cpu
+
+
+def test_MVN_slice_copy():
+    cpu = compare_move([0x54, 0x7E, 0x00], 0x7F, 0x1000, 0x3000)  # MVN $00, $7E
+
+    assert cpu.memory.mapper.RAM[0x3000:0x3080] == list(range(0x80))
+
+
+def test_MVN_from_ROM():
+    cpu = compare_move([0x54, 0x7E, 0x00], 0x0F, 0xC000, 0x0200)  # MVN $00, $7E
+
+    assert cpu.memory.mapper.RAM[0x0200:0x0210] == [0xFF - i for i in range(0x10)]
+
+
+# the classic fill: MVN from X to X+1 repeats the first byte
+def test_MVN_overlapping_fills():
+    cpu = compare_move([0x54, 0x7E, 0x7E], 0x40, 0x1005, 0x1006)
+
+    assert cpu.memory.mapper.RAM[0x1005:0x1047] == [5] * 0x42
+
+
+def test_MVN_overlapping_with_distance():
+    compare_move([0x54, 0x7E, 0x7E], 0x40, 0x1000, 0x1003)
+
+
+def test_MVP_overlapping():
+    compare_move([0x44, 0x7E, 0x7E], 0x40, 0x1080, 0x107E)
+    compare_move([0x44, 0x7E, 0x7E], 0x40, 0x1080, 0x1083)
+
+
+def test_MVN_low_WRAM_mirror():
+    compare_move([0x54, 0x00, 0x7E], 0x20, 0x1000, 0x1010)  # MVN $7E, $00
+
+
+# X and Y wrap around in 8 bit index mode
+def test_MVN_wrapping_index():
+    compare_move([0x54, 0x7E, 0x7E], 0x20, 0x00F0, 0x0080, P=0b00010000)
+
+
+def test_MVN_into_cached_code():
+    cpu = mapped_cpu([0x54, 0x7E, 0x00, 0x80, 0xFB], 0, 0x1000, 0x0100, P=0b00100000)
+    cpu.PBR = 0x7E
+    cpu.PC = 0x0100
+    cpu.memory.mapper.RAM[0x0100:0x0105] = [0xA9, 0x01, 0x80, 0xFC, 0]  # LDA #$01, BRA $0100
+    cpu.execute_block()
+    assert cpu.block_cache.blocks
+
+    cpu.PBR = 0
+    cpu.PC = 0x8000
+    cpu.A = 1
+    cpu.fetch_decode_execute()  # MVN $00, $7E: copies 0x00, 0x01 over LDA #$01
+
+    assert not cpu.block_cache.blocks
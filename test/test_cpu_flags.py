@@ -338,4 +338,57 @@ def test_XCE2():
     assert cpu.Y == 0x0078
     assert cpu.SP == 0x0101
     assert cpu.cycles == 2
-    assert cpu.PC == 1 + mem.header.reset_int_addr
\ No newline at end of file
+    assert cpu.PC == 1 + mem.header.reset_int_addr
+
+# N and Z are kept lazily (see compute_NZflags), P packs them on read
+def test_P_round_trip():
+    cpu = CPU65816(MemoryMock([]))
+    for value in range(256):
+        cpu.P = value
+        assert cpu.P == value
+
+
+def test_NZ_set_and_clear():
+    cpu = CPU65816(MemoryMock([]))
+    cpu.P = 0b00000000
+
+    cpu.setN()
+    cpu.setZ()
+    assert cpu.P == 0b10000010
+
+    cpu.clearN()
+    assert cpu.P == 0b00000010
+
+    cpu.setN()
+    cpu.clearZ()
+    assert cpu.P == 0b10000000
+
+    cpu.compute_NZflags(0x8000, True)
+    assert cpu.P == 0b00000010
+
+    cpu.compute_NZflags(0x0080, True)
+    assert cpu.P == 0b10000000
+
+
+# LDA #$80, PHP
+def test_PHP_after_LDA():
+    mem = MemoryMock([0xA9, 0x80, 0x08])
+    cpu = CPU65816(mem)
+    cpu.P = 0b00110010
+    cpu.SP = 0x1FF
+
+    cpu.fetch_decode_execute()
+    cpu.fetch_decode_execute()
+
+    assert mem.read(0x1FF) == 0b10110000
+
+
+def test_P_unpacks_into_flags():
+    cpu = CPU65816(MemoryMock([]))
+    cpu.e = 0
+
+    cpu.P = 0b01101001
+
+    assert (cpu.flag_v, cpu.flag_m, cpu.flag_x, cpu.flag_d, cpu.flag_i, cpu.flag_c) == (1, 1, 0, 1, 0, 1)
+    assert not cpu.isN()
+    assert not cpu.isZ()
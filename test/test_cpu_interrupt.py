@@ -0,0 +1,164 @@
+from pysnes.cpu import CPU65816, StopReason
+from pysnes.test.mocks import ZeroedMemoryMock
+
+# .../PySNES/venv/$ py.test pysnes/test/
+
+
+def test_BRK_native():
+    ROM = [0x00, 0x42]
+    mem = ZeroedMemoryMock(ROM)
+    mem.write(0x00FFE6, 0x00)  # native BRK vector
+    mem.write(0x00FFE7, 0x90)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00001001  # decimal, carry
+    cpu.PBR = 0x00
+    cpu.SP = 0x1FF
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.PBR == 0x00
+    assert cpu.PC == 0x9000
+    assert cpu.SP == 0x1FB
+    assert mem.read(0x1FF) == 0x00  # PBR
+    assert mem.read(0x1FE) == 0x80  # return address after the signature byte
+    assert mem.read(0x1FD) == 0x02
+    assert mem.read(0x1FC) == 0b00001001  # P
+    assert cpu.P == 0b00000101  # I set, D cleared
+    assert cpu.cycles == 8
+
+
+def test_COP_emulation():
+    ROM = [0x02, 0x00]
+    mem = ZeroedMemoryMock(ROM)
+    mem.write(0x00FFF4, 0x34)  # emulation COP vector
+    mem.write(0x00FFF5, 0x12)
+    cpu = CPU65816(mem)
+    cpu.P = 0b00110000
+    cpu.SP = 0x1FF
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.PC == 0x1234
+    assert cpu.SP == 0x1FC  # no PBR in emulation mode
+    assert mem.read(0x1FF) == 0x80
+    assert mem.read(0x1FE) == 0x02
+    assert mem.read(0x1FD) == 0b00110000  # P with the B flag
+    assert cpu.cycles == 7
+
+
+def test_BRK_RTI_native():
+    ROM = [0x00, 0x00, 0xEA]  # BRK, NOP
+    mem = ZeroedMemoryMock(ROM)
+    mem.write(0x00FFE6, 0x00)
+    mem.write(0x00FFE7, 0x90)
+    mem.write(0x009000, 0x40)  # RTI
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00100001  # 8 bit A, carry
+    cpu.SP = 0x1FF
+
+    cpu.fetch_decode_execute()
+    cpu.fetch_decode_execute()
+
+    assert cpu.PC == 0x8002
+    assert cpu.PBR == 0x00
+    assert cpu.SP == 0x1FF
+    assert cpu.P == 0b00100001
+    assert cpu.cycles == 8 + 7
+
+
+def test_RTI_native_bank():
+    ROM = [0x40]  # RTI
+    mem = ZeroedMemoryMock(ROM)
+    mem.write(0x1FD, 0b00110000)  # P
+    mem.write(0x1FE, 0x56)  # PC
+    mem.write(0x1FF, 0x34)
+    mem.write(0x200, 0x12)  # PBR
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00000000
+    cpu.SP = 0x1FC
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.PBR == 0x12
+    assert cpu.PC == 0x3456
+    assert cpu.P == 0b00110000
+    assert cpu.SP == 0x200
+
+
+def test_NMI_native():
+    ROM = [0xEA]  # NOP
+    mem = ZeroedMemoryMock(ROM)
+    mem.write(0x00FFEA, 0x00)  # native NMI vector
+    mem.write(0x00FFEB, 0x90)
+    mem.write(0x009000, 0x40)  # RTI
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00001000  # decimal
+    cpu.PBR = 0x00
+    cpu.SP = 0x1FF
+
+    cpu.nmi()
+    cpu.run(9)  # the NMI is taken before the first instruction, then RTI runs
+
+    assert not cpu.nmi_pending
+    assert mem.read(0x1FE) == 0x80  # return address: the interrupted instruction
+    assert mem.read(0x1FD) == 0x00
+    assert mem.read(0x1FC) == 0b00001000
+    assert cpu.PC == 0x8000  # RTI is back
+    assert cpu.P == 0b00001000
+    assert cpu.cycles == 8 + 7
+
+
+def test_IRQ_emulation_pushes_B_clear():
+    ROM = [0xEA]  # NOP
+    mem = ZeroedMemoryMock(ROM)
+    mem.write(0x00FFFE, 0x00)  # emulation IRQ vector
+    mem.write(0x00FFFF, 0x90)
+    cpu = CPU65816(mem)
+    cpu.P = 0b00110000
+    cpu.SP = 0x1FF
+
+    cpu.irq()
+    cpu.service_interrupts()
+
+    assert cpu.PC == 0x9000
+    assert cpu.SP == 0x1FC
+    assert mem.read(0x1FD) == 0b00100000  # B flag clear
+    assert cpu.P == 0b00110100
+    assert cpu.cycles == 7
+
+
+def test_masked_IRQ_wakes_up_WAI():
+    ROM = [0xCB, 0xE8, 0xDB]  # WAI, INX, STP
+    mem = ZeroedMemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00110100  # IRQs disabled
+    cpu.SP = 0x1FF
+
+    cpu.run(100)
+    assert cpu.waiting
+    assert cpu.X == 0
+
+    cpu.irq()
+    cpu.run(2)
+
+    assert not cpu.waiting
+    assert cpu.X == 1  # continues behind WAI, no handler
+    assert cpu.SP == 0x1FF
+
+
+def test_STP_ignores_interrupts():
+    ROM = [0xDB]  # STP
+    mem = ZeroedMemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+
+    cpu.run(10)
+    cpu.nmi()
+
+    assert cpu.run(10) == StopReason.STOPPED
+    assert cpu.PC == 0x8001
@@ -0,0 +1,137 @@
+from pysnes.cpu import CPU65816
+from pysnes.memory import MemoryMapper
+from pysnes.test.mocks import mapped_memory
+
+# .../PySNES/venv/$ py.test pysnes/test/
+
+# counts the accesses which go through the memory mapper
+class CountingMapper(MemoryMapper):
+    def __init__(self, *args):
+        MemoryMapper.__init__(self, *args)
+        self.reads = 0
+        self.writes = 0
+
+    def read(self, address):
+        self.reads += 1
+        return MemoryMapper.read(self, address)
+
+    def write(self, address, value):
+        self.writes += 1
+        MemoryMapper.write(self, address, value)
+
+
+def mapped_cpu(code, start=0x8000, bank=0x00):
+    cpu = CPU65816(mapped_memory(code, start, bank, CountingMapper))
+    cpu.e = 0
+    cpu.P = 0b00110000
+    cpu.PBR = bank
+    cpu.PC = start
+    cpu.SP = 0x1FFF
+    return cpu
+
+
+# LDA #$42, STA $10, PHA, LDA $10, PLA, STZ $11
+def test_direct_page_and_stack_bypass_the_mapper():
+    cpu = mapped_cpu([0xA9, 0x42, 0x85, 0x10, 0x48, 0xA5, 0x10, 0x68, 0x64, 0x11])
+
+    for i in range(6):
+        cpu.fetch_decode_execute()
+
+    assert cpu.A == 0x42
+    assert cpu.SP == 0x1FFF
+    assert cpu.memory.mapper.RAM[0x10] == 0x42
+    assert cpu.memory.mapper.RAM[0x1FFF] == 0x42
+    assert cpu.memory.writes == 0
+    assert cpu.memory.reads == 0
+
+
+def test_16bit_accesses():
+    cpu = mapped_cpu([])
+
+    cpu.write_memory(0x1FFE, 0xBEEF, 2)
+
+    assert cpu.memory.mapper.RAM[0x1FFE:0x2000] == [0xEF, 0xBE]
+    assert cpu.read_memory(0x1FFE, 2) == 0xBEEF
+    assert cpu.read_memory(0x001FFE, 3) == 0x00BEEF
+    assert cpu.memory.reads == 3  # 00:2000 is outside of the low WRAM, all three go to the mapper
+
+
+# LDA #$01, BRA $0100 in WRAM: 00:0101 is the same byte as 7E:0101
+def test_write_to_code_page_invalidates_the_block():
+    cpu = mapped_cpu([0xA9, 0x01, 0x80, 0xFC], start=0x0100, bank=0x7E)
+
+    cpu.execute_block()
+    assert cpu.A == 0x01
+
+    cpu.write_memory(0x000101, 0x05, 1)
+    cpu.execute_block()
+
+    assert cpu.memory.writes == 1
+    assert cpu.A == 0x05
+
+
+def test_watchpoint_sees_stack_writes():
+    cpu = mapped_cpu([0x48])  # PHA
+
+    cpu.add_watchpoint(0x1FFF)
+    cpu.fetch_decode_execute()
+
+    assert cpu.memory.hit == 0x1FFF
+    assert cpu.memory.memory.writes == 1
+
+    cpu.remove_watchpoint(0x1FFF)
+    assert cpu.low_wram is cpu.memory.mapper.RAM
+
+
+# LDA $3000, STA $3002 with 16 bit A outside of the low WRAM
+def test_16bit_accesses_are_one_mapper_call():
+    cpu = mapped_cpu([0xAD, 0x00, 0x30, 0x8D, 0x02, 0x30])
+    cpu.P = 0b00000000
+    cpu.DBR = 0x7E
+    cpu.memory.mapper.RAM[0x3000:0x3002] = [0x34, 0x12]
+
+    cpu.fetch_decode_execute()
+    cpu.fetch_decode_execute()
+
+    assert cpu.A == 0x1234
+    assert cpu.memory.mapper.RAM[0x3002:0x3004] == [0x34, 0x12]
+    assert cpu.memory.reads == 0  # read16 and write16 instead of read and write for every byte
+    assert cpu.memory.writes == 0
+
+
+# LDA #$42, STA $10, INC $10
+def test_fork_has_its_own_WRAM():
+    cpu = mapped_cpu([0xA9, 0x42, 0x85, 0x10, 0xE6, 0x10])
+    cpu.fetch_decode_execute()
+    cpu.fetch_decode_execute()
+
+    fork = cpu.fork()
+    assert fork.get_state() == cpu.get_state()
+    fork.fetch_decode_execute()
+
+    assert fork.read_memory(0x10, 1) == 0x43
+    assert cpu.read_memory(0x10, 1) == 0x42
+    assert fork.low_wram is not None  # the page was copied, the direct access works again
+    cpu.fetch_decode_execute()
+    cpu.write_memory(0x10, 0x00, 1)
+    assert fork.read_memory(0x10, 1) == 0x43
+    assert cpu.memory.mapper.RAM[0x10] == 0x42
+
+
+# LDA #$01, STP in SRAM, then the operand is changed to $05
+def test_SRAM_code_is_not_cached():
+    cpu = mapped_cpu([])
+    cpu.memory.mapper.SRAM[0:3] = [0xA9, 0x01, 0xDB]
+    cpu.PBR = 0x70
+    cpu.PC = 0x0000
+
+    cpu.execute_block()
+    assert cpu.A == 0x01
+
+    cpu.write_memory(0x700001, 0x05, 1)
+    cpu.PC = 0x0000
+    cpu.stopped = False
+    cpu.execute_block()
+
+    assert cpu.A == 0x05
+    assert cpu.block_cache.blocks == {}
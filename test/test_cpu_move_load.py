@@ -86,6 +86,21 @@ def test_LDA_const8Bit():
     assert cpu.PC == 2 + mem.header.reset_int_addr
 
 
+def test_LDA_const8Bit_keeps_B():
+    mem = MemoryMock([0xA9, 0x56])
+    cpu = CPU65816(mem)
+    cpu.P = 0b00100000 # 8 Bit mode
+    cpu.e = 0
+    cpu.A = 0x1234
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.cycles == 2
+    assert cpu.A == 0x1256  # the high byte (B) is not loaded
+    assert cpu.P == 0b00100000
+    assert cpu.PC == 2 + mem.header.reset_int_addr
+
+
 def test_LDA_DP():
     mem = MemoryMock([0xA5, 0x34])
     cpu = CPU65816(mem)
@@ -1545,4 +1560,49 @@ def test_TYX_X():
     assert cpu.Y == 0x1234
     assert cpu.X == 0xAB34
     assert cpu.P == 0b00010000 # x
-    assert cpu.PC == 1 + mem.header.reset_int_addr
\ No newline at end of file
+    assert cpu.PC == 1 + mem.header.reset_int_addr
+
+def test_LDA_absolute_indexed_X_page_crossing():
+    for base, cycles in ((0x12F0, 4), (0x12FF, 5)):
+        mem = MemoryMock([0xBD, base & 0xFF, base >> 8])  # LDA $12F0, X / LDA $12FF, X
+        cpu = CPU65816(mem)
+        cpu.P = 0b00110000  # 8 Bit A and index registers
+        cpu.e = 0
+        cpu.X = 0x01
+        mem.write(base + 1, 0xAB)
+
+        cpu.fetch_decode_execute()
+
+        assert cpu.A == 0xAB
+        assert cpu.cycles == cycles
+
+
+def test_LDA_absolute_indexed_X_16bit_index():
+    mem = MemoryMock([0xBD, 0xF0, 0x12])  # LDA $12F0, X
+    cpu = CPU65816(mem)
+    cpu.P = 0b00100000  # 8 Bit A, 16 Bit index registers
+    cpu.e = 0
+    cpu.X = 0x0001
+    mem.write(0x12F1, 0xAB)
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.A == 0xAB
+    assert cpu.cycles == 5  # always one more cycle, crossing or not
+
+
+def test_LDA_DP_indirect_indexed_Y_page_crossing():
+    for pointer, cycles in ((0x12F0, 5), (0x12FF, 6)):
+        mem = MemoryMock([0xB1, 0x10])  # LDA ($10), Y
+        cpu = CPU65816(mem)
+        cpu.P = 0b00110000  # 8 Bit A and index registers
+        cpu.e = 0
+        cpu.Y = 0x01
+        mem.write(0x10, pointer & 0xFF)
+        mem.write(0x11, pointer >> 8)
+        mem.write(pointer + 1, 0xAB)
+
+        cpu.fetch_decode_execute()
+
+        assert cpu.A == 0xAB
+        assert cpu.cycles == cycles
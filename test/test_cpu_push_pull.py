@@ -456,3 +456,29 @@ def test_PLB():
     assert cpu.SP == 0x01FF
     assert cpu.cycles == 4
     assert cpu.PC == 1 + mem.header.reset_int_addr
+
+
+def test_stack_trace_is_off_by_default():
+    mem = MemoryMock([0xF4, 0x34, 0x12])  # PEA $1234
+    cpu = CPU65816(mem)
+    cpu.SP = 0x01FF
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.stack is None
+
+
+# PHA, PHA, PLA in 8 bit mode
+def test_stack_trace_keeps_recent_operations():
+    mem = MemoryMock([0x48, 0x48, 0x68])
+    cpu = CPU65816(mem)
+    cpu.SP = 0x01FF
+    cpu.P = 0b00100000
+    cpu.A = 0x42
+    cpu.trace_stack(2)
+
+    cpu.fetch_decode_execute()
+    cpu.fetch_decode_execute()
+    cpu.fetch_decode_execute()
+
+    assert list(cpu.stack) == [('push', 0x01FE, 0x42), ('pull', 0x01FE, 0x42)]
@@ -0,0 +1,149 @@
+from pysnes.block_cache import RECOMPILE_THRESHOLD
+from pysnes.cpu import CPU65816
+from pysnes.recompiler import recompiler_for
+from pysnes.test.mocks import ZeroedMemoryMock, mapped_memory
+
+# .../PySNES/venv/$ py.test pysnes/test/
+
+
+def make_cpu(code, P, e=1, recompile_threshold=RECOMPILE_THRESHOLD):
+    cpu = CPU65816(ZeroedMemoryMock(code), recompile_threshold)
+    cpu.e = e
+    cpu.P = P
+    return cpu
+
+
+def registers(cpu):
+    return (cpu.A, cpu.X, cpu.Y, cpu.SP, cpu.DP, cpu.DBR, cpu.PBR, cpu.PC, cpu.P, cpu.cycles)
+
+
+# runs the block at the PC once interpreted and once recompiled
+def run_both(interpreted, recompiled):
+    block = interpreted.block_cache.lookup(interpreted)
+    block.execute(interpreted)
+    function = recompiler_for(CPU65816).compile_block(recompiled.block_cache.lookup(recompiled))
+    function(recompiled)
+    assert registers(recompiled) == registers(interpreted)
+
+
+def compare(code, P, e=1, setup=None):
+    interpreted = make_cpu(code, P, e)
+    recompiled = make_cpu(code, P, e)
+    for cpu in (interpreted, recompiled):
+        if setup is not None:
+            setup(cpu)
+    run_both(interpreted, recompiled)
+    assert recompiled.memory.ram == interpreted.memory.ram
+
+
+# LDA #$12, INX, INY, BNE $8000
+def test_recompiled_block_matches_interpreter():
+    compare([0xA9, 0x12, 0xE8, 0xC8, 0xD0, 0xFA], 0b00110000)
+
+
+# CLC, LDA $10, ADC #$01, STA $10, BCC $8000 with the direct page at $0200
+def test_recompiled_block_with_memory_access():
+    def setup(cpu):
+        cpu.DP = 0x0201
+        cpu.memory.write(0x0211, 0xFF)
+    compare([0x18, 0xA5, 0x10, 0x69, 0x01, 0x85, 0x10, 0x90, 0xF7], 0b00110000, setup=setup)
+
+
+# LDA #$1234, STA $0300,X, DEX, BPL $8000 in native mode with 16 bit registers
+def test_recompiled_block_16_bit():
+    def setup(cpu):
+        cpu.X = 0x0004
+    compare([0xA9, 0x34, 0x12, 0x9D, 0x00, 0x03, 0xCA, 0x10, 0xF7], 0b00000000, e=0, setup=setup)
+
+
+# LDA #$01, JSR $9000
+def test_recompiled_block_ending_with_jump():
+    compare([0xA9, 0x01, 0x20, 0x00, 0x90], 0b00110000)
+
+
+# CLC, LDA $10, ADC #$01, STA $10, STA $7E2100,X, STA $0300,X, INX, BNE $2000
+# in WRAM at $7E:2000, on the MemoryMapper
+def test_recompiled_WRAM_block_matches_interpreter():
+    code = [0x18, 0xA5, 0x10, 0x69, 0x01, 0x85, 0x10, 0x9F, 0x00, 0x21, 0x7E,
+            0x9D, 0x00, 0x03, 0xE8, 0xD0, 0xEF]
+    cpus = []
+    for i in range(2):
+        cpu = CPU65816(mapped_memory(code, 0x2000, 0x7E))
+        cpu.e = 0
+        cpu.P = 0b00110000
+        cpu.PBR = 0x7E
+        cpu.PC = 0x2000
+        cpu.X = 0xFE
+        cpu.write_memory(0x10, 0xFF, 1)
+        cpus.append(cpu)
+    interpreted, recompiled = cpus
+
+    for i in range(2):
+        run_both(interpreted, recompiled)
+
+    assert interpreted.PC == 0x2011  # BNE fell through after X wrapped to 0
+    assert interpreted.block_cache.lookup(interpreted).pages
+    assert recompiled.memory.mapper.RAM == interpreted.memory.mapper.RAM
+    assert interpreted.memory.mapper.RAM[0x21FE:0x2200] == [0x00, 0x01]
+    assert interpreted.memory.mapper.RAM[0x03FE:0x0400] == [0x00, 0x01]
+
+
+def test_hot_block_is_recompiled():
+    cpu = make_cpu([0xE8, 0xC8, 0x80, 0xFC], 0b00110000, recompile_threshold=3)  # INX, INY, BRA $8000
+
+    for i in range(3):
+        cpu.execute_block()
+    block = cpu.block_cache.lookup(cpu)
+
+    assert block.run != block.execute
+    cpu.execute_block()
+
+    assert block.executions == 3
+    assert cpu.X == 4
+    assert cpu.Y == 4
+    assert cpu.PC == 0x8000
+
+
+def test_recompiling_can_be_disabled():
+    cpu = make_cpu([0xE8, 0xC8, 0x80, 0xFC], 0b00110000, recompile_threshold=None)
+
+    for i in range(100):
+        cpu.execute_block()
+    block = cpu.block_cache.lookup(cpu)
+
+    assert block.run == block.execute
+    assert block.executions == 100
+    assert cpu.X == 100
+    assert cpu.block_cache.recompile_threshold is None
+
+
+def test_hot_sequences_are_fused():
+    code = [0xE8, 0xC8, 0x0A, 0x0A, 0x80, 0xFA]  # INX, INY, ASL A, ASL A, BRA $8000
+    fused = make_cpu(code, 0b00110000, recompile_threshold=None)
+    plain = make_cpu(code, 0b00110000, recompile_threshold=None)
+    for cpu in (fused, plain):
+        cpu.A = 0x01
+        for i in range(10):
+            cpu.execute_block()
+
+    fused.fuse_hot_sequences(count=1)
+    block = fused.block_cache.lookup(fused)
+
+    assert len(fused.block_cache.fused) == 1
+    assert len(block.steps) < len(block.instructions)
+    for cpu in (fused, plain):
+        for i in range(10):
+            cpu.execute_block()
+    assert registers(fused) == registers(plain)
+
+
+def test_wram_blocks_are_not_fused():
+    cpu = make_cpu([0xE8, 0xC8, 0x80, 0xFC], 0b00110000, recompile_threshold=None)  # INX, INY, BRA $8000
+    cpu.execute_block()
+    block = cpu.block_cache.lookup(cpu)
+    block.pages = (0x00,)
+
+    assert cpu.block_cache.sequence_profile() == {}
+    cpu.fuse_hot_sequences()
+
+    assert block.steps is block.instructions
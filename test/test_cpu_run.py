@@ -0,0 +1,174 @@
+from pysnes.cpu import CPU65816, StopReason
+from pysnes import timing
+from pysnes.test.mocks import MemoryMock
+
+# .../PySNES/venv/$ py.test pysnes/test/
+
+
+# INX, INY, STX $10, BRA $8000
+LOOP = [0xE8, 0xC8, 0x86, 0x10, 0x80, 0xFA]
+
+
+def make_cpu():
+    cpu = CPU65816(MemoryMock(LOOP))
+    cpu.P = 0b00110000
+    return cpu
+
+
+def test_run_stops_after_cycles():
+    cpu = make_cpu()
+
+    reason = cpu.run(1000)
+
+    assert reason == StopReason.CYCLES
+    assert 1000 <= cpu.cycles < 1000 + 12
+
+
+def test_run_matches_single_steps():
+    cpu = make_cpu()
+    stepped = make_cpu()
+
+    cpu.run(500)
+    while stepped.cycles < cpu.cycles:
+        stepped.fetch_decode_execute()
+
+    assert cpu.cycles == stepped.cycles
+    assert cpu.PC == stepped.PC
+    assert cpu.X == stepped.X
+    assert cpu.Y == stepped.Y
+
+
+def test_run_until_stops_inside_a_block():
+    cpu = make_cpu()
+
+    reason = cpu.run_until(0x8002)
+
+    assert reason == StopReason.PC
+    assert cpu.PC == 0x8002
+    assert cpu.X == 1
+    assert cpu.Y == 1
+
+    reason = cpu.run_until(0x8002)
+
+    assert reason == StopReason.PC
+    assert cpu.X == 2
+
+
+def test_run_until_gives_up_after_max_cycles():
+    cpu = make_cpu()
+
+    reason = cpu.run_until(0x9000, max_cycles=100)
+
+    assert reason == StopReason.CYCLES
+
+
+def test_breakpoint():
+    cpu = make_cpu()
+    cpu.run(100)
+    x = cpu.X
+    cpu.add_breakpoint(0x8001)
+
+    reason = cpu.run(1000)
+
+    assert reason == StopReason.BREAKPOINT
+    assert cpu.PC == 0x8001
+    assert cpu.X == (x + 1) & 0xFF
+    assert cpu.Y == x
+
+    # continues behind the breakpoint
+    reason = cpu.run(1000)
+
+    assert reason == StopReason.BREAKPOINT
+    assert cpu.X == (x + 2) & 0xFF
+
+    cpu.remove_breakpoint(0x8001)
+
+    assert cpu.run(1000) == StopReason.CYCLES
+
+
+def test_watchpoint():
+    cpu = make_cpu()
+    cpu.add_watchpoint(0x10)
+
+    reason = cpu.run(1000)
+
+    assert reason == StopReason.WATCHPOINT
+    assert cpu.watchpoint_hit == 0x10
+    assert cpu.PC == 0x8004
+    assert cpu.memory.read(0x10) == 1
+
+    cpu.remove_watchpoint(0x10)
+
+    assert cpu.run(1000) == StopReason.CYCLES
+    assert not hasattr(cpu.memory, 'hit')
+
+
+def test_run_frames():
+    cpu = make_cpu()
+
+    reason = cpu.run_frames(2)
+
+    assert reason == StopReason.CYCLES
+    assert cpu.cycles // timing.CYCLES_PER_FRAME == 2
+
+
+# LDA $10, BEQ $8000 waits for $10 to change
+def test_idle_loop_is_skipped():
+    mem = MemoryMock([0xA5, 0x10, 0xF0, 0xFC])
+    mem.write(0x10, 0)
+    cpu = CPU65816(mem)
+    cpu.P = 0b00110000
+    stepped = CPU65816(mem)
+    stepped.P = 0b00110000
+
+    cpu.run(100000)
+    while stepped.cycles < cpu.cycles:
+        stepped.fetch_decode_execute()
+
+    assert cpu.block_cache.lookup(cpu).idle
+    assert cpu.cycles == stepped.cycles
+    assert cpu.PC == stepped.PC
+    assert cpu.A == stepped.A
+
+
+# LDA $10, INX, BEQ $8000 changes X on every run
+def test_loop_changing_registers_is_not_idle():
+    mem = MemoryMock([0xA5, 0x10, 0xE8, 0xF0, 0xFB])
+    cpu = CPU65816(mem)
+
+    assert not cpu.block_cache.lookup(cpu).idle
+
+
+# LDA #$01, WAI, LDA #$02
+def test_WAI_sleeps_until_the_end_of_the_run():
+    cpu = CPU65816(MemoryMock([0xA9, 0x01, 0xCB, 0xA9, 0x02]))
+    cpu.P = 0b00110000
+
+    reason = cpu.run(1000)
+
+    assert reason == StopReason.CYCLES
+    assert cpu.cycles == 1000
+    assert cpu.waiting
+    assert cpu.PC == 0x8003
+    assert cpu.A == 0x01
+
+
+def test_WAI_without_cycle_limit():
+    cpu = CPU65816(MemoryMock([0xCB]))
+
+    reason = cpu.run_until(0x9000)
+
+    assert reason == StopReason.WAITING
+    assert cpu.cycles == 3
+
+
+# STP, LDA #$02
+def test_STP():
+    cpu = CPU65816(MemoryMock([0xDB, 0xA9, 0x02]))
+
+    reason = cpu.run(1000)
+
+    assert reason == StopReason.STOPPED
+    assert cpu.stopped
+    assert cpu.cycles == 3
+    assert cpu.A == 0
@@ -0,0 +1,110 @@
+from pysnes.cpu import CPU65816
+from pysnes.test.mocks import MemoryMock
+
+# .../PySNES/venv/$ py.test pysnes/test/
+
+
+def test_SBC_imm_8bit():
+    ROM = [0xE9, 0x10]
+    mem = MemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00100001  # 8 Bit mode, carry set: no borrow
+    cpu.A = 0x1250
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.cycles == 2
+    assert cpu.A == 0x1240  # B is not changed
+    assert cpu.P == 0b00100001  # no borrow
+    assert cpu.PC == 2 + mem.header.reset_int_addr
+
+
+def test_SBC_imm_borrow_8bit():
+    ROM = [0xE9, 0x01]
+    mem = MemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00100000  # 8 Bit mode, carry clear: borrow
+    cpu.A = 0x01
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.A == 0xFF
+    assert cpu.P == 0b10100000  # negative, borrow (carry clear)
+
+
+def test_SBC_imm_overflow_8bit():
+    ROM = [0xE9, 0x01]
+    mem = MemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00100001
+    cpu.A = 0x80  # -128 - 1
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.A == 0x7F
+    assert cpu.P == 0b01100001  # overflow, no borrow
+
+
+def test_SBC_imm_zero_16bit():
+    ROM = [0xE9, 0x34, 0x12]
+    mem = MemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00000001  # 16 Bit mode
+    cpu.A = 0x1234
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.cycles == 3
+    assert cpu.A == 0x0000
+    assert cpu.P == 0b00000011  # zero, no borrow
+    assert cpu.PC == 3 + mem.header.reset_int_addr
+
+
+def test_SBC_abs_16bit():
+    ROM = [0xED, 0x00, 0x10]
+    mem = MemoryMock(ROM)
+    mem.write(0x7E1000, 0x01)
+    mem.write(0x7E1001, 0x80)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00000001
+    cpu.DBR = 0x7E
+    cpu.A = 0x0000
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.cycles == 5
+    assert cpu.A == 0x7FFF
+    assert cpu.P == 0b00000000  # borrow, no overflow
+
+
+def test_SBC_imm_decimal_8bit():
+    ROM = [0xE9, 0x15]
+    mem = MemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00101001  # 8 Bit mode, decimal, no borrow
+    cpu.A = 0x42
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.A == 0x27
+    assert cpu.P == 0b00101001
+
+
+def test_SBC_imm_decimal_borrow_16bit():
+    ROM = [0xE9, 0x01, 0x00]
+    mem = MemoryMock(ROM)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00001001  # 16 Bit mode, decimal, no borrow
+    cpu.A = 0x0000
+
+    cpu.fetch_decode_execute()
+
+    assert cpu.A == 0x9999
+    assert cpu.P == 0b10001000  # negative, borrow
@@ -0,0 +1,70 @@
+from pysnes.cpu import CPU65816
+from pysnes.test.mocks import MemoryMock
+
+# .../PySNES/venv/$ py.test pysnes/test/
+
+
+def test_ASL_dp_8bit():
+    ROM = [0x06, 0x10]
+    mem = MemoryMock(ROM)
+    mem.write(0x000010, 0x81)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00100000  # 8 Bit mode
+
+    cpu.fetch_decode_execute()
+
+    assert mem.read(0x000010) == 0x02
+    assert cpu.P == 0b00100001  # carry
+    assert cpu.cycles == 5
+    assert cpu.PC == 2 + mem.header.reset_int_addr
+
+
+def test_ROL_abs_16bit():
+    ROM = [0x2E, 0x00, 0x10]
+    mem = MemoryMock(ROM)
+    mem.write(0x001000, 0x00)
+    mem.write(0x001001, 0x40)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00000001  # 16 Bit mode, carry set
+
+    cpu.fetch_decode_execute()
+
+    assert mem.read(0x001000) == 0x01
+    assert mem.read(0x001001) == 0x80
+    assert cpu.P == 0b10000000  # negative, carry from bit 15
+    assert cpu.cycles == 8
+    assert cpu.PC == 3 + mem.header.reset_int_addr
+
+
+def test_LSR_dp_x_8bit():
+    ROM = [0x56, 0x10]
+    mem = MemoryMock(ROM)
+    mem.write(0x000012, 0x01)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00110000  # 8 Bit mode
+    cpu.X = 0x02
+
+    cpu.fetch_decode_execute()
+
+    assert mem.read(0x000012) == 0x00
+    assert cpu.P == 0b00110011  # zero, carry
+    assert cpu.cycles == 6
+
+
+def test_ROR_abs_x_8bit():
+    ROM = [0x7E, 0x00, 0x10]
+    mem = MemoryMock(ROM)
+    mem.write(0x001004, 0x02)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00110001  # 8 Bit mode, carry set
+    cpu.X = 0x04
+
+    cpu.fetch_decode_execute()
+
+    assert mem.read(0x001004) == 0x81
+    assert cpu.P == 0b10110000  # negative, carry from bit 0
+    assert cpu.cycles == 7
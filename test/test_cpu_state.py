@@ -0,0 +1,53 @@
+from pysnes.cpu import CPU65816
+from pysnes.test.mocks import MemoryMock
+
+# .../PySNES/venv/$ py.test pysnes/test/
+
+
+def registers(cpu):
+    return (cpu.A, cpu.X, cpu.Y, cpu.SP, cpu.DP, cpu.DBR, cpu.PBR, cpu.PC, cpu.P, cpu.e, cpu.cycles)
+
+
+def test_state_round_trip():
+    cpu = CPU65816(MemoryMock([]))
+    cpu.e = 0
+    cpu.P = 0b10100011
+    cpu.A = 0x1234
+    cpu.X = 0x5678
+    cpu.Y = 0x9ABC
+    cpu.SP = 0x1FF0
+    cpu.DP = 0x0300
+    cpu.DBR = 0x7E
+    cpu.PBR = 0x80
+    cpu.PC = 0xC123
+    cpu.cycles = 2 ** 40
+
+    copy = CPU65816(MemoryMock([]))
+    copy.set_state(cpu.get_state())
+
+    assert registers(copy) == registers(cpu)
+    assert copy.mode == cpu.mode
+    assert copy.isM() and not copy.isX()
+
+
+# LDA #$12, INX
+def test_state_restores_execution():
+    mem = MemoryMock([0xA9, 0x12, 0xE8])
+    cpu = CPU65816(mem)
+    cpu.P = 0b00110000
+    state = cpu.get_state()
+
+    cpu.fetch_decode_execute()
+    cpu.fetch_decode_execute()
+    cpu.set_state(state)
+
+    assert cpu.PC == 0x8000
+    assert cpu.A == 0
+    assert cpu.X == 0
+    assert cpu.cycles == 0
+
+
+def test_no_instance_dict():
+    cpu = CPU65816(MemoryMock([]))
+
+    assert not hasattr(cpu, '__dict__')
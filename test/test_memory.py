@@ -1,8 +1,12 @@
 from pysnes.cartrige import CartrigeType
-from pysnes.memory import MemoryMapper
+from pysnes.helper import map_rom
+import pytest
+
+from pysnes.memory import MemoryMapper, CanNotWriteROMException, IllegalAddressExcpetion
+from pysnes.memory import read16_bytewise, read24_bytewise
 
 # .../PySNES/venv/$ py.test pysnes/test/
-RAM  = [0] * (2 ** 17 - 1)  # 128 KB
+RAM  = [0] * 2 ** 17        # 128 KB
 ROM  = [0] * (2 ** 22 - 1)  # 4 MB
 SRAM = [0] * 0x7FFF         # 32 KB
 
@@ -44,4 +48,189 @@ def test_LoROM_RAM():
     assert RAM[0] == mem_map.read(0x7E0000)
     mem_map.write(0x7E0000, 43)
     assert RAM[0] == mem_map.read(0x7E0000)
-    assert RAM[0] == 43
\ No newline at end of file
+    assert RAM[0] == 43
+
+def test_LoROM_code_window():
+    mem_map = MemoryMapper(HeaderMock(), RAM, ROM, SRAM, False, 0x7FFF)
+
+    buffer, base, first, last = mem_map.code_window(0x01)
+    assert buffer is ROM
+    assert (first, last) == (0x8000, 0xFFFF)
+    assert base + 0x8000 == 0x8000  # 01:8000 is ROM[0x8000]
+
+    buffer, base, first, last = mem_map.code_window(0x7E)
+    assert buffer is RAM
+    assert (base, first, last) == (0, 0x0000, 0xFFFF)
+
+    buffer, base, first, last = mem_map.code_window(0x80)
+    assert buffer is ROM
+    assert base + 0x8000 == 0
+
+
+def test_LoROM_code_window_reads_like_the_mapper():
+    mem_map = MemoryMapper(HeaderMock(), RAM, ROM, SRAM, False, 0x7FFF)
+    for bank in (0x00, 0x3F, 0x40, 0x70, 0x7E, 0x7F, 0x80, 0xC0):
+        buffer, base, first, last = mem_map.code_window(bank)
+        for offset in (first, first + 0x1234, last):
+            buffer[base + offset] = (bank + offset) & 0xFF
+            assert mem_map.read((bank << 16) + offset) == (bank + offset) & 0xFF
+
+
+def test_LoROM_low_wram():
+    mem_map = MemoryMapper(HeaderMock(), RAM, ROM, SRAM, False, 0x7FFF)
+    assert mem_map.low_wram() is RAM
+
+
+class HiROMHeaderMock(HeaderMock):
+    def getCartridgeType(self):
+        return CartrigeType.HIROM
+
+
+def test_LoROM_SRAM_mirror_inside_a_page():
+    SRAM = [0] * 0x7FFF
+    mem_map = MemoryMapper(HeaderMock(), RAM, ROM, SRAM, False, 0x7FFF)
+    mem_map.write(0x707FFE, 1)
+    mem_map.write(0x707FFF, 2)  # the mirror starts again
+
+    assert SRAM[0x7FFE] == 1
+    assert SRAM[0] == 2
+    assert mem_map.read(0xF00000) == 2
+    assert mem_map.buffer(0x70, 0x6000, 0x2000, True) is None
+
+
+def test_LoROM_ROM_is_read_only():
+    mem_map = MemoryMapper(HeaderMock(), RAM, ROM, SRAM, True, 0x7FFF)
+    with pytest.raises(CanNotWriteROMException):
+        mem_map.write(0x808000, 1)
+    with pytest.raises(IllegalAddressExcpetion):
+        mem_map.read(0x400000)  # MAD-1: no ROM in the lower half of 0x40 - 0x6F
+
+
+def test_LoROM_buffer_stays_in_one_list():
+    mem_map = MemoryMapper(HeaderMock(), RAM, ROM, SRAM, False, 0x7FFF)
+    assert mem_map.buffer(0x00, 0x1FFF, 2, False) is None  # RAM, then I/O
+    assert mem_map.buffer(0x7E, 0xFFFF, 2, False) is None  # wraps around the bank
+    assert mem_map.buffer(0x00, 0x8000, 0x8000, True) is None  # ROM
+    assert mem_map.buffer(0x81, 0x8000, 0x8000, False) == (ROM, 0x8000)
+
+
+def test_HiROM():
+    ROM = [0] * 2 ** 22
+    SRAM = [0] * 0x4000
+    mem_map = MemoryMapper(HiROMHeaderMock(), RAM, ROM, SRAM, False, 0x4000)
+    ROM[0x018000] = 45
+    ROM[0x3F1234] = 46
+
+    assert mem_map.read(0x018000) == 45
+    assert mem_map.read(0xC18000) == 45
+    assert mem_map.read(0xFF1234) == 46
+    mem_map.write(0x216001, 47)  # 8KB of SRAM per bank
+    assert SRAM[0x2001] == 47
+    assert mem_map.read(0xA36001) == 47  # mirrored after 16KB
+    with pytest.raises(NotImplementedError):
+        mem_map.read(0x002100)
+
+
+def test_multibyte_reads_like_byte_by_byte():
+    RAM = [i & 0xFF for i in range(2 ** 17)]
+    ROM = [(i * 7) & 0xFF for i in range(2 ** 22)]
+    mem_map = MemoryMapper(HeaderMock(), RAM, ROM, SRAM, False, 0x7FFF)
+    for address in (0x000010, 0x001FFE, 0x001FFF, 0x00FFFF, 0x7EFFFE, 0x7E1FFF, 0x818000, 0x81FFFF, 0xFFFFFF):
+        for wrapp in (False, True):
+            assert mem_map.read16(address, wrapp) == read16_bytewise(mem_map, address, wrapp)
+            assert mem_map.read24(address, wrapp) == read24_bytewise(mem_map, address, wrapp)
+
+
+def test_write16_wraps_at_the_zero_bank():
+    RAM = [0] * 2 ** 17
+    mem_map = MemoryMapper(HeaderMock(), RAM, ROM, SRAM, False, 0x7FFF)
+    mem_map.write16(0x7E1FFF, 0xBEEF)  # crosses a page
+    mem_map.write16(0x7E0FFF, 0xCAFE, wrapp=True)  # second byte at 00:1000
+
+    assert RAM[0x1FFF:0x2001] == [0xEF, 0xBE]
+    assert RAM[0x0FFF] == 0xFE
+    assert RAM[0x1000] == 0xCA
+
+
+def test_mapper_owns_bytearray_WRAM_and_SRAM():
+    mem_map = MemoryMapper(HeaderMock(), None, ROM, None, False, 0x8000)
+    wram = mem_map.wram()
+    mem_map.write(0x7E1234, 0x56)
+    mem_map.write(0x7F1234, 0x78)  # the second 64 KB, not a mirror of 7E:9234
+    mem_map.write(0x707FFF, 0x9A)
+
+    assert len(wram) == 0x20000
+    assert len(mem_map.sram()) == 0x8000
+    assert wram[0x01234] == 0x56  # the view sees every write
+    assert wram[0x11234] == 0x78
+    assert mem_map.read(0x7E9234) == 0
+    assert mem_map.sram()[0x7FFF] == 0x9A
+
+    snapshot = bytes(wram)
+    mem_map.write(0x000010, 0xFF)
+    assert bytes(mem_map.wram()) != snapshot
+    assert mem_map.move(0x7E1234, 0x7E1235, 0x10, 1)  # fills with 0x56
+    assert bytes(wram[0x1234:0x1246]) == b'\x56' * 0x11 + b'\x00'
+
+
+def test_mapped_ROM_with_copier_header(tmp_path):
+    ROM_file = tmp_path / 'test.smc'
+    ROM_file.write_bytes(b'\xEE' * 512 + bytes(range(256)) * 0x100)  # header + 64 KB
+    ROM, ROM_offset = map_rom(str(ROM_file))
+    mem_map = MemoryMapper(HeaderMock(), None, ROM, None, False, 0x8000, ROM_offset)
+
+    assert ROM_offset == 512
+    assert mem_map.read(0x008000) == 0x00
+    assert mem_map.read(0x01FFFF) == 0xFF
+    assert mem_map.read16(0x808001) == 0x0201
+    buffer, base, first, last = mem_map.code_window(0x00)
+    assert buffer is ROM  # no copy
+    assert base + 0x8000 == 512
+    with pytest.raises(CanNotWriteROMException):
+        mem_map.write(0x008000, 1)
+
+
+def test_mapped_ROM_without_copier_header(tmp_path):
+    ROM_file = tmp_path / 'test.sfc'
+    ROM_file.write_bytes(bytes(range(256)) * 0x80)
+    ROM, ROM_offset = map_rom(str(ROM_file))
+
+    assert ROM_offset == 0
+    assert MemoryMapper(HeaderMock(), None, ROM, None, False, 0x8000).read(0x008001) == 0x01
+
+
+def test_fork_shares_WRAM_until_written():
+    RAM = [0] * 2 ** 17
+    mem_map = MemoryMapper(HeaderMock(), RAM, ROM, SRAM, False, 0x7FFF)
+    mem_map.write(0x7E1234, 1)
+    mem_map.write(0x7F5678, 9)
+    fork = mem_map.fork()
+
+    fork.write(0x7E1234, 2)
+    assert fork.read(0x7E1234) == 2
+    assert fork.read(0x801234) == 2  # the mirror is mapped to the same copy
+    assert mem_map.read(0x7E1234) == 1
+    assert RAM[0x1234] == 1
+    assert len(fork.private) == 1  # only the written page was copied
+    assert fork.read(0x7F5678) == 9
+
+    mem_map.write(0x001234, 3)
+    assert fork.read(0x7E1234) == 2
+    assert RAM[0x1234] == 1  # shared by both, neither writes it any more
+    assert fork.fork().read(0x001234) == 2
+    assert bytes(fork.wram())[0x1234] == 2
+    assert len(fork.wram()) == 0x20000
+
+
+def test_fork_copies_SRAM_and_registers():
+    SRAM = [0] * 0x7FFF  # the mirror starts again inside the last page
+    mem_map = MemoryMapper(HeaderMock(), RAM, ROM, SRAM, False, 0x7FFF)
+    fork = mem_map.fork()
+
+    fork.write(0x707FFE, 5)
+    fork.write(0x004207, 0x12)
+    assert fork.read(0x707FFE) == 5
+    assert mem_map.read(0x707FFE) == 0
+    assert SRAM[0x7FFE] == 0
+    assert fork.mapper.internal_cpu_registers.HTIMEL_8 == 0x12
+    assert mem_map.mapper.internal_cpu_registers.HTIMEL_8 == 0
@@ -0,0 +1,25 @@
+from pysnes.memory import MemoryMapper
+from pysnes.mimloader import machineEmulator
+from pysnes.test.mocks import HeaderMock
+
+# .../PySNES/venv/$ py.test pysnes/test/
+
+# the WRAM is a bytearray of the mapper: the words have to go through write16
+def test_prng_power_on():
+    memory = MemoryMapper(HeaderMock(), None, bytearray(0x8000), None, False, 0x8000)
+    machineEmulator(memory).prngPowerOn()
+
+    assert memory.read16(0x04E4) == 0x119A
+    assert memory.read16(0x04E0) == 0x119A
+    assert memory.read16(0x04E6) == 0x0E84
+    assert memory.read16(0x04E2) == 0x0E84
+    assert memory.read16(0x04EA) == 0x4321
+    assert memory.read16(0x7E04EC) == 0x8765
+
+
+def test_prng_load_objects():
+    memory = MemoryMapper(HeaderMock(), None, bytearray(0x20000), None, False, 0x8000)
+    machineEmulator(memory).prngLoadObjects()
+
+    assert memory.read16(0x07B3) == 0x0003
+    assert memory.read16(0x06A3) == 0x0000  # $FFFF, then the level of 06DB
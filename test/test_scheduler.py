@@ -0,0 +1,145 @@
+from pysnes import timing
+from pysnes.cpu import CPU65816, StopReason
+from pysnes.internal_cpu import InternalCPURegisters
+from pysnes.memory import MemoryMapper
+from pysnes.scheduler import Scheduler
+from pysnes.test.mocks import HeaderMock, ZeroedMemoryMock
+
+# .../PySNES/venv/$ py.test pysnes/test/
+
+
+# INX, BRA $8000 and the interrupt handler INY, BRA $9000 for NMI and IRQ
+def looping_cpu():
+    mem = ZeroedMemoryMock([0xE8, 0x80, 0xFD])
+    for address, byte in enumerate([0xC8, 0x80, 0xFD]):
+        mem.write(0x9000 + address, byte)
+    for vector in (0xFFEA, 0xFFEE):  # native NMI and IRQ
+        mem.write(vector, 0x00)
+        mem.write(vector + 1, 0x90)
+    cpu = CPU65816(mem)
+    cpu.e = 0
+    cpu.P = 0b00110000
+    cpu.SP = 0x1FF
+    return cpu
+
+
+def test_events_run_in_order_when_due():
+    cpu = looping_cpu()
+    scheduler = Scheduler(cpu)
+    calls = []
+    scheduler.schedule(100, lambda cycle: calls.append((cycle, cpu.cycles)))
+    scheduler.schedule(50, lambda cycle: calls.append((cycle, cpu.cycles)))
+    scheduler.schedule(50, lambda cycle: calls.append(('same', cpu.cycles)))
+
+    assert scheduler.run(200) == StopReason.CYCLES
+
+    assert [call[0] for call in calls] == [50, 'same', 100]
+    for cycle, now in calls[::2]:
+        assert cycle <= now < cycle + 5  # the CPU stopped right at the event
+
+
+def test_NMI_at_vblank():
+    cpu = looping_cpu()
+    registers = InternalCPURegisters()
+    registers.NMITIMEN_8 = 0x80
+    scheduler = Scheduler(cpu, registers)
+
+    scheduler.run_to(timing.VBLANK_SCANLINE * timing.CYCLES_PER_SCANLINE - 10)
+    assert cpu.Y == 0
+    assert not registers.RDNMI_8 & 0x80
+
+    scheduler.run(20)
+
+    assert registers.RDNMI_8 & 0x80
+    assert cpu.SP == 0x1FF - 4  # once
+    assert cpu.PBR == 0x00
+    assert 0x9000 <= cpu.PC <= 0x9002
+    assert registers.read(0x4210) & 0x80
+    assert not registers.RDNMI_8 & 0x80  # reading acknowledges it
+
+
+def test_no_NMI_if_disabled():
+    cpu = looping_cpu()
+    scheduler = Scheduler(cpu, InternalCPURegisters())
+
+    scheduler.run_frames(1)
+
+    assert cpu.SP == 0x1FF
+    assert cpu.Y == 0
+    assert cpu.cycles >= timing.CYCLES_PER_FRAME
+
+
+def test_V_IRQ_until_acknowledged():
+    cpu = looping_cpu()
+    registers = InternalCPURegisters()
+    registers.NMITIMEN_8 = 0x20  # IRQ at the start of scanline VTIME
+    registers.VTIMEL_8 = 10
+    scheduler = Scheduler(cpu, registers)
+
+    scheduler.run_to(10 * timing.CYCLES_PER_SCANLINE - 10)
+    assert not cpu.irq_line
+
+    scheduler.run(20)
+    assert cpu.irq_line
+    assert cpu.SP == 0x1FF - 4
+    assert 0x9000 <= cpu.PC <= 0x9002
+
+    registers.read(0x4211)
+    scheduler.run(timing.CYCLES_PER_SCANLINE)
+    assert not cpu.irq_line
+
+
+def test_H_IRQ_on_every_scanline():
+    cpu = looping_cpu()
+    registers = InternalCPURegisters()
+    registers.NMITIMEN_8 = 0x10  # IRQ at dot HTIME
+    registers.HTIMEL_8 = 100
+    scheduler = Scheduler(cpu, registers)
+    irqs = []
+    scheduler.timer_irq = lambda cycle: irqs.append(cycle)
+
+    scheduler.run_to(3 * timing.CYCLES_PER_SCANLINE)
+
+    dot = 100 * timing.MASTER_CYCLES_PER_DOT // timing.MASTER_CYCLES_PER_CYCLE
+    assert irqs == [timing.CYCLES_PER_SCANLINE + dot, 2 * timing.CYCLES_PER_SCANLINE + dot]
+
+
+def test_DMA_halts_the_CPU():
+    cpu = looping_cpu()
+    scheduler = Scheduler(cpu)
+    done = []
+
+    scheduler.dma(0x100, done.append)
+    assert cpu.cycles == 0x100 * timing.MASTER_CYCLES_PER_DMA_BYTE // timing.MASTER_CYCLES_PER_CYCLE
+    assert cpu.X == 0
+
+    scheduler.run(1)
+    assert done == [0x100]
+
+
+# LDA #$00, STA $4305, LDA #$01, STA $4306 (256 bytes on channel 0),
+# LDA #channels, STA $420B (MDMAEN), INX, STP
+def dma_cpu(channels):
+    ROM = bytearray(0x8000)
+    ROM[0:15] = bytes([0xA9, 0x00, 0x8D, 0x05, 0x43, 0xA9, 0x01, 0x8D, 0x06, 0x43,
+                       0xA9, channels, 0x8D, 0x0B, 0x42])
+    ROM[15:17] = bytes([0xE8, 0xDB])
+    memory = MemoryMapper(HeaderMock(), None, ROM, None, False, 0x8000)
+    cpu = CPU65816(memory)
+    cpu.e = 0
+    cpu.P = 0b00110000
+    return cpu, Scheduler(cpu, memory.mapper.internal_cpu_registers)
+
+
+def test_MDMAEN_write_halts_the_CPU():
+    cpu, scheduler = dma_cpu(0x01)
+    without_dma, without_scheduler = dma_cpu(0x00)
+
+    assert scheduler.run(1000) == StopReason.STOPPED
+    assert without_scheduler.run(1000) == StopReason.STOPPED
+    assert cpu.X == 1
+    assert cpu.cycles - without_dma.cycles == \
+        0x100 * timing.MASTER_CYCLES_PER_DMA_BYTE // timing.MASTER_CYCLES_PER_CYCLE
+    assert cpu.memory.mapper.internal_cpu_registers.MDMAEN_8 == 0  # done
+    assert cpu.memory.mapper.dma.registers[0x4305] == 0
+    assert without_dma.memory.mapper.internal_cpu_registers.MDMAEN_8 == 0
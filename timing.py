@@ -0,0 +1,19 @@
+# SNES timing (NTSC)
+#
+# The master clock runs at 21.477 MHz. A scanline takes 1364 master cycles and
+# a frame 262 scanlines (312 on PAL consoles).
+# CPU65816.cycles counts CPU cycles. Depending on the accessed memory a CPU
+# cycle takes 6, 8 or 12 master cycles, the numbers below assume 8 (SlowROM).
+
+MASTER_CLOCK = 21477272
+MASTER_CYCLES_PER_SCANLINE = 1364
+MASTER_CYCLES_PER_CYCLE = 8
+MASTER_CYCLES_PER_DOT = 4  # HTIME counts dots
+MASTER_CYCLES_PER_DMA_BYTE = 8
+
+SCANLINES_PER_FRAME = 262
+SCANLINES_PER_FRAME_PAL = 312
+VBLANK_SCANLINE = 225  # first scanline of vblank, the NMI comes at its start
+
+CYCLES_PER_SCANLINE = MASTER_CYCLES_PER_SCANLINE // MASTER_CYCLES_PER_CYCLE
+CYCLES_PER_FRAME = CYCLES_PER_SCANLINE * SCANLINES_PER_FRAME